@@ -0,0 +1,72 @@
+import numpy as np
+
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class OHLCVWindow:
+    """
+    NumPy backed replacement for RollingWindow[TradeBar]: the latest `size` bars with one array per field.
+
+    Every bar is written twice, at i and i + size, so the bars in order are always one contiguous
+    slice and the field properties are zero-copy views. Like RollingWindow they index newest first,
+    e.g. `window.close[0]` is the latest close. Views are only valid until the next `add`.
+
+    :param size: The number of bars kept.
+    """
+    def __init__(self, size) -> None:
+        self.size = size
+        self.count = 0
+        # where the next bar is written
+        self.position = 0
+        self.values = np.zeros((len(FIELDS), size * 2))
+        self.times = np.zeros(size * 2, dtype='datetime64[us]')
+
+    def add(self, time, open, high, low, close, volume):
+        position = self.position
+        self.values[:, position] = self.values[:, position + self.size] = (open, high, low, close, volume)
+        self.times[position] = self.times[position + self.size] = time
+        self.position = (position + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def chronological(self, field):
+        """
+        Oldest first view of a field's values.
+
+        :param field: One of open, high, low, close, volume or time.
+        """
+        end = self.position + self.size
+        if field == 'time':
+            return self.times[end - self.count:end]
+        return self.values[FIELDS.index(field), end - self.count:end]
+
+    @property
+    def ready(self) -> bool:
+        return self.count == self.size
+
+    @property
+    def time(self):
+        return self.chronological('time')[::-1]
+
+    @property
+    def open(self):
+        return self.chronological('open')[::-1]
+
+    @property
+    def high(self):
+        return self.chronological('high')[::-1]
+
+    @property
+    def low(self):
+        return self.chronological('low')[::-1]
+
+    @property
+    def close(self):
+        return self.chronological('close')[::-1]
+
+    @property
+    def volume(self):
+        return self.chronological('volume')[::-1]
+
+    def __len__(self):
+        return self.count
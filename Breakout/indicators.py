@@ -1,34 +1,79 @@
 from AlgorithmImports import SimpleMovingAverage, AverageTrueRange, RollingWindow, TradeBar,\
     Resolution, Maximum
+from bisect import bisect_right
 from datetime import timedelta
+from bar_window import OHLCVWindow
+from weekly_bars import WeeklyBars
+from resistance import resistance_levels
 
 
 class SymbolIndicators:
-    def __init__(self, algorithm, symbol) -> None:
+    def __init__(self, algorithm, symbol, history=None, range_filter: float = 0.005, peak_range: int = 3) -> None:
+        """
+        :param algorithm: The algorithm instance.
+        :param symbol: The stock symbol.
+        :param history: Optional daily history of this symbol indexed by time, e.g. its slice of
+            a multi symbol History request. Requested for the symbol alone when not provided.
+        :param range_filter: The resistance levels range filter used for breakouts.
+        :param peak_range: The resistance levels peak range used for breakouts.
+        """
+        self.symbol = symbol
+        self.range_filter = range_filter
+        self.peak_range = peak_range
         self.algorithm = algorithm
         self.sma = SimpleMovingAverage(50)
         self.sma_volume = SimpleMovingAverage(50)
         self.sma_200 = SimpleMovingAverage(200)
         self.atr = AverageTrueRange(21)
-        self.trade_bar_window = RollingWindow[TradeBar](50)
+        # latest 50 daily bars, newest first
+        self.bars = OHLCVWindow(50)
+        # weekly bars of the days in self.bars, used for resistance levels
+        self.weekly_bars = WeeklyBars(self.bars)
+        # breakout resistance levels and the weekly state they were found for
+        self.resistance_levels_cache = []
+        self.resistance_levels_key = None
         self.max_volume = Maximum(200)
         self.max_price = Maximum(200)
         self.sma_window = RollingWindow[float](2)
         self.breakout_window = RollingWindow[float](1)
+        # end time of the latest bar, bars up to it were already seen
+        self.end_time = None
+
+        if history is None:
+            history = algorithm.History(symbol, 200, Resolution.Daily)
+            history = history.loc[symbol] if not history.empty else history
+        self.warm_up(history)
+
+    def warm_up(self, history):
+        """
+        Updates the indicators with daily history bars, oldest first.
+
+        :param history: DataFrame indexed by bar end time with open, high, low, close and volume columns.
+        """
+        if history.empty:
+            return
+        bars = history[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=float)
+        for time, (open, high, low, close, volume) in zip(history.index, bars):
+            self.update(TradeBar(time - timedelta(1), self.symbol, open, high, low, close, volume, timedelta(1)))
 
-        history = algorithm.History(symbol, 200, Resolution.Daily)
-        for data in history.itertuples():
-            trade_bar = TradeBar(data.Index[1], data.Index[0], data.open, data.high, data.low, data.close, data.volume, timedelta(1))
-            self.update(trade_bar)
-        
     def update(self, trade_bar):
-        self.sma.Update(trade_bar.EndTime, trade_bar.Close)
-        self.sma_volume.Update(trade_bar.EndTime, trade_bar.Volume)
-        self.sma_200.Update(trade_bar.EndTime, trade_bar.Close)
+        """
+        Updates the indicators with a daily bar. Bars ending at or before the latest bar are skipped,
+        so a bar already taken from history isn't counted twice when it streams in.
+        """
+        end_time = trade_bar.EndTime
+        if self.end_time is not None and end_time <= self.end_time:
+            return
+        self.end_time = end_time
+        open, high, low, close, volume = trade_bar.Open, trade_bar.High, trade_bar.Low, trade_bar.Close, trade_bar.Volume
+        self.sma.Update(end_time, close)
+        self.sma_volume.Update(end_time, volume)
+        self.sma_200.Update(end_time, close)
         self.atr.Update(trade_bar)
-        self.trade_bar_window.Add(trade_bar)
-        self.max_volume.Update(trade_bar.EndTime, trade_bar.Volume)
-        self.max_price.Update(trade_bar.EndTime, trade_bar.High)
+        self.bars.add(end_time, open, high, low, close, volume)
+        self.weekly_bars.update(end_time, open, high, low, close, volume)
+        self.max_volume.Update(end_time, volume)
+        self.max_price.Update(end_time, high)
         self.sma_window.Add(self.sma.Current.Value)
         if self.breakout_ready:
             level = self.is_breakout
@@ -42,7 +87,7 @@ class SymbolIndicators:
             self.sma_volume.IsReady,
             self.sma_200.IsReady,
             self.atr.IsReady,
-            self.trade_bar_window.IsReady,
+            self.bars.ready,
             self.max_volume.IsReady,
             self.max_price.IsReady,
             self.sma_window.IsReady,
@@ -52,17 +97,13 @@ class SymbolIndicators:
     def breakout_ready(self):
         return all((
             self.sma_volume.IsReady,
-            self.trade_bar_window.IsReady,
+            self.bars.ready,
         ))
     
     @property
     def max_vol_on_down_day(self):
-        max_vol = 0
-        for i in range(0, 10):
-            trade_bar = self.trade_bar_window[i]
-            if trade_bar.Close < trade_bar.Open:
-                max_vol = max(max_vol, trade_bar.Volume)
-        return max_vol
+        down_days = self.bars.close[:10] < self.bars.open[:10]
+        return self.bars.volume[:10].max(where=down_days, initial=0)
     
     def atrp(self, close):
         return (self.atr.Current.Value / close) * 100
@@ -75,8 +116,7 @@ class SymbolIndicators:
         
         :return: True if uptrending.
         """
-        trade_bar_lts = self.trade_bar_window[0]
-        return self.sma.Current.Value > self.sma_200.Current.Value and trade_bar_lts.Close > self.sma_200.Current.Value
+        return self.sma.Current.Value > self.sma_200.Current.Value and self.bars.close[0] > self.sma_200.Current.Value
 
     @property
     def high_3_weeks_ago(self) -> bool:
@@ -88,72 +128,69 @@ class SymbolIndicators:
     
     def get_resistance_levels(self, range_filter: float = 0.005, peak_range: int = 3) -> list:
         """
-        Finds major resistance levels for data in self.trade_bar_window.
-        Resamples daily data to weekly to find weekly resistance levels.
+        Finds major resistance levels for data in self.bars.
+        Uses the weekly bars of the window to find weekly resistance levels.
 
         :param range_filter: Decides if two prices are part of the same resistance level.
         :param peak_range: Number of candles to check either side of peak candle.
-        :return: set of price resistance levels.
-        """
-        df = self.algorithm.PandasConverter.GetDataFrame[TradeBar](list(self.trade_bar_window)[::-1]).reset_index()
-        df.index = df.time
-        df = df.resample('W-Fri')
-        df = df.apply({
-            'open':'first',
-            'high':'max',
-            'low':'min',
-            'close':'last',
-            'volume':'sum'
-        })
-        peaks = []
-        for i in range(peak_range, len(df) - peak_range):
-            greater_than_prior_prices = df.iloc[i].high > df.iloc[i - peak_range].high
-            greater_than_future_prices = df.iloc[i].high > df.iloc[i + peak_range].high
-            if greater_than_prior_prices and greater_than_future_prices:
-                peaks.append(df.iloc[i].high)
-        del df
-        levels = []
-        peaks = sorted(peaks)
-        for i, curr_peak in enumerate(peaks):
-            level = None
-            if i == 0:
-                continue
-            prev_peak_upper_range = peaks[i - 1] + (peaks[i - 1] * range_filter)
-            if curr_peak < prev_peak_upper_range:
-                level = curr_peak
-            if level and levels:
-                prev_level_upper_range = levels[-1] + (levels[-1] * range_filter)
-                if level < prev_level_upper_range:
-                    levels.pop()
-            if level:
-                levels.append(level)
-        return levels
+        :return: ascending list of price resistance levels.
+        """
+        return resistance_levels(self.weekly_bars.highs, range_filter, peak_range)
     
+    def resistance_levels_state(self, peak_range: int = 3):
+        """
+        Identifies the weekly state resistance levels depend on.
+        Between week openings and closings only the oldest and the current weekly highs change,
+        and neither can be a peak, they only matter as the neighbours of the first and last candidate.
+        """
+        highs = self.weekly_bars.highs
+        if len(highs) <= peak_range * 2:
+            return self.weekly_bars.version, None, None
+        return (
+            self.weekly_bars.version,
+            highs[peak_range] > highs[0],
+            highs[-1 - peak_range] > highs[-1],
+        )
+
+    @property
+    def resistance_levels(self) -> list:
+        """
+        `get_resistance_levels` with the breakout range filter and peak range, cached until a weekly
+        bar opens or closes or a change to the oldest or current week changes a candidate peak.
+        """
+        key = self.resistance_levels_state(self.peak_range)
+        if key != self.resistance_levels_key:
+            self.resistance_levels_cache = self.get_resistance_levels(self.range_filter, self.peak_range)
+            self.resistance_levels_key = key
+        return self.resistance_levels_cache
+
     @property
     def is_breakout(self):
         """
         Determines if the current candle is a breakout.
-        If so, returns the breakout price level.
-        """
-        trade_bar_lts = self.trade_bar_window[0]
-        trade_bar_prev = self.trade_bar_window[1]
-        for level in self.get_resistance_levels():
-            if level > trade_bar_lts.High:
-                # levels are ordered in ascending order.
-                # no point in checking any more.
-                break
-            # require above average volume
-            if not trade_bar_lts.Volume > self.sma_volume.Current.Value:
-                continue
-            daily_breakout = trade_bar_lts.Open < level and trade_bar_lts.Close > level
-            gap_up_breakout = trade_bar_prev.Close < level and trade_bar_lts.Open > level
-            if daily_breakout or gap_up_breakout:
-                return level
+        If so, returns the lowest breakout price level.
+        """
+        # require above average volume
+        if not self.bars.volume[0] > self.sma_volume.Current.Value:
+            return None
+        open, close = self.bars.open[0], self.bars.close
+        levels = self.resistance_levels
+        # levels are in ascending order, only those up to the high can be broken
+        count = bisect_right(levels, self.bars.high[0])
+        breakouts = []
+        # the lowest level above the open, closed above
+        i = bisect_right(levels, open, 0, count)
+        if i < count and levels[i] < close[0]:
+            breakouts.append(levels[i])
+        # the lowest level above the previous close, gapped above
+        i = bisect_right(levels, close[1], 0, count)
+        if i < count and levels[i] < open:
+            breakouts.append(levels[i])
+        return min(breakouts, default=None)
             
     @property
     def close_range_pc(self):
-        trade_bar_lts = self.trade_bar_window[0]
-        high, low, close = trade_bar_lts.High, trade_bar_lts.Low, trade_bar_lts.Close
+        high, low, close = self.bars.high[0], self.bars.low[0], self.bars.close[0]
         candle_size = high - low
         close_size = close - low
         return (close_size / candle_size) * 100
\ No newline at end of file
@@ -1,12 +1,15 @@
 from AlgorithmImports import QCAlgorithm, Resolution, BrokerageName
+from datetime import timedelta
 from indicators import SymbolIndicators
+from scanner import PatternScanner, order_tag
+from risk import position_size, exit_signal
+from screen import Screen, DownloadSource, FileSource
+from signal_store import SignalStore
+from latency import LatencyRecorder
 
 
-HVC = 'high volume close'
-INSIDE_DAY = 'inside day'
 KMA_PULLBACK = 'key moving average pullback'
 POCKET_PIVOT = 'pocket pivot'
-BREAKOUT = 'breakout'
 
 
 class Breakout(QCAlgorithm):
@@ -15,18 +18,45 @@ class Breakout(QCAlgorithm):
         self.UniverseSettings.Resolution = Resolution.Daily
         self.SetBrokerageModel(BrokerageName.InteractiveBrokersBrokerage)
         self.EQUITY_RISK_PC = 0.0075
+        # logs per bar phase timings and their rolling p95, recorded either way
+        self.LATENCY_LOG = self.LiveMode
+        self.latency = LatencyRecorder(self.live_log if self.LATENCY_LOG else None)
         self.AddUniverse(self.coarse_selection)
         self.symbol_map = {}
+        # symbol of each ticker in symbol_map
+        self.ticker_symbols = {}
+        # screened symbols prefetch already requested history for, so those without history are requested once
+        self.prefetched = set()
+        self.scanner = PatternScanner()
         self.AddEquity("SPY", Resolution.Daily)
         self.SL_RISK_PC = -0.05
         self.TP_TARGET = 0.20
+        # resistance levels used for breakouts, see SymbolIndicators.get_resistance_levels
+        self.RANGE_FILTER = 0.005
+        self.PEAK_RANGE = 3
         self.SYMBOLS_URL = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vRajMcf0SW61y_kCO9s1mhvCxGlGq9PgSRyQyNyQCx9ALfOF800f22Z0OKkL_-PU_jBWowdOBkM6FtM/pub?gid=0&single=true&output=csv'
-        self.screened_symbols = []
+        # set to a local file with one ticker per line to run the live screen offline
+        self.SYMBOLS_PATH = None
+        # minimum time between screen downloads
+        self.SCREEN_TTL = timedelta(hours=1)
+        if self.SYMBOLS_PATH:
+            self.screen = Screen(FileSource(self.SYMBOLS_PATH), self.SCREEN_TTL)
+        elif self.LiveMode:
+            self.screen = Screen(DownloadSource(self, self.SYMBOLS_URL), self.SCREEN_TTL)
+        else:
+            self.screen = Screen(tickers=["ASAN", "TSLA", "RBLX", "DOCN", "FTNT", "DDOG", "NET", "BILL", "NVDA", "AMBA", "INMD", "AMEH", "AEHR", "SITM", "CROX"])
+        # set to a store built by scripts/build_breakout_signals.py to backtest from precomputed signals
+        self.SIGNALS_PATH = None
+        self.signal_store = None
         if not self.LiveMode:
             # backtest configuration
-            self.screened_symbols = ["ASAN", "TSLA", "RBLX", "DOCN", "FTNT", "DDOG", "NET", "BILL", "NVDA", "AMBA", "INMD", "AMEH", "AEHR", "SITM", "CROX"]
             self.SetStartDate(2021, 1, 1)
             self.SetEndDate(2021, 12, 31)
+            if self.SIGNALS_PATH:
+                self.signal_store = SignalStore(self.SIGNALS_PATH)
+                meta = self.signal_store.meta
+                if (meta['range_filter'], meta['peak_range']) != (self.RANGE_FILTER, self.PEAK_RANGE):
+                    raise ValueError(f"{self.SIGNALS_PATH} was built for range filter {meta['range_filter']} and peak range {meta['peak_range']}")
             
 
     def live_log(self, msg):
@@ -47,9 +77,36 @@ class Breakout(QCAlgorithm):
 
         :param coarse: The initial coarse list of stocks.
         """
-        if self.LiveMode:
-            self.update_screened_symbols()
-        return [stock.Symbol for stock in coarse if stock.Symbol.Value in self.screened_symbols]
+        started = self.latency.start()
+        self.update_screened_symbols()
+        symbols = [stock.Symbol for stock in coarse if stock.Symbol.Value in self.screen]
+        if self.signal_store is None:
+            self.prefetch(symbols)
+        self.latency.add('coarse_selection', started, len(symbols))
+        return symbols
+
+    def prefetch(self, symbols):
+        """
+        Creates indicators for newly screened symbols from one multi symbol history request,
+        so OnData doesn't request history symbol by symbol when the screen changes.
+        Symbols without history are left to be created in OnData, and aren't requested again
+        until the screen drops them.
+
+        :param symbols: The screened stock symbols.
+        """
+        symbols = [symbol for symbol in symbols if symbol not in self.symbol_map and symbol not in self.prefetched]
+        if not symbols:
+            return
+        self.prefetched.update(symbols)
+        history = self.History(symbols, 200, Resolution.Daily)
+        if history.empty:
+            return
+        for symbol in symbols:
+            try:
+                symbol_history = history.loc[symbol]
+            except KeyError:
+                continue
+            self.add_indicators(symbol, symbol_history)
 
     def OnData(self, data):
         """
@@ -57,37 +114,80 @@ class Breakout(QCAlgorithm):
 
         :param data: A TradeBars object containing OHLC bars for each stock.
         """
-        
+        started = self.latency.start()
+        if self.signal_store is None:
+            signals = self.computed_signals(data)
+        else:
+            signals = self.stored_signals(data)
+        # patterns of all candidates at once, sorted by lowest volatility
+        for symbol, pattern, level, atr in signals:
+            self.buy(symbol, order_tag=order_tag(pattern, level), atr=atr)
+        self.latency.add('OnData', started, data.Bars.Count)
+        self.latency.end_bar(self.Time)
+
+    def computed_signals(self, data):
+        """
+        Updates the indicators with the bars, sells positions which hit their target or stop
+        and scans the candidates for entry patterns.
+
+        :param data: A TradeBars object containing OHLC bars for each stock.
+        :return: (symbol, pattern, level, atr) tuples.
+        """
         symbols = []
         for symbol in self.ActiveSecurities.Keys:
-            if symbol.Value not in self.screened_symbols:
+            if symbol.Value not in self.screen:
                 continue
             if not data.Bars.ContainsKey(symbol):
                 continue
             if symbol not in self.symbol_map:
-                self.symbol_map[symbol] = SymbolIndicators(self, symbol)
+                self.add_indicators(symbol)
             else:
+                started = self.latency.start()
                 self.symbol_map[symbol].update(data.Bars[symbol])
+                self.latency.add('SymbolIndicators.update', started)
             if not self.symbol_map[symbol].ready:
                 continue
             if self.sell_signal(symbol, data):
                 self.Liquidate(symbol)
             if self.symbol_map[symbol].uptrending and not self.ActiveSecurities[symbol].Invested:
+                self.scanner.record(symbol, self.symbol_map[symbol])
                 symbols.append(symbol)
         self.live_log("processing on data")
         if not symbols:
             self.live_log("no symbols")
-        # sort stocks by lowest volatility
-        for symbol in sorted(symbols, key=lambda symbol: self.symbol_map[symbol].atrp(data.Bars[symbol].Close)):
-            if self.hvc(symbol):
-                self.buy(symbol, order_tag=HVC)
-            if self.inside_day(symbol):
-                self.buy(symbol, order_tag=INSIDE_DAY)
-            breakout = self.breakout(symbol)
-            if breakout:
-                self.buy(symbol, order_tag=f"{BREAKOUT}: {breakout}")
+        return [
+            (symbol, pattern, level, self.symbol_map[symbol].atr.Current.Value)
+            for symbol, pattern, level in self.scanner.scan(symbols)
+        ]
+
+    def stored_signals(self, data):
+        """
+        Sells positions which hit their target or stop and looks up the candidates' entry patterns
+        in the signal store, without updating any indicators.
+        Stored signals are only kept for ready, uptrending symbols.
+
+        :param data: A TradeBars object containing OHLC bars for each stock.
+        :return: (symbol, pattern, level, atr) tuples.
+        """
+        symbols = []
+        date = None
+        for symbol in self.ActiveSecurities.Keys:
+            if symbol.Value not in self.screen:
+                continue
+            if not data.Bars.ContainsKey(symbol):
+                continue
+            date = data.Bars[symbol].Time.date()
+            if self.Portfolio[symbol].Invested and self.sell_signal(symbol, data):
+                self.Liquidate(symbol)
+            if not self.ActiveSecurities[symbol].Invested:
+                symbols.append(symbol)
+        self.live_log("processing on data")
+        if not symbols:
+            self.live_log("no symbols")
+            return []
+        return self.signal_store.scan(date, symbols)
     
-    def buy(self, symbol, order_tag=None, order_properties=None, price=None):
+    def buy(self, symbol, order_tag=None, order_properties=None, price=None, atr=None):
         """
         Generates a market order for a stock.
         
@@ -95,9 +195,10 @@ class Breakout(QCAlgorithm):
         :param order_tag: An order tag string which can be used for reporting.
         :param order_properties: Custom order properties which can be used for stop market orders.
         :param price: If defined, then a stop market order will be generated at the specified price.
+        :param atr: The symbol's ATR(21), taken from its indicators when not given.
         """
-        
-        position_size = self.get_position_size(symbol)
+        started = self.latency.start()
+        position_size = self.get_position_size(symbol, atr)
         position_value = position_size * self.ActiveSecurities[symbol].Price
         if position_value < self.Portfolio.Cash:
             if price:
@@ -108,17 +209,25 @@ class Breakout(QCAlgorithm):
                 self.MarketOrder(symbol, position_size, tag=order_tag)
         else:
             self.live_log(f"insufficient cash ({self.Portfolio.Cash}) to purchase {symbol.Value}")
+        self.latency.add('buy', started)
 
-    def get_position_size(self, symbol):
+    def get_position_size(self, symbol, atr=None):
         """
         Gets the lowest risk position size based on either volatility or risk:
             volatility_size = ($total equity * portfolio risk %) / ATR(21)
             risk_size = ($total equity * portfolio risk %) / $value of risk on trade
         :param symbol: The stock symbol being traded.
+        :param atr: The symbol's ATR(21), taken from its indicators when not given.
         """
-        volatility_size = (self.Portfolio.TotalPortfolioValue * self.EQUITY_RISK_PC) / self.symbol_map[symbol].atr.Current.Value
-        risk_size = (self.Portfolio.TotalPortfolioValue * self.EQUITY_RISK_PC) / (self.ActiveSecurities[symbol].Price * (self.SL_RISK_PC * -1))
-        return round(min(volatility_size, risk_size))
+        if atr is None:
+            atr = self.symbol_map[symbol].atr.Current.Value
+        return position_size(
+            self.Portfolio.TotalPortfolioValue,
+            self.EQUITY_RISK_PC,
+            atr,
+            self.ActiveSecurities[symbol].Price,
+            self.SL_RISK_PC,
+        )
     
     def sell_signal(self, symbol, slice):
         """
@@ -128,104 +237,29 @@ class Breakout(QCAlgorithm):
         :param slice: A TradeBars slice object containing OHLC data for a single period.
         """
         
-        profit = self.Portfolio[symbol].UnrealizedProfitPercent
-        return profit >= self.TP_TARGET or profit <= self.SL_RISK_PC
-    
-    def hvc(self, symbol): 
-        """ 
-        This pattern occurs after a stock gaps up on huge volume due to earnings or another major news event. 
-        The most important point for the stock going forwards is the gap up closing price. 
-        Highest Volume Ever (HVE) 
-        · Highest Volume in 1 Year (HVIPO) 
-        · Highest Volume Since IPO Week (HVIPO) 
-        · Higheset Volume Since Last EPS (HVLE) 
-        These characteristics show clear INSTITUTIONAL DEMAND. 
-        · 75% (or more) closing range on gap day 
-        · Gap to new highs or within 20% of prior highs         
-        The closing price of the gap up on day 1 is the High Volume Close (HVC). 
-        Exit: 3-5% hard stop below the HVC OR an end-of-day close below this level depending on the market environment. 
-
-        :param symbol: The stock symbol.
-        """ 
-        indicators: SymbolIndicators = self.symbol_map[symbol] 
-        trade_bar_lts = indicators.trade_bar_window[0] 
-        trade_bar_prev = indicators.trade_bar_window[1] 
-        # highest vol in 200 days 
-        if not indicators.max_volume.Current.Value == trade_bar_lts.Volume: 
-            return False 
-        # closing range PC above 75; formula = ((close - low) / ((high - low) / 100)) 
-        if not indicators.close_range_pc >= 75: 
-            return False
-        # ensure the stock hasn't gapped down previously
-        if trade_bar_lts.Open < trade_bar_prev.Close and trade_bar_lts.Close < trade_bar_prev.Close:
-            return False
-        # must occur within an uptrend 
-        if not indicators.uptrending : 
-            return False
-        return True
-    
-    def inside_day(self, symbol): 
-        """ 
-        · Inside Day (today's whole price bar within yesterday's)
-        Two day chart pattern.
-        The body of the second candle must fit inside the first candle.
-        Vol on the second day must be below average.
-        Second day must have a positive close.
-        Must occur within a general market uptrend.
-        Entry:
-            Price closes above the high of the first day after the pattern.
-
-        :param symbol: The stock symbol.
-        """ 
-        indicators: SymbolIndicators = self.symbol_map[symbol] 
-        trade_bar_lts = indicators.trade_bar_window[0] 
-        pattern_day_2 = indicators.trade_bar_window[1] 
-        pattern_day_1 = indicators.trade_bar_window[2] 
-        # inside day 
-        if not ((pattern_day_2.High < pattern_day_1.High) and (pattern_day_2.Low > pattern_day_1.Low)): 
-            return False 
-        # below avg vol 
-        if pattern_day_2.Volume > indicators.sma_volume.Current.Value: 
-            return False 
-        # ensure positive close 
-        if pattern_day_2.Open > pattern_day_2.Close: 
-            return False 
-        # must occur within a base 
-        if not indicators.high_7_weeks_ago: 
-            return False 
-        # must occur within an uptrend 
-        if not indicators.uptrending : 
-            return False
-        # closed above the inside day high
-        return trade_bar_lts.Close > pattern_day_1.High
-    
-    def breakout(self, symbol):
-        """
-        Identifies if the stock is uptrending and is within 5% of a breakout level.
-        Price must be above the breakout level.
-        The breakout level must be within 10% of the 50 day high.
-
-        :param symbol: The stock symbol.
-        :return: The breakout level or None.
-        """
-        indicators: SymbolIndicators = self.symbol_map[symbol]
-        trade_bar_lts = indicators.trade_bar_window[0]
-        if not (indicators.uptrending and indicators.breakout_window.IsReady):
-            return
-        level = indicators.breakout_window[0]
-        if not (level * 1.05 > trade_bar_lts.Close > level):
-            return
-        if indicators.max_price.Current.Value > level * 1.1:
-            return
-        return level
+        return exit_signal(self.Portfolio[symbol].UnrealizedProfitPercent, self.TP_TARGET, self.SL_RISK_PC)
     
     def update_screened_symbols(self):
         """
-        When in live mode, updates the stock list filter based on stocks in a google sheet.
+        Refreshes the screen from its source (the google sheet when live) once SCREEN_TTL has passed.
+        Indicators of removed symbols are dropped, added symbols are prefetched by coarse_selection.
         """
-        self.screened_symbols = self.Download(self.SYMBOLS_URL).split("\r\n")
-        self.live_log(f"symbols updated: {','.join(self.screened_symbols)}")
-        for symbol in list(self.symbol_map.keys()):
-            if symbol.Value not in self.screened_symbols:
-                self.live_log(f"removed from indicators: {symbol.Value}")
-                del self.symbol_map[symbol]
+        started = self.latency.start()
+        added, removed = self.screen.refresh(self.Time)
+        if added or removed:
+            self.live_log(f"symbols updated: added {','.join(sorted(added))} removed {','.join(sorted(removed))}")
+            self.prefetched = {symbol for symbol in self.prefetched if symbol.Value not in removed}
+            for ticker in removed:
+                if ticker in self.ticker_symbols:
+                    self.live_log(f"removed from indicators: {ticker}")
+                    self.remove_indicators(self.ticker_symbols[ticker])
+        self.latency.add('update_screened_symbols', started, len(self.screen))
+
+    def add_indicators(self, symbol, history=None):
+        self.symbol_map[symbol] = SymbolIndicators(self, symbol, history, self.RANGE_FILTER, self.PEAK_RANGE)
+        self.ticker_symbols[symbol.Value] = symbol
+
+    def remove_indicators(self, symbol):
+        del self.symbol_map[symbol]
+        del self.ticker_symbols[symbol.Value]
+        self.scanner.remove(symbol)
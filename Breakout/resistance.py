@@ -0,0 +1,86 @@
+import numpy as np
+
+
+def find_peaks(highs, peak_range: int = 3):
+    """
+    Returns the highs greater than the highs `peak_range` candles before and after them.
+    Works along the last axis, so a 2-D (symbols x weeks) array gives a mask per symbol.
+
+    :param highs: Array of highs, oldest first. NaN highs are never peaks.
+    :param peak_range: Number of candles to check either side of peak candle.
+    :return: Boolean mask over the highs.
+    """
+    highs = np.asarray(highs, dtype=float)
+    mask = np.zeros(highs.shape, dtype=bool)
+    length = highs.shape[-1]
+    if length > peak_range * 2:
+        candidates = highs[..., peak_range:length - peak_range]
+        mask[..., peak_range:length - peak_range] = (
+            (candidates > highs[..., :length - peak_range * 2]) & (candidates > highs[..., peak_range * 2:])
+        )
+    return mask
+
+
+def cluster_levels(peaks, range_filter: float = 0.005):
+    """
+    Clusters peak prices into resistance levels.
+    A peak within `range_filter` of the next lower peak is a level, and of levels within
+    `range_filter` of each other only the highest is kept.
+    Works along the last axis; NaN entries are ignored.
+
+    :param peaks: Array of peak prices in any order.
+    :param range_filter: Decides if two prices are part of the same resistance level.
+    :return: Array of the same shape holding the ascending levels first, padded with NaN.
+    """
+    peaks = np.sort(np.asarray(peaks, dtype=float), axis=-1)
+    levels = np.full(peaks.shape, np.nan)
+    if peaks.shape[-1] < 2:
+        return levels
+    previous = peaks[..., :-1]
+    current = peaks[..., 1:]
+    levels[..., 1:] = np.where(current < previous + (previous * range_filter), current, np.nan)
+    # NaN sorts last, leaving each row's levels ascending and contiguous
+    levels = np.sort(levels, axis=-1)
+    following = np.full(levels.shape, np.nan)
+    following[..., :-1] = levels[..., 1:]
+    # a level is replaced by the next one when that falls within its range
+    return np.sort(np.where(following < levels + (levels * range_filter), np.nan, levels), axis=-1)
+
+
+def resistance_levels(highs, range_filter: float = 0.005, peak_range: int = 3) -> list:
+    """
+    Finds resistance levels from one symbol's weekly highs, oldest first.
+    The same computation as `find_peaks` and `cluster_levels` without the NaN padding
+    they need to work on many symbols at once.
+
+    :param highs: Sequence of weekly highs, NaN for weeks without data.
+    :param range_filter: Decides if two prices are part of the same resistance level.
+    :param peak_range: Number of candles to check either side of peak candle.
+    :return: Ascending list of price resistance levels.
+    """
+    highs = np.asarray(highs, dtype=float)
+    length = len(highs)
+    if length <= peak_range * 2:
+        return []
+    candidates = highs[peak_range:length - peak_range]
+    peaks = np.sort(candidates[(candidates > highs[:length - peak_range * 2]) & (candidates > highs[peak_range * 2:])])
+    levels = peaks[1:][peaks[1:] < peaks[:-1] + (peaks[:-1] * range_filter)]
+    # a level is replaced by the next one when that falls within its range
+    replaced = np.zeros(len(levels), dtype=bool)
+    replaced[:-1] = levels[1:] < levels[:-1] + (levels[:-1] * range_filter)
+    return levels[~replaced].tolist()
+
+
+def resistance_levels_batch(highs, range_filter: float = 0.005, peak_range: int = 3) -> list:
+    """
+    `resistance_levels` for many symbols at once.
+
+    :param highs: 2-D array of weekly highs (symbols x weeks), oldest first. Symbols with
+        fewer weeks are padded with NaN at the start, which leaves their levels unchanged.
+    :param range_filter: Decides if two prices are part of the same resistance level.
+    :param peak_range: Number of candles to check either side of peak candle.
+    :return: A list of ascending resistance levels per symbol.
+    """
+    highs = np.asarray(highs, dtype=float)
+    levels = cluster_levels(np.where(find_peaks(highs, peak_range), highs, np.nan), range_filter)
+    return [row[~np.isnan(row)].tolist() for row in levels]
@@ -0,0 +1,22 @@
+def position_size(portfolio_value, equity_risk_pc, atr, price, sl_risk_pc) -> int:
+    """
+    Gets the lowest risk position size based on either volatility or risk:
+        volatility_size = ($total equity * portfolio risk %) / ATR(21)
+        risk_size = ($total equity * portfolio risk %) / $value of risk on trade
+
+    :param portfolio_value: The total portfolio value.
+    :param equity_risk_pc: The portfolio risk % of a position.
+    :param atr: The symbol's ATR(21).
+    :param price: The symbol's price.
+    :param sl_risk_pc: The stop loss, a negative %.
+    """
+    volatility_size = (portfolio_value * equity_risk_pc) / atr
+    risk_size = (portfolio_value * equity_risk_pc) / (price * (sl_risk_pc * -1))
+    return round(min(volatility_size, risk_size))
+
+
+def exit_signal(profit, tp_target, sl_risk_pc) -> bool:
+    """
+    Whether a position's unrealized profit % hit its target or stop loss.
+    """
+    return profit >= tp_target or profit <= sl_risk_pc
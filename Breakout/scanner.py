@@ -0,0 +1,162 @@
+import numpy as np
+
+
+HVC = 'high volume close'
+INSIDE_DAY = 'inside day'
+BREAKOUT = 'breakout'
+
+# latest bar, previous bar (1) and the bar before it (2)
+BAR_FEATURES = ('open', 'high', 'low', 'close', 'volume', 'open_1', 'high_1', 'low_1', 'close_1', 'volume_1', 'high_2', 'low_2')
+INDICATOR_FEATURES = ('atr', 'sma', 'sma_200', 'sma_volume', 'max_volume', 'max_price', 'periods_since_max_price', 'breakout_level')
+FEATURES = BAR_FEATURES + INDICATOR_FEATURES
+
+
+def feature_values(indicators) -> tuple:
+    """
+    The FEATURES of a symbol's SymbolIndicators, in order.
+    """
+    bars = indicators.bars
+    open, high, low, close, volume = bars.open, bars.high, bars.low, bars.close, bars.volume
+    return (
+        open[0], high[0], low[0], close[0], volume[0],
+        open[1], high[1], low[1], close[1], volume[1],
+        high[2], low[2],
+        indicators.atr.Current.Value,
+        indicators.sma.Current.Value,
+        indicators.sma_200.Current.Value,
+        indicators.sma_volume.Current.Value,
+        indicators.max_volume.Current.Value,
+        indicators.max_price.Current.Value,
+        indicators.max_price.PeriodsSinceMaximum,
+        indicators.breakout_window[0] if indicators.breakout_window.IsReady else np.nan,
+    )
+
+
+def pattern_masks(f):
+    """
+    Evaluates the entry patterns on aligned feature arrays of any shape.
+    · High volume close: a close in the top 25% of the range on the highest volume in 200 days, without a gap down.
+    · Inside day: a below average volume, positive day within the previous day's range, in a base,
+      followed by a close above the first day's high.
+    · Breakout: a close up to 5% above a resistance level found within 10% of the 200 day high.
+    All patterns must occur within an uptrend.
+
+    :param f: dict of FEATURES name to array.
+    :return: hvc, inside day and breakout masks, and the ATR % of each element.
+    """
+    close, level = f['close'], f['breakout_level']
+    uptrending = (f['sma'] > f['sma_200']) & (close > f['sma_200'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        close_range_pc = ((close - f['low']) / (f['high'] - f['low'])) * 100
+    hvc = (
+        # highest vol in 200 days
+        (f['max_volume'] == f['volume'])
+        & (close_range_pc >= 75)
+        # no gap down
+        & ~((f['open'] < f['close_1']) & (close < f['close_1']))
+        & uptrending
+    )
+    inside_day = (
+        (f['high_1'] < f['high_2']) & (f['low_1'] > f['low_2'])
+        # below average volume, positive close
+        & ~(f['volume_1'] > f['sma_volume'])
+        & ~(f['open_1'] > f['close_1'])
+        # within a base
+        & (f['periods_since_max_price'] > 5 * 7)
+        & uptrending
+        # closed above the inside day high
+        & (close > f['high_2'])
+    )
+    breakout = (
+        uptrending
+        & (level * 1.05 > close) & (close > level)
+        & ~(f['max_price'] > level * 1.1)
+    )
+    return hvc, inside_day, breakout, (f['atr'] / close) * 100
+
+
+def ranked_signals(f) -> list:
+    """
+    Evaluates the entry patterns and orders the signals the way Breakout buys them.
+
+    :param f: dict of FEATURES name to 1-D array.
+    :return: (index, pattern, level) tuples ordered by lowest ATR % first, then in hvc, inside day,
+        breakout order. The level is the HVC close, the inside day entry high or the breakout level.
+    """
+    hvc, inside_day, breakout, atrp = pattern_masks(f)
+    signals = []
+    for i in np.argsort(atrp, kind='stable'):
+        if hvc[i]:
+            signals.append((i, HVC, float(f['close'][i])))
+        if inside_day[i]:
+            signals.append((i, INSIDE_DAY, float(f['high_2'][i])))
+        if breakout[i]:
+            signals.append((i, BREAKOUT, float(f['breakout_level'][i])))
+    return signals
+
+
+def order_tag(pattern, level) -> str:
+    """
+    The tag of an entry order, breakouts are tagged with their level.
+    """
+    return f"{BREAKOUT}: {level}" if pattern == BREAKOUT else pattern
+
+
+class PatternScanner:
+    """
+    Keeps the features the Breakout entry patterns need as aligned arrays, one row per symbol,
+    and evaluates hvc, inside day and breakout for many symbols at once as boolean masks.
+
+    :param capacity: Initial number of rows, doubled when full.
+    """
+    def __init__(self, capacity=64) -> None:
+        self.rows = {}
+        self.symbols = [None] * capacity
+        self.free_rows = list(range(capacity - 1, -1, -1))
+        self.features = {name: np.full(capacity, np.nan) for name in FEATURES}
+
+    def row(self, symbol) -> int:
+        if symbol not in self.rows:
+            if not self.free_rows:
+                self.grow()
+            self.rows[symbol] = self.free_rows.pop()
+            self.symbols[self.rows[symbol]] = symbol
+        return self.rows[symbol]
+
+    def grow(self):
+        capacity = len(self.symbols)
+        for name, values in self.features.items():
+            self.features[name] = np.concatenate([values, np.full(capacity, np.nan)])
+        self.symbols.extend([None] * capacity)
+        self.free_rows.extend(range(capacity * 2 - 1, capacity - 1, -1))
+
+    def remove(self, symbol):
+        row = self.rows.pop(symbol, None)
+        if row is not None:
+            self.symbols[row] = None
+            for values in self.features.values():
+                values[row] = np.nan
+            self.free_rows.append(row)
+
+    def record(self, symbol, indicators):
+        """
+        Copies a symbol's latest features from its SymbolIndicators, after they were updated with the bar.
+        """
+        row = self.row(symbol)
+        for name, value in zip(FEATURES, feature_values(indicators)):
+            self.features[name][row] = value
+
+    def scan(self, symbols) -> list:
+        """
+        Evaluates the entry patterns for the given symbols.
+
+        :param symbols: Symbols whose features were recorded for the current bar.
+        :return: (symbol, pattern, level) tuples ordered by lowest ATR % first, then in hvc,
+            inside day, breakout order. The level is the HVC close, the inside day entry high
+            or the breakout level.
+        """
+        if not symbols:
+            return []
+        rows = np.array([self.rows[symbol] for symbol in symbols])
+        f = {name: values[rows] for name, values in self.features.items()}
+        return [(symbols[i], pattern, level) for i, pattern, level in ranked_signals(f)]
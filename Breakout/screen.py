@@ -0,0 +1,85 @@
+import hashlib
+from pathlib import Path
+
+
+class ScreenSource:
+    """
+    Where the screened tickers come from: one ticker per line of text.
+    """
+    def fetch(self) -> str:
+        raise NotImplementedError()
+
+
+class DownloadSource(ScreenSource):
+    """
+    A published csv, e.g. the Google Sheet screen, downloaded through the algorithm.
+    """
+    def __init__(self, algorithm, url) -> None:
+        self.algorithm = algorithm
+        self.url = url
+
+    def fetch(self) -> str:
+        return self.algorithm.Download(self.url)
+
+
+class FileSource(ScreenSource):
+    """
+    A local file with one ticker per line, for running the live screen logic offline.
+    """
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+
+    def fetch(self) -> str:
+        return self.path.read_text()
+
+
+class Screen:
+    """
+    The set of screened tickers, refreshed from a source at most once per `ttl`.
+    A refresh whose content hashes the same as the last one isn't parsed again,
+    and refreshes report only the tickers added and removed.
+
+    :param source: Optional ScreenSource, without one the screen keeps its initial tickers.
+    :param ttl: Minimum time between fetches from the source.
+    :param tickers: The initial tickers.
+    """
+    def __init__(self, source=None, ttl=None, tickers=()) -> None:
+        self.source = source
+        self.ttl = ttl
+        self.tickers = set(tickers)
+        self.digest = None
+        self.fetched = None
+
+    def due(self, time) -> bool:
+        if self.source is None:
+            return False
+        return self.fetched is None or self.ttl is None or time - self.fetched >= self.ttl
+
+    def refresh(self, time):
+        """
+        Fetches the source if the ttl has passed and applies the changes.
+
+        :param time: The current algorithm time.
+        :return: The sets of tickers added and removed.
+        """
+        if not self.due(time):
+            return set(), set()
+        self.fetched = time
+        content = self.source.fetch()
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        if digest == self.digest:
+            return set(), set()
+        self.digest = digest
+        tickers = {line.strip() for line in content.splitlines() if line.strip()}
+        added, removed = tickers - self.tickers, self.tickers - tickers
+        self.tickers = tickers
+        return added, removed
+
+    def __contains__(self, ticker):
+        return ticker in self.tickers
+
+    def __iter__(self):
+        return iter(self.tickers)
+
+    def __len__(self):
+        return len(self.tickers)
@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from scanner import HVC, INSIDE_DAY, BREAKOUT
+
+
+PATTERNS = (HVC, INSIDE_DAY, BREAKOUT)
+COLUMNS = ('symbol', 'date', 'pattern', 'level', 'atr', 'close')
+
+
+class SignalStore:
+    """
+    Precomputed Breakout entry signals, one row per (symbol, date, pattern) with the signal's level
+    and the symbol's ATR and close that day. Each column is an .npy file in the store directory,
+    memory-mapped when opened, and rows are sorted by date so a day's signals are one slice.
+    Built by scripts/build_breakout_signals.py.
+
+    :param path: The store directory.
+    """
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self.meta = json.loads((self.path / 'meta.json').read_text())
+        self.tickers = self.meta['tickers']
+        self.codes = {ticker: code for code, ticker in enumerate(self.tickers)}
+        self.columns = {name: np.load(self.path / f"{name}.npy", mmap_mode='r') for name in COLUMNS}
+
+    @staticmethod
+    def write(path, tickers, columns, range_filter, peak_range, start=None):
+        """
+        Writes a store.
+
+        :param path: The store directory, created if missing.
+        :param tickers: Tickers the symbol column indexes.
+        :param columns: Dict of COLUMNS name to array, in any row order. Dates are bar dates
+            as datetime64[D] and patterns index PATTERNS.
+        :param range_filter: The resistance levels range filter the breakouts were found with.
+        :param peak_range: The resistance levels peak range the breakouts were found with.
+        :param start: The date the indicators started on, if not each ticker's first bar.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        order = np.lexsort((columns['pattern'], columns['symbol'], columns['date']))
+        dtypes = {'symbol': np.int32, 'date': 'datetime64[D]', 'pattern': np.int8}
+        for name in COLUMNS:
+            np.save(path / f"{name}.npy", np.asarray(columns[name], dtype=dtypes.get(name, float))[order])
+        (path / 'meta.json').write_text(json.dumps({
+            'tickers': list(tickers),
+            'patterns': list(PATTERNS),
+            'range_filter': range_filter,
+            'peak_range': peak_range,
+            'start': str(start.date()) if start is not None else None,
+        }))
+
+    def day(self, date) -> slice:
+        """
+        The rows of a bar date.
+        """
+        dates = self.columns['date']
+        date = np.datetime64(date, 'D')
+        return slice(np.searchsorted(dates, date, 'left'), np.searchsorted(dates, date, 'right'))
+
+    def scan(self, date, symbols) -> list:
+        """
+        The stored signals of the given symbols on a bar date, in PatternScanner.scan's order.
+
+        :param date: The bar date.
+        :param symbols: Candidate symbols, uptrending and not invested.
+        :return: (symbol, pattern, level, atr) tuples.
+        """
+        rows = self.day(date)
+        if not symbols or rows.start == rows.stop:
+            return []
+        candidates = np.full(len(self.tickers), -1)
+        for i, symbol in enumerate(symbols):
+            code = self.codes.get(symbol.Value)
+            if code is not None:
+                candidates[code] = i
+        columns = {name: values[rows] for name, values in self.columns.items()}
+        candidate = candidates[columns['symbol']]
+        selected = candidate >= 0
+        columns = {name: values[selected] for name, values in columns.items()}
+        candidate = candidate[selected]
+        atrp = (columns['atr'] / columns['close']) * 100
+        # lowest ATR % first, ties in candidate order, then hvc, inside day, breakout
+        order = np.lexsort((columns['pattern'], candidate, atrp))
+        return [
+            (symbols[candidate[i]], PATTERNS[columns['pattern'][i]], float(columns['level'][i]), float(columns['atr'][i]))
+            for i in order
+        ]
+
+    def __len__(self):
+        return len(self.columns['date'])
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from resistance import resistance_levels, resistance_levels_batch
+
+
+def baseline_resistance_levels(highs, range_filter=0.005, peak_range=3):
+    """
+    The loop SymbolIndicators.get_resistance_levels ran before resistance.py.
+    """
+    peaks = []
+    for i in range(peak_range, len(highs) - peak_range):
+        greater_than_prior_prices = highs[i] > highs[i - peak_range]
+        greater_than_future_prices = highs[i] > highs[i + peak_range]
+        if greater_than_prior_prices and greater_than_future_prices:
+            peaks.append(highs[i])
+    levels = []
+    peaks = sorted(peaks)
+    for i, curr_peak in enumerate(peaks):
+        level = None
+        if i == 0:
+            continue
+        prev_peak_upper_range = peaks[i - 1] + (peaks[i - 1] * range_filter)
+        if curr_peak < prev_peak_upper_range:
+            level = curr_peak
+        if level and levels:
+            prev_level_upper_range = levels[-1] + (levels[-1] * range_filter)
+            if level < prev_level_upper_range:
+                levels.pop()
+        if level:
+            levels.append(level)
+    return levels
+
+
+def random_walk(rng, weeks):
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, weeks)))
+
+
+def tied_peaks(rng, weeks):
+    # few distinct prices make equal peaks common, 64, 80, 100 and 125 are exactly 25% apart
+    return rng.choice([64.0, 80.0, 100.0, 100.25, 100.5, 125.0], weeks)
+
+
+def nan_weeks(rng, weeks):
+    highs = random_walk(rng, weeks)
+    highs[rng.random(weeks) < 0.2] = np.nan
+    return highs
+
+
+@pytest.mark.parametrize('series', [random_walk, tied_peaks, nan_weeks])
+@pytest.mark.parametrize('range_filter, peak_range', [(0.005, 3), (0.0, 3), (0.02, 1), (0.01, 2), (0.005, 5), (0.25, 1), (0.25, 3)])
+def test_resistance_levels_match_baseline(series, range_filter, peak_range):
+    rng = np.random.default_rng(peak_range)
+    for _ in range(500):
+        highs = series(rng, rng.integers(0, 60))
+        expected = baseline_resistance_levels(list(highs), range_filter, peak_range)
+        assert resistance_levels(highs, range_filter, peak_range) == expected
+
+
+@pytest.mark.parametrize('range_filter, peak_range', [(0.005, 3), (0.02, 1), (0.01, 2), (0.25, 1)])
+def test_resistance_levels_batch_matches_baseline(range_filter, peak_range):
+    rng = np.random.default_rng(0)
+    weeks = 40
+    series = [
+        [random_walk, tied_peaks, nan_weeks][i % 3](rng, rng.integers(0, weeks + 1))
+        for i in range(300)
+    ]
+    # shorter histories are left-padded with NaN
+    highs = np.full((len(series), weeks), np.nan)
+    for row, values in zip(highs, series):
+        if len(values):
+            row[-len(values):] = values
+    levels = resistance_levels_batch(highs, range_filter, peak_range)
+    assert levels == [baseline_resistance_levels(list(values), range_filter, peak_range) for values in series]
+
+
+def test_resistance_levels_short_history():
+    assert resistance_levels([101.0, 102.0, 101.0], peak_range=1) == []
+    assert resistance_levels_batch(np.full((2, 0), np.nan)) == [[], []]
+
+
+def test_resistance_levels_exactly_range_filter_apart():
+    # peaks 80, 80, 100, 100: levels 80 and 100, 100 isn't below 80's range so both are kept
+    highs = [70.0, 80.0, 70.0, 80.0, 70.0, 100.0, 70.0, 100.0, 70.0]
+    assert baseline_resistance_levels(highs, 0.25, 1) == [80.0, 100.0]
+    assert resistance_levels(highs, 0.25, 1) == [80.0, 100.0]
+    assert resistance_levels_batch([[np.nan] + highs, [np.nan] * 10], 0.25, 1) == [[80.0, 100.0], []]
@@ -0,0 +1,103 @@
+from collections import deque
+
+
+def week_of(time) -> int:
+    """
+    Number of the Saturday to Friday week containing the date of `time`,
+    the same bins as pandas' resample('W-Fri').
+    """
+    # date ordinals of Saturdays are 6 mod 7
+    return (time.toordinal() - 6) // 7
+
+
+class WeeklyBar:
+    __slots__ = ('week', 'open', 'high', 'low', 'close', 'volume', 'days')
+
+    def __init__(self, week, open=float('nan'), high=float('nan'), low=float('nan'), close=float('nan'), volume=0.0, days=0) -> None:
+        self.week = week
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.days = days
+
+
+class WeeklyBars:
+    """
+    Streams daily bars into weekly (W-Fri) OHLCV bars covering the daily bars of an OHLCVWindow.
+    Gives the same weeks as resampling the window with pandas: weeks without data are kept
+    as empty (NaN) bars and the oldest week only covers the days still in the window.
+    Each daily bar costs O(1): only the current week is updated, and trimming the oldest week
+    re-aggregates the few days of it left in the window.
+
+    `version` changes when a week is added or dropped. Between changes only the oldest and the
+    current week are updated, so values derived from the weekly bars can be cached against it.
+
+    :param window: The OHLCVWindow of daily bars being resampled.
+    """
+    def __init__(self, window) -> None:
+        self.window = window
+        self.size = window.size
+        self.version = 0
+        # number of daily bars covered
+        self.count = 0
+        self.weeks = deque()
+
+    def update(self, time, open, high, low, close, volume):
+        """
+        Adds a daily bar, timestamped by its end time, after it was added to the window.
+        """
+        week = week_of(time)
+        current = self.weeks[-1] if self.weeks else None
+        if current is not None and current.week == week:
+            current.high = max(current.high, high)
+            current.low = min(current.low, low)
+            current.close = close
+            current.volume += volume
+            current.days += 1
+        else:
+            if current is not None:
+                for empty_week in range(current.week + 1, week):
+                    self.weeks.append(WeeklyBar(empty_week))
+            self.weeks.append(WeeklyBar(week, open, high, low, close, volume, 1))
+            self.version += 1
+        self.count += 1
+        if self.count > self.size:
+            self.count -= 1
+            self.evict()
+
+    def evict(self):
+        """
+        Drops the daily bar which left the window from the oldest week.
+        """
+        oldest = self.weeks[0]
+        oldest.days -= 1
+        if not oldest.days:
+            self.weeks.popleft()
+            while self.weeks and not self.weeks[0].days:
+                self.weeks.popleft()
+            self.version += 1
+            return
+        days = oldest.days
+        oldest.open = float(self.window.chronological('open')[0])
+        oldest.high = float(self.window.chronological('high')[:days].max())
+        oldest.low = float(self.window.chronological('low')[:days].min())
+        oldest.volume = float(self.window.chronological('volume')[:days].sum())
+
+    @property
+    def ready(self) -> bool:
+        return self.count == self.size
+
+    @property
+    def highs(self) -> list:
+        """
+        Weekly highs, oldest first.
+        """
+        return [week.high for week in self.weeks]
+
+    def __len__(self):
+        return len(self.weeks)
+
+    def __getitem__(self, index):
+        return self.weeks[index]
@@ -1,23 +1,53 @@
 from AlgorithmImports import Resolution
+from scheduler import EveryBar
+from signals import Snapshot
 
 class BaseStrategy:
-    def __init__(self, equity_risk_pc = 0.01, **kwargs) -> None:
+    def __init__(self, equity_risk_pc = 0.01, cadence = None, name = None, **kwargs) -> None:
         self.equity_risk_pc = equity_risk_pc
+        self.cadence = cadence or EveryBar()
+        self.name = name or type(self).__name__
 
     def calculate_position_size(self, algorithm, symbol):
         atr = algorithm.symbols[symbol].atr.Current.Value
         return round((algorithm.Portfolio.TotalPortfolioValue * self.equity_risk_pc) / atr)
     
     def rebalance_due(self, algorithm):
-        return algorithm.resolution == Resolution.Daily
+        return algorithm.resolution == Resolution.Daily and self.cadence.is_due(algorithm.Time)
     
+    @property
+    def generates_orders(self) -> bool:
+        """
+        Strategies implement either `handle_on_data`, which trades directly,
+        or `generate_orders`, which returns OrderIntents from a read-only Snapshot.
+        """
+        return type(self).generate_orders is not BaseStrategy.generate_orders
+
     def handle_on_data(self, algorithm, data):
+        if not self.generates_orders:
+            raise NotImplementedError()
+        algorithm.order_merger.submit(algorithm, self.generate_orders(Snapshot.take(algorithm)))
+
+    def generate_orders(self, snapshot):
         raise NotImplementedError()
     
     def OnData(self, algorithm, data):
         if not self.rebalance_due(algorithm):
             return
-        self.handle_on_data(algorithm, data)
+        with self.measure(algorithm, 'handle_on_data'):
+            self.handle_on_data(algorithm, data)
+
+    def measure(self, algorithm, phase, symbols=0):
+        """
+        Times a phase of this strategy with the algorithm's profiler, a no-op unless profiling is enabled.
+        """
+        return algorithm.profiler.measure(self.name, phase, symbols)
+
+    def handle_upkeep(self, algorithm, data):
+        """
+        Indicator-only upkeep which runs on every bar, including warm-up, regardless of cadence.
+        """
+        self.handle_manual_indicators(algorithm, data)
 
     def get_indicator_configs(self):
         return []
@@ -28,4 +58,7 @@ class BaseStrategy:
     def handle_manual_indicators(self, algorithm, data):
         manual_indicators = self.get_manual_indicator_configs()
         if manual_indicators:
-            raise NotImplementedError("This class contains manual indicators but doesn't warm them up")
\ No newline at end of file
+            raise NotImplementedError(
+                "This class contains manual indicators but doesn't warm them up. "
+                "Use an IndicatorHistory config for lagged indicator values."
+            )
\ No newline at end of file
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def top_k(keys, mask, k):
+    """
+    Returns the rows of the k largest keys within mask, ordered from largest to smallest.
+    Uses a partial selection so the cost is O(n + k log k) rather than a full sort.
+
+    :param keys: Array of ranking values per row.
+    :param mask: Boolean array of rows eligible for selection.
+    :param k: Number of rows to select.
+    """
+    rows = np.flatnonzero(mask)
+    if len(rows) > k:
+        rows = rows[np.argpartition(keys[rows], -k)[-k:]]
+    return rows[np.argsort(-keys[rows], kind='stable')]
+
+
+class CandidateIndex:
+    """
+    Maintains a strategy's entry candidates over the indicator engine arrays.
+    The filter mask and top-k ranking are refreshed at most once per engine update.
+    Works with the engine itself or a Snapshot of it.
+    """
+    def __init__(self, entry_filter, key, k) -> None:
+        """
+        :param entry_filter: Callable taking the engine and returning a boolean mask of eligible rows.
+        :param key: Name of the indicator whose value ranks candidates.
+        :param k: Maximum number of candidates.
+        """
+        self.entry_filter = entry_filter
+        self.key = key
+        self.k = k
+        self.version = None
+        self.mask = None
+        self.rows = np.array([], dtype=np.int64)
+
+    def refresh(self, engine):
+        if self.version == engine.version:
+            return
+        self.mask = self.entry_filter(engine)
+        self.rows = top_k(engine.value(self.key), self.mask, self.k)
+        self.version = engine.version
+
+    def top_rows(self, engine):
+        self.refresh(engine)
+        return self.rows
+
+    def top(self, engine):
+        """
+        Returns the symbols of the best ranked candidates.
+        """
+        return [engine.symbols[row] for row in self.top_rows(engine)]
@@ -0,0 +1,578 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from AlgorithmImports import AverageTrueRange, SimpleMovingAverage, RateOfChangePercent, \
+    Maximum, Minimum, RollingWindow
+
+
+BarArrays = namedtuple('BarArrays', ('open', 'high', 'low', 'close', 'volume'))
+
+
+def to_timestamp(time) -> int:
+    """
+    Converts a datetime (python, pandas or numpy) into integer nanoseconds.
+    """
+    return int(np.datetime64(time, 'ns').astype(np.int64))
+
+
+def resize(array, capacity):
+    """
+    Grows an array along its first axis, padding new rows with zeros.
+    """
+    grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class Point:
+    """
+    Mimics LEAN's IndicatorDataPoint so `indicator.Current.Value` keeps working.
+    """
+    __slots__ = ('Value',)
+
+    def __init__(self, value) -> None:
+        self.Value = value
+
+
+class RingBuffer:
+    """
+    A fixed size window per symbol row. Values are stored in a (rows x size) array
+    with a write position per row, so every row can be pushed to in one batched step.
+    """
+    def __init__(self, capacity, size, dtype=float) -> None:
+        self.size = size
+        self.values = np.zeros((capacity, size), dtype=dtype)
+        self.head = np.zeros(capacity, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+
+    def grow(self, capacity):
+        self.values = resize(self.values, capacity)
+        self.head = resize(self.head, capacity)
+        self.count = resize(self.count, capacity)
+
+    def reset(self, rows):
+        self.values[rows] = 0
+        self.head[rows] = 0
+        self.count[rows] = 0
+
+    def push(self, rows, values):
+        """
+        Adds a value to each row and returns the values that were evicted (zero when the row wasn't full).
+        """
+        head = self.head[rows]
+        evicted = self.values[rows, head].copy()
+        self.values[rows, head] = values
+        self.head[rows] = (head + 1) % self.size
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.size)
+        return evicted
+
+    def ordered(self, rows):
+        """
+        Returns the window for each row ordered from newest to oldest, like RollingWindow indexing.
+        """
+        offsets = (self.head[rows][:, None] - 1 - np.arange(self.size)) % self.size
+        return self.values[rows[:, None], offsets]
+
+    def get(self, row, index):
+        if not 0 <= index < self.count[row]:
+            raise IndexError(f"index {index} out of range for window with {self.count[row]} values")
+        return self.values[row, (self.head[row] - 1 - index) % self.size].item()
+
+
+class IndicatorView:
+    """
+    Per symbol view into an array indicator exposing the LEAN indicator attributes used by strategies.
+    """
+    __slots__ = ('indicator', 'row')
+
+    def __init__(self, indicator, row) -> None:
+        self.indicator = indicator
+        self.row = row
+
+    @property
+    def Current(self):
+        return Point(self.indicator.value[self.row].item())
+
+    @property
+    def IsReady(self):
+        return bool(self.indicator.ready[self.row])
+
+    @property
+    def Samples(self):
+        return self.indicator.samples[self.row].item()
+
+
+class MaximumView(IndicatorView):
+    __slots__ = ()
+
+    @property
+    def PeriodsSinceMaximum(self):
+        return self.indicator.periods_since[self.row].item()
+
+
+class MinimumView(IndicatorView):
+    __slots__ = ()
+
+    @property
+    def PeriodsSinceMinimum(self):
+        return self.indicator.periods_since[self.row].item()
+
+
+class RollingWindowView:
+    __slots__ = ('indicator', 'row')
+
+    def __init__(self, indicator, row) -> None:
+        self.indicator = indicator
+        self.row = row
+
+    def Add(self, value):
+        self.indicator.window.push(np.array([self.row]), value)
+
+    def __getitem__(self, index):
+        return self.indicator.window.get(self.row, index)
+
+    def __len__(self):
+        return self.Count
+
+    @property
+    def Count(self):
+        return self.indicator.window.count[self.row].item()
+
+    @property
+    def Size(self):
+        return self.indicator.window.size
+
+    @property
+    def IsReady(self):
+        return bool(self.indicator.ready[self.row])
+
+
+class ArrayIndicator:
+    """
+    Holds the state of one indicator for every symbol in the universe.
+    Subclasses implement `step` which advances a batch of rows by one bar.
+    """
+    view_class = IndicatorView
+    manual = False
+
+    def __init__(self, capacity, period) -> None:
+        self.period = period
+        self.warm_up_period = period
+        self.value = np.zeros(capacity)
+        self.samples = np.zeros(capacity, dtype=np.int64)
+
+    @property
+    def ready(self):
+        return self.samples >= self.warm_up_period
+
+    def grow(self, capacity):
+        self.value = resize(self.value, capacity)
+        self.samples = resize(self.samples, capacity)
+
+    def reset(self, rows):
+        self.value[rows] = 0
+        self.samples[rows] = 0
+
+    def update(self, rows, bars):
+        self.samples[rows] += 1
+        self.step(rows, bars)
+
+    def step(self, rows, bars):
+        raise NotImplementedError()
+
+
+class ArraySimpleMovingAverage(ArrayIndicator):
+    def __init__(self, capacity, period) -> None:
+        super().__init__(capacity, period)
+        self.window = RingBuffer(capacity, period)
+        self.sum = np.zeros(capacity)
+
+    def grow(self, capacity):
+        super().grow(capacity)
+        self.window.grow(capacity)
+        self.sum = resize(self.sum, capacity)
+
+    def reset(self, rows):
+        super().reset(rows)
+        self.window.reset(rows)
+        self.sum[rows] = 0
+
+    def step(self, rows, bars):
+        evicted = self.window.push(rows, bars.close)
+        self.sum[rows] += bars.close - evicted
+        self.value[rows] = self.sum[rows] / self.window.count[rows]
+
+
+class ArrayRateOfChangePercent(ArrayIndicator):
+    def __init__(self, capacity, period) -> None:
+        super().__init__(capacity, period)
+        self.warm_up_period = period + 1
+        self.window = RingBuffer(capacity, period + 1)
+
+    def grow(self, capacity):
+        super().grow(capacity)
+        self.window.grow(capacity)
+
+    def reset(self, rows):
+        super().reset(rows)
+        self.window.reset(rows)
+
+    def step(self, rows, bars):
+        self.window.push(rows, bars.close)
+        oldest = self.window.ordered(rows)[np.arange(len(rows)), self.window.count[rows] - 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.where(oldest != 0, (bars.close - oldest) / oldest * 100, 0)
+        self.value[rows] = value
+
+
+class ArrayExtremum(ArrayIndicator):
+    """
+    Shared implementation of Maximum and Minimum. Ties resolve to the most recent bar, as in LEAN.
+    """
+    empty = None
+    select = None
+
+    def __init__(self, capacity, period) -> None:
+        super().__init__(capacity, period)
+        self.window = RingBuffer(capacity, period)
+        self.periods_since = np.zeros(capacity, dtype=np.int64)
+
+    def grow(self, capacity):
+        super().grow(capacity)
+        self.window.grow(capacity)
+        self.periods_since = resize(self.periods_since, capacity)
+
+    def reset(self, rows):
+        super().reset(rows)
+        self.window.reset(rows)
+        self.periods_since[rows] = 0
+
+    def step(self, rows, bars):
+        self.window.push(rows, bars.close)
+        window = self.window.ordered(rows)
+        window[np.arange(self.period) >= self.window.count[rows][:, None]] = self.empty
+        index = type(self).select(window, axis=1)
+        self.value[rows] = window[np.arange(len(rows)), index]
+        self.periods_since[rows] = index
+
+
+class ArrayMaximum(ArrayExtremum):
+    view_class = MaximumView
+    empty = -np.inf
+    select = np.argmax
+
+
+class ArrayMinimum(ArrayExtremum):
+    view_class = MinimumView
+    empty = np.inf
+    select = np.argmin
+
+
+class ArrayAverageTrueRange(ArrayIndicator):
+    """
+    Wilder smoothed true range. The first bar only seeds the previous close, as in LEAN.
+    """
+    def __init__(self, capacity, period) -> None:
+        super().__init__(capacity, period)
+        self.warm_up_period = period + 1
+        self.previous_close = np.zeros(capacity)
+        self.true_range_sum = np.zeros(capacity)
+
+    def grow(self, capacity):
+        super().grow(capacity)
+        self.previous_close = resize(self.previous_close, capacity)
+        self.true_range_sum = resize(self.true_range_sum, capacity)
+
+    def reset(self, rows):
+        super().reset(rows)
+        self.previous_close[rows] = 0
+        self.true_range_sum[rows] = 0
+
+    def step(self, rows, bars):
+        previous_close = self.previous_close[rows]
+        self.previous_close[rows] = bars.close
+        # samples were incremented before step, so the seeding bar has samples == 1
+        true_ranges = self.samples[rows] - 1
+        seeded = true_ranges > 0
+        rows, true_ranges, previous_close = rows[seeded], true_ranges[seeded], previous_close[seeded]
+        high, low = bars.high[seeded], bars.low[seeded]
+        true_range = np.maximum.reduce((
+            high - low,
+            np.abs(high - previous_close),
+            np.abs(low - previous_close),
+        ))
+        averaging = true_ranges <= self.period
+        self.true_range_sum[rows] += np.where(averaging, true_range, 0)
+        self.value[rows] = np.where(
+            averaging,
+            self.true_range_sum[rows] / np.maximum(true_ranges, 1),
+            (self.value[rows] * (self.period - 1) + true_range) / self.period,
+        )
+
+
+class ArrayRollingWindow(ArrayIndicator):
+    """
+    RollingWindow per symbol. It isn't fed by bars, strategies `Add` to it manually.
+    """
+    view_class = RollingWindowView
+    manual = True
+
+    def __init__(self, capacity, size, dtype=float) -> None:
+        super().__init__(capacity, size)
+        self.window = RingBuffer(capacity, size, dtype)
+
+    @property
+    def ready(self):
+        return self.window.count >= self.window.size
+
+    def grow(self, capacity):
+        super().grow(capacity)
+        self.window.grow(capacity)
+
+    def reset(self, rows):
+        super().reset(rows)
+        self.window.reset(rows)
+
+    def update(self, rows, bars):
+        pass
+
+
+class IndicatorHistory:
+    """
+    Config class for a lagged history of another indicator's field, e.g.
+
+        {"name": "high_window", "class": IndicatorHistory, "args": [2], "source": "high", "field": "PeriodsSinceMaximum"}
+
+    keeps the last two values of `high.PeriodsSinceMaximum`. `field` defaults to "Value".
+    """
+
+
+class ArrayIndicatorHistory(ArrayRollingWindow):
+    """
+    Rolling window of a source indicator field, pushed in the same update pass as the source.
+    """
+    manual = False
+    fields = {
+        'Value': 'value',
+        'PeriodsSinceMaximum': 'periods_since',
+        'PeriodsSinceMinimum': 'periods_since',
+    }
+
+    def __init__(self, capacity, size, source, field='Value') -> None:
+        super().__init__(capacity, size)
+        if field not in self.fields or not hasattr(source, self.fields[field]):
+            raise ValueError(f"{type(source).__name__} has no field '{field}' to keep a history of")
+        self.source = source
+        self.field = self.fields[field]
+        self.warm_up_period = source.warm_up_period + size - 1
+
+    def update(self, rows, bars):
+        self.window.push(rows, getattr(self.source, self.field)[rows])
+
+
+ARRAY_INDICATORS = {
+    SimpleMovingAverage: ArraySimpleMovingAverage,
+    RateOfChangePercent: ArrayRateOfChangePercent,
+    Maximum: ArrayMaximum,
+    Minimum: ArrayMinimum,
+    AverageTrueRange: ArrayAverageTrueRange,
+    RollingWindow: ArrayRollingWindow,
+    IndicatorHistory: ArrayIndicatorHistory,
+}
+
+
+class IndicatorEngine:
+    """
+    Stores every indicator's state for the whole universe as numpy arrays (symbols x state)
+    and advances all symbols with a single batched step per bar.
+    Symbols are assigned a row when added, rows are recycled when symbols are removed.
+    The latest bar, activity and invested flags are kept per row so strategies can scan
+    the universe with array expressions instead of per symbol lookups.
+    """
+    def __init__(self, capacity=256) -> None:
+        self.capacity = capacity
+        self.rows = {}
+        self.symbols = [None] * capacity
+        self.free_rows = []
+        self.row_count = 0
+        self.indicators = {}
+        # strategy facing name -> name of the indicator backing it
+        self.aliases = {}
+        self.last_time = np.full(capacity, -1, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.invested = np.zeros(capacity, dtype=bool)
+        self.bars = BarArrays(*(np.zeros(capacity) for _ in BarArrays._fields))
+        # timestamp of the latest bar and a counter bumped on every update
+        self.time = -1
+        self.version = 0
+
+    @staticmethod
+    def supports(config) -> bool:
+        return config['class'] in ARRAY_INDICATORS
+
+    def register(self, config):
+        indicator_class = ARRAY_INDICATORS[config['class']]
+        if config['class'] == RollingWindow:
+            indicator = indicator_class(self.capacity, *config['args'], dtype=config.get('window_type', float))
+        elif config['class'] == IndicatorHistory:
+            if config['source'] not in self.indicators:
+                raise ValueError(f"history '{config['name']}' requires '{config['source']}' to be an engine indicator")
+            indicator = indicator_class(
+                self.capacity, *config['args'], self.indicators[config['source']], config.get('field', 'Value')
+            )
+        else:
+            indicator = indicator_class(self.capacity, *config['args'])
+        self.indicators[config['name']] = indicator
+
+    def indicator(self, name):
+        return self.indicators[self.aliases.get(name, name)]
+
+    @property
+    def warm_up_period(self) -> int:
+        return max(
+            [indicator.warm_up_period for indicator in self.indicators.values() if not indicator.manual],
+            default=0,
+        )
+
+    def add_symbol(self, symbol) -> int:
+        if symbol in self.rows:
+            return self.rows[symbol]
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            if self.row_count == self.capacity:
+                self.grow(self.capacity * 2)
+            row = self.row_count
+            self.row_count += 1
+        rows = np.array([row])
+        for indicator in self.indicators.values():
+            indicator.reset(rows)
+        self.last_time[row] = -1
+        self.active[row] = True
+        self.invested[row] = False
+        for field in self.bars:
+            field[row] = 0
+        self.rows[symbol] = row
+        self.symbols[row] = symbol
+        return row
+
+    def remove_symbol(self, symbol):
+        row = self.rows.pop(symbol, None)
+        if row is not None:
+            self.active[row] = False
+            self.symbols[row] = None
+            self.free_rows.append(row)
+
+    def grow(self, capacity):
+        for indicator in self.indicators.values():
+            indicator.grow(capacity)
+        last_time = np.full(capacity, -1, dtype=np.int64)
+        last_time[:self.capacity] = self.last_time
+        self.last_time = last_time
+        self.active = resize(self.active, capacity)
+        self.invested = resize(self.invested, capacity)
+        self.bars = BarArrays(*(resize(field, capacity) for field in self.bars))
+        self.symbols += [None] * (capacity - self.capacity)
+        self.capacity = capacity
+
+    def set_invested(self, symbol, invested):
+        row = self.rows.get(symbol)
+        if row is not None:
+            self.invested[row] = invested
+
+    def update(self, time, rows, bars):
+        """
+        Advances every indicator for the given rows by one bar.
+        Rows which have already seen a bar at or after `time` are skipped, which makes
+        history warm-up and streamed data safe to overlap.
+
+        :param time: The bar end time.
+        :param rows: Integer array of symbol rows.
+        :param bars: BarArrays aligned with `rows`.
+        """
+        timestamp = to_timestamp(time)
+        fresh = self.last_time[rows] < timestamp
+        if not fresh.all():
+            rows = rows[fresh]
+            bars = BarArrays(*(field[fresh] for field in bars))
+        if not len(rows):
+            return
+        self.last_time[rows] = timestamp
+        self.time = max(self.time, timestamp)
+        self.version += 1
+        for field, values in zip(self.bars, bars):
+            field[rows] = values
+        for indicator in self.indicators.values():
+            indicator.update(rows, bars)
+
+    def update_from_slice(self, data):
+        """
+        Collects the trade bars for every tracked symbol from a slice and advances them in one step.
+        """
+        rows, fields = [], ([], [], [], [], [])
+        for symbol, row in self.rows.items():
+            if not data.Bars.ContainsKey(symbol):
+                continue
+            bar = data.Bars[symbol]
+            rows.append(row)
+            for field, value in zip(fields, (bar.Open, bar.High, bar.Low, bar.Close, bar.Volume)):
+                field.append(float(value))
+        if rows:
+            self.update(data.Time, np.array(rows), BarArrays(*(np.array(field) for field in fields)))
+
+    def warm_up(self, history):
+        """
+        Replays a multi-symbol history DataFrame through the engine, one batched update per time step.
+        Symbols missing from the engine are ignored.
+
+        :param history: DataFrame returned by `algorithm.History` indexed by (symbol, time).
+        """
+        if history is None or history.empty:
+            return
+        # the symbol level holds Symbol objects or their string form depending on the LEAN version
+        lookup = {str(symbol): row for symbol, row in self.rows.items()}
+        level_rows = np.array([
+            self.rows.get(symbol, lookup.get(str(symbol), -1)) for symbol in history.index.levels[0]
+        ], dtype=np.int64)
+        rows = level_rows[history.index.codes[0]]
+        time_codes, times = pd.factorize(history.index.get_level_values(-1), sort=True)
+        known = rows >= 0
+        order = np.flatnonzero(known)[np.argsort(time_codes[known], kind='stable')]
+        bounds = np.searchsorted(time_codes[order], np.arange(len(times) + 1))
+        columns = [history[field].to_numpy(dtype=float) for field in BarArrays._fields]
+        for i, time in enumerate(times):
+            step = order[bounds[i]:bounds[i + 1]]
+            if len(step):
+                self.update(time, rows[step], BarArrays(*(column[step] for column in columns)))
+
+    def view(self, name, row):
+        indicator = self.indicator(name)
+        return indicator.view_class(indicator, row)
+
+    def ready(self, row) -> bool:
+        return all(indicator.ready[row] for indicator in self.indicators.values())
+
+    def ready_mask(self):
+        mask = self.active.copy()
+        for indicator in self.indicators.values():
+            mask &= indicator.ready
+        return mask
+
+    @property
+    def updated(self):
+        """
+        Rows which received a bar in the latest update.
+        """
+        return self.active & (self.last_time == self.time)
+
+    def value(self, name):
+        return self.indicator(name).value
+
+    def lag(self, name, index):
+        """
+        Returns `window[index]` of a windowed indicator for every row, NaN where the window is too short.
+        """
+        window = self.indicator(name).window
+        values = window.values[np.arange(self.capacity), (window.head - 1 - index) % window.size]
+        return np.where(window.count > index, values, np.nan)
@@ -0,0 +1,61 @@
+class IndicatorRegistry:
+    """
+    Collects the indicator configs of every strategy and deduplicates them.
+    Configs are keyed by (class, args, window_type) so each unique indicator is built once per symbol,
+    strategies see it under their own names through aliases.
+    Manual indicators are written to by strategy code, so they are never shared.
+    Indicator histories are keyed by the key of their source, so they deduplicate along with it.
+    """
+    def __init__(self) -> None:
+        # key -> config of the first strategy to request the indicator
+        self.configs = {}
+        # name -> key
+        self.keys = {}
+        # name -> strategy name which registered it
+        self.owners = {}
+
+    def get_key(self, config):
+        if config.get('manual'):
+            return ('manual', config['name'])
+        if 'source' in config:
+            if config['source'] not in self.keys:
+                raise ValueError(f"'{config['name']}' keeps a history of unknown indicator '{config['source']}'")
+            return (
+                config['class'], tuple(config.get('args', ())),
+                self.keys[config['source']], config.get('field', 'Value'),
+            )
+        return (config['class'], tuple(config.get('args', ())), config.get('window_type'))
+
+    def register(self, config, owner):
+        """
+        Registers an indicator config under its name.
+
+        :param config: An indicator config returned by `get_indicator_configs`.
+        :param owner: The name of the strategy registering the config.
+        :raises ValueError: If the name is already used by a different config.
+        """
+        name, key = config['name'], self.get_key(config)
+        if name in self.keys:
+            if self.keys[name] != key or config.get('manual'):
+                raise ValueError(
+                    f"indicator name '{name}' registered by {owner} conflicts with "
+                    f"the config registered by {self.owners[name]}"
+                )
+            return
+        self.keys[name] = key
+        self.owners[name] = owner
+        if key not in self.configs and 'source' in config:
+            # point histories at the unique config backing their source
+            config = {**config, 'source': self.configs[self.keys[config['source']]]['name']}
+        self.configs.setdefault(key, config)
+
+    def register_strategy(self, strategy):
+        for config in strategy.get_indicator_configs():
+            self.register(config, strategy.name)
+
+    @property
+    def aliases(self):
+        """
+        Maps each registered name to the name of the unique config backing it.
+        """
+        return {name: self.configs[key]['name'] for name, key in self.keys.items()}
@@ -0,0 +1,207 @@
+import datetime
+from collections import defaultdict
+
+
+class Position:
+    __slots__ = ('symbol', 'strategy_name', 'order_ids', 'quantity', 'created', 'exit_order_id')
+
+    def __init__(self, symbol, strategy_name) -> None:
+        self.symbol = symbol
+        self.strategy_name = strategy_name
+        self.order_ids = []
+        self.quantity = 0
+        # time of the first fill, None until the opening order fills
+        self.created = None
+        # id of the order selling the position, None unless it's being closed
+        self.exit_order_id = None
+
+    @property
+    def confirmed(self) -> bool:
+        return self.created is not None
+
+    @property
+    def closing(self) -> bool:
+        return self.exit_order_id is not None
+
+    @property
+    def held(self) -> bool:
+        """
+        Whether the position holds filled shares which aren't being sold.
+        """
+        return self.quantity != 0 and not self.closing
+
+    def age(self, time) -> datetime.timedelta:
+        return time - self.created
+
+    def __repr__(self) -> str:
+        return f"Position({self.symbol} {self.strategy_name} {self.quantity} {self.created})"
+
+
+class PositionLedger:
+    """
+    Positions opened by every strategy, indexed by order id, by (symbol, strategy) and by strategy,
+    so order events and position queries are dict lookups however many symbols are held.
+
+    Confirmed positions are also kept per strategy in fill order, which makes age queries
+    (`older_than`) stop at the first position that is too young.
+    """
+    def __init__(self) -> None:
+        self.orders = {}
+        self.positions = {}
+        self.strategies = defaultdict(dict)
+        self.confirmed = defaultdict(dict)
+        # position whose order is being submitted, per symbol
+        self.submitting = {}
+
+    def open(self, symbol, strategy_name, submit):
+        """
+        Records a position for a strategy and submits its opening order.
+        Backtest fills reach OnOrderEvent before the order method returns, so the position is
+        looked up by symbol until the ticket is known.
+
+        :param symbol: The symbol being bought.
+        :param strategy_name: The strategy opening the position.
+        :param submit: Callable submitting the order and returning its OrderTicket.
+        """
+        key = (symbol, strategy_name)
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = Position(symbol, strategy_name)
+            self.strategies[strategy_name][symbol] = position
+        return self.submit(position, submit)
+
+    def exit(self, symbol, strategy_name, submit):
+        """
+        Submits the order selling a strategy's filled quantity of a symbol. The position stays in the
+        ledger, marked as closing, until the order fills, so a canceled or invalid sell leaves it held.
+
+        :param symbol: The symbol being sold.
+        :param strategy_name: The strategy closing the position.
+        :param submit: Callable receiving the quantity to sell, submitting the order and returning its OrderTicket.
+        :return: The OrderTicket, None if the strategy holds no filled quantity or is already closing it.
+        """
+        position = self.positions.get((symbol, strategy_name))
+        if position is None or not position.held:
+            return None
+        # marks the position as closing while the order is submitted, the ticket's id replaces it
+        position.exit_order_id = -1
+        ticket = self.submit(position, lambda: submit(position.quantity))
+        if position.exit_order_id == -1:
+            position.exit_order_id = ticket.OrderId
+        return ticket
+
+    def submit(self, position, submit):
+        self.submitting[position.symbol] = position
+        try:
+            ticket = submit()
+        finally:
+            del self.submitting[position.symbol]
+        # the position is gone if its opening order was rejected while submitting, or its sell filled
+        if self.positions.get((position.symbol, position.strategy_name)) is position and ticket.OrderId not in self.orders:
+            self.bind(position, ticket.OrderId)
+        return ticket
+
+    def bind(self, position, order_id):
+        position.order_ids.append(order_id)
+        self.orders[order_id] = position
+
+    def find(self, event):
+        """
+        Returns the position an order event belongs to, None for orders not opened through the ledger.
+        """
+        position = self.orders.get(event.OrderId)
+        if position is None and event.Symbol in self.submitting:
+            position = self.submitting[event.Symbol]
+            self.bind(position, event.OrderId)
+            if position.exit_order_id == -1:
+                position.exit_order_id = event.OrderId
+        return position
+
+    def confirm(self, event, time):
+        """
+        Applies a fill to its position. The first fill sets the position's creation time,
+        a fill of its sell which leaves no quantity removes it.
+        Each event's FillQuantity is what that event filled, so an order filled in parts is added up
+        from its partially filled and filled events.
+
+        :param event: A partially filled or filled OrderEvent.
+        :param time: The algorithm time of the fill.
+        """
+        position = self.find(event)
+        if position is None:
+            return None
+        if not position.confirmed:
+            position.created = time
+            self.confirmed[position.strategy_name][position.symbol] = position
+        position.quantity += event.FillQuantity
+        if event.OrderId == position.exit_order_id and position.quantity == 0:
+            self.close(position.symbol, position.strategy_name)
+        return position
+
+    def cancel(self, event):
+        """
+        Forgets a canceled or invalid order, and its position if nothing was filled yet.
+        A canceled sell leaves the position held.
+        """
+        position = self.find(event)
+        if position is None:
+            return
+        del self.orders[event.OrderId]
+        position.order_ids.remove(event.OrderId)
+        if event.OrderId == position.exit_order_id:
+            position.exit_order_id = None
+        elif not position.confirmed:
+            self.close(position.symbol, position.strategy_name)
+
+    def close(self, symbol, strategy_name):
+        """
+        Removes a position and its orders, returning it or None if the strategy holds no such position.
+        """
+        position = self.positions.pop((symbol, strategy_name), None)
+        if position is None:
+            return None
+        del self.strategies[strategy_name][symbol]
+        self.confirmed[strategy_name].pop(symbol, None)
+        for order_id in position.order_ids:
+            self.orders.pop(order_id, None)
+        return position
+
+    def get(self, symbol, strategy_name):
+        return self.positions.get((symbol, strategy_name))
+
+    def strategy_name_for_order_id(self, order_id):
+        position = self.orders.get(order_id)
+        return position.strategy_name if position else None
+
+    def for_strategy(self, strategy_name):
+        """
+        Returns the positions of a strategy keyed by symbol, including unfilled ones.
+        """
+        return self.strategies.get(strategy_name, {})
+
+    def age(self, symbol, strategy_name, time) -> datetime.timedelta:
+        return self.positions[(symbol, strategy_name)].age(time)
+
+    def older_than(self, strategy_name, age, time):
+        """
+        Returns the filled positions of a strategy opened at least `age` before `time`, oldest first.
+
+        :param strategy_name: The strategy whose positions are queried.
+        :param age: A timedelta, or a number of days.
+        :param time: The current algorithm time.
+        """
+        if not isinstance(age, datetime.timedelta):
+            age = datetime.timedelta(days=age)
+        cutoff = time - age
+        positions = []
+        for position in self.confirmed.get(strategy_name, {}).values():
+            if position.created > cutoff:
+                break
+            positions.append(position)
+        return positions
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def __len__(self):
+        return len(self.positions)
@@ -1,7 +1,13 @@
 import datetime
 from AlgorithmImports import Resolution, BrokerageName, QCAlgorithm, QC500UniverseSelectionModel, \
-    ImmediateExecutionModel, RollingWindow, OrderEvent, OrderStatus, OrderTicket
+    ImmediateExecutionModel, RollingWindow, OrderEvent, OrderStatus, TradeBar
 from turtle_trading import TurtleTrading
+from indicator_engine import IndicatorEngine
+from indicator_registry import IndicatorRegistry
+from scheduler import Scheduler
+from signals import Snapshot, SignalRunner, OrderMerger
+from profiler import Profiler
+from ledger import PositionLedger
 
 
 class MyQC500(QC500UniverseSelectionModel):
@@ -23,63 +29,141 @@ class MasterAlgo(QCAlgorithm):
         self.SetExecution(ImmediateExecutionModel())
         self.symbols = {}
         self.EQUITY_RISK_PC = 0.02
+        # set to True to log a per strategy / phase timing table at the end of the run
+        self.PROFILE = False
+        # optionally also write the timing table to a csv file
+        self.PROFILE_PATH = None
+        self.profiler = Profiler(self.PROFILE)
         self.strategies = (
-            # initialize strategy classes here
+            # initialize strategy classes here, pass cadence=Weekly(), MonthStart() etc to run less often
             TurtleTrading(high_lookback=40),
         )
-        self.indicator_configs = []
+        self.scheduler = Scheduler(self.strategies)
+        # threads used to generate strategy signals concurrently, 0 runs them in sequence
+        self.SIGNAL_WORKERS = 0
+        self.signal_runner = SignalRunner(self.SIGNAL_WORKERS)
+        self.order_merger = OrderMerger()
+        self.ledger = PositionLedger()
+        self.indicator_registry = IndicatorRegistry()
         for strategy in self.strategies:
-            self.indicator_configs += strategy.get_indicator_configs()
+            self.indicator_registry.register_strategy(strategy)
+        self.indicator_engine = IndicatorEngine()
+        for config in self.indicator_registry.configs.values():
+            if self.indicator_engine.supports(config):
+                self.indicator_engine.register(config)
+        self.indicator_engine.aliases.update(self.indicator_registry.aliases)
 
 
     def OnSecuritiesChanged(self, changes):
+        with self.profiler.measure('MasterAlgo', 'OnSecuritiesChanged', len(changes.AddedSecurities) + len(changes.RemovedSecurities)):
+            self.handle_securities_changed(changes)
+
+    def handle_securities_changed(self, changes):
         for added in changes.AddedSecurities:
             self.symbols[added.Symbol] = SymbolData(
-                self, added, self.resolution, self.indicator_configs
+                self, added, self.resolution, self.indicator_registry, self.indicator_engine
             )
+        self.warm_up_symbols([added.Symbol for added in changes.AddedSecurities])
 
         for removed in changes.RemovedSecurities:
             data = self.symbols.pop(removed.Symbol, None)
             if data is not None:
-                self.SubscriptionManager.RemoveConsolidator(
-                    removed.Symbol, data.Consolidator
-                )
+                self.indicator_engine.remove_symbol(removed.Symbol)
+                if data.Consolidator is not None:
+                    self.SubscriptionManager.RemoveConsolidator(
+                        removed.Symbol, data.Consolidator
+                    )
                 del data
 
+    def warm_up_symbols(self, symbols):
+        """
+        Warms up the indicators of newly added symbols from a single multi-symbol history request
+        covering the longest lookback any indicator needs.
+        """
+        if not symbols:
+            return
+        lookback = max([
+            self.indicator_engine.warm_up_period,
+            *(self.symbols[symbol].warm_up_period for symbol in symbols),
+        ])
+        if not lookback:
+            return
+        history = self.History(symbols, lookback, self.resolution)
+        if history.empty:
+            return
+        self.indicator_engine.warm_up(history)
+        for symbol in symbols:
+            if self.symbols[symbol].registered_indicators:
+                try:
+                    symbol_history = history.loc[symbol]
+                except KeyError:
+                    # no history for the symbol, its indicators warm up from live bars
+                    continue
+                self.symbols[symbol].warm_up_indicators(symbol_history)
+
     def OnData(self, data):
+        symbol_count = len(self.symbols)
+        with self.profiler.measure('MasterAlgo', 'update_indicators', symbol_count):
+            self.indicator_engine.update_from_slice(data)
         for strategy in self.strategies:
-            strategy.handle_manual_indicators(self, data)
-            if self.IsWarmingUp:
-                continue
-            strategy.OnData(self, data)
+            with strategy.measure(self, 'handle_upkeep', symbol_count):
+                strategy.handle_upkeep(self, data)
+        if self.IsWarmingUp:
+            return
+        due = self.scheduler.due(self)
+        for strategy in due:
+            if not strategy.generates_orders:
+                with strategy.measure(self, 'handle_on_data', symbol_count):
+                    strategy.handle_on_data(self, data)
+        # two phase strategies: generate intents against one snapshot, then merge and submit
+        signal_strategies = [strategy for strategy in due if strategy.generates_orders]
+        if signal_strategies:
+            intents = self.signal_runner.run(signal_strategies, Snapshot.take(self), self.profiler)
+            with self.profiler.measure('MasterAlgo', 'submit_orders', len(intents)):
+                self.order_merger.submit(self, intents)
 
     def OnOrderEvent(self, event: OrderEvent) -> None:
-        if event.Status == OrderStatus.Filled:
-            self.symbols[event.Symbol].confirm_position(event)
+        with self.profiler.measure('MasterAlgo', 'OnOrderEvent', 1):
+            self.handle_order_event(event)
+
+    def handle_order_event(self, event: OrderEvent) -> None:
+        if event.Status in (OrderStatus.PartiallyFilled, OrderStatus.Filled):
+            self.indicator_engine.set_invested(event.Symbol, self.Portfolio[event.Symbol].Invested)
+            self.ledger.confirm(event, self.Time)
         elif event.Status in (OrderStatus.Canceled, OrderStatus.Invalid):
-            strategy_name = self.get_strategy_name_for_order_id(event.OrderId)
-            self.symbols[event.Symbol].delete_position(strategy_name)
+            self.ledger.cancel(event)
+
+    def OnEndOfAlgorithm(self) -> None:
+        self.profiler.report(self.Log)
+        if self.PROFILE_PATH:
+            self.profiler.write(self.PROFILE_PATH)
 
     def buy(self, symbol, position_size, strategy_name):
-        self.symbols[symbol].add_position(
-            self.MarketOrder(symbol, position_size), 
-            strategy_name,
-        )
+        return self.ledger.open(symbol, strategy_name, lambda: self.MarketOrder(symbol, position_size))
 
     def liquidate(self, symbol, strategy_name):
-        self.Liquidate(symbol)
-        self.symbols[symbol].delete_position(strategy_name)
+        """
+        Sells the strategy's own filled quantity of the symbol, other strategies' shares are left alone.
+        The position leaves the ledger when the sell fills.
+        """
+        return self.ledger.exit(symbol, strategy_name, lambda quantity: self.MarketOrder(symbol, -quantity))
 
 
 class SymbolData:
-    def __init__(self, algorithm, security, resolution, indicator_configs):
+    def __init__(self, algorithm, security, resolution, indicator_registry, indicator_engine):
         self.security = security
         self.algorithm = algorithm
-        self.Consolidator = algorithm.ResolveConsolidator(security.Symbol, resolution)
-        # "strategy_name": {"order_id" 1, "created" datetime.datetime()}
-        self.positions = {}
+        self.indicator_engine = indicator_engine
+        self.row = indicator_engine.add_symbol(security.Symbol)
+        # only created for indicators the engine can't batch
+        self.Consolidator = None
         self.indicators = []
-        for config in indicator_configs:
+        # LEAN indicators fed by the consolidator, warmed up by `warm_up_indicators`
+        self.registered_indicators = []
+        for config in indicator_registry.configs.values():
+            if indicator_engine.supports(config):
+                setattr(self, config['name'], indicator_engine.view(config['name'], self.row))
+                continue
             if config['class'] == RollingWindow:
                 indicator_class = config['class'][config['window_type']](*config['args'])
             else:
@@ -89,34 +173,34 @@ class SymbolData:
             self.indicators.append(indicator)
             if config.get('manual'):
                 continue
+            if self.Consolidator is None:
+                self.Consolidator = algorithm.ResolveConsolidator(security.Symbol, resolution)
             algorithm.RegisterIndicator(security.Symbol, indicator, self.Consolidator)
-            algorithm.WarmUpIndicator(security.Symbol, indicator, resolution)
-
-    def add_position(self, order_ticket: OrderTicket, strategy_name: str):
-        self.positions[strategy_name] = {
-            "order_id": order_ticket.OrderId,
-        }
-
-    def get_strategy_name_for_order_id(self, order_id):
-        strategy_name, _ = [(strategy_name, position) for strategy_name, position in self.positions.items()\
-                  if position["order_id"] == order_id][0]
-        return strategy_name
-
-
-    def confirm_position(self, event: OrderEvent):
-        strategy_name = self.get_strategy_name_for_order_id(event.OrderId)
-        self.positions[strategy_name]["created"] = self.algorithm.Time
-    
-    def delete_position(self, strategy_name):
-        del self.positions[strategy_name]
-
-    def get_position(self, strategy_name):
-        return self.positions[strategy_name]
-    
-    def get_position_age(self, strategy_name) -> datetime.timedelta:
-        return self.get_position(strategy_name)['created'] - self.algorithm.Time
-    
+            self.registered_indicators.append(indicator)
+        for alias, name in indicator_registry.aliases.items():
+            if alias != name:
+                setattr(self, alias, getattr(self, name))
+
+    @property
+    def warm_up_period(self) -> int:
+        """
+        The longest lookback of the LEAN indicators the engine doesn't handle.
+        """
+        return max([getattr(indicator, 'WarmUpPeriod', 0) for indicator in self.registered_indicators], default=0)
+
+    def warm_up_indicators(self, history):
+        """
+        Feeds the LEAN indicators from this symbol's slice of the shared warm-up history.
+        Manual RollingWindows are left alone, their contents are defined by strategy code.
+
+        :param history: DataFrame indexed by bar end time with open, high, low, close, volume columns.
+        """
+        for data in history.itertuples():
+            trade_bar = TradeBar(data.Index - datetime.timedelta(1), self.security.Symbol, data.open, data.high, data.low, data.close, data.volume, datetime.timedelta(1))
+            for indicator in self.registered_indicators:
+                indicator.Update(trade_bar)
+
     @property
     def ready(self) -> bool:
-        return all([indicator.IsReady for indicator in self.indicators])
+        return self.indicator_engine.ready(self.row) and all([indicator.IsReady for indicator in self.indicators])
     
\ No newline at end of file
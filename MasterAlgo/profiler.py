@@ -0,0 +1,92 @@
+import csv
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+import numpy as np
+
+
+NULL_MEASUREMENT = nullcontext()
+
+
+class Measurement:
+    __slots__ = ('profiler', 'key', 'symbols', 'start')
+
+    def __init__(self, profiler, key, symbols) -> None:
+        self.profiler = profiler
+        self.key = key
+        self.symbols = symbols
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.key, time.perf_counter() - self.start, self.symbols)
+        return False
+
+
+class Profiler:
+    """
+    Opt-in wall time instrumentation of the MasterAlgo hot paths.
+    Records call durations and symbols processed per (owner, phase), where owner is a strategy name
+    or the algorithm itself. When disabled `measure` returns a shared no-op context manager.
+    """
+    headers = ('owner', 'phase', 'calls', 'symbols', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms')
+
+    def __init__(self, enabled=False) -> None:
+        self.enabled = enabled
+        self.durations = defaultdict(list)
+        self.symbols = defaultdict(int)
+        # signal worker threads record concurrently
+        self.lock = threading.Lock()
+
+    def measure(self, owner, phase, symbols=0):
+        """
+        Times the body of a `with` block.
+
+        :param owner: The strategy or algorithm name.
+        :param phase: The name of the method or step being timed.
+        :param symbols: The number of symbols processed by the call.
+        """
+        if not self.enabled:
+            return NULL_MEASUREMENT
+        return Measurement(self, (owner, phase), symbols)
+
+    def record(self, key, seconds, symbols=0):
+        with self.lock:
+            self.durations[key].append(seconds)
+            self.symbols[key] += symbols
+
+    def summary(self):
+        """
+        Aggregates the recorded calls, slowest phases first.
+        """
+        rows = []
+        for (owner, phase), durations in self.durations.items():
+            durations = np.array(durations) * 1000
+            p50, p95 = np.percentile(durations, (50, 95))
+            rows.append((
+                owner, phase, len(durations), self.symbols[(owner, phase)],
+                durations.sum(), p50, p95, durations.max(),
+            ))
+        return sorted(rows, key=lambda row: row[4], reverse=True)
+
+    def report(self, log):
+        """
+        Emits the summary as a fixed width table, one log call per line.
+
+        :param log: A logging callable such as `algorithm.Log`.
+        """
+        if not self.durations:
+            return
+        log(f"{'owner':<20}{'phase':<24}{'calls':>8}{'symbols':>10}{'total_ms':>12}{'p50_ms':>10}{'p95_ms':>10}{'max_ms':>10}")
+        for owner, phase, calls, symbols, total, p50, p95, maximum in self.summary():
+            log(f"{owner:<20}{phase:<24}{calls:>8}{symbols:>10}{total:>12.1f}{p50:>10.3f}{p95:>10.3f}{maximum:>10.3f}")
+
+    def write(self, path):
+        with open(path, 'w', encoding='UTF8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.headers)
+            writer.writerows(self.summary())
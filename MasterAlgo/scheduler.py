@@ -0,0 +1,77 @@
+class Cadence:
+    """
+    Decides on which bars a strategy runs its decision logic.
+    Cadences are stateful, `is_due` must be called exactly once per bar.
+    """
+    def is_due(self, time) -> bool:
+        raise NotImplementedError()
+
+
+class EveryBar(Cadence):
+    def is_due(self, time) -> bool:
+        return True
+
+
+class EveryNBars(Cadence):
+    """
+    Due on the first bar and every n bars after it.
+    """
+    def __init__(self, n) -> None:
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        self.n = n
+        self.bars = 0
+
+    def is_due(self, time) -> bool:
+        due = self.bars % self.n == 0
+        self.bars += 1
+        return due
+
+
+class Weekly(Cadence):
+    """
+    Due once a week, on the first bar on or after `weekday` (0 = Monday).
+    A holiday on `weekday` moves the run to the next bar of the same week, or to the first bar
+    of the next week when the week has no bars left, e.g. a Friday holiday with weekday=4.
+    """
+    def __init__(self, weekday=0) -> None:
+        self.weekday = weekday
+        self.last_week = None
+        # week of the previous bar
+        self.bar_week = None
+
+    def is_due(self, time) -> bool:
+        week = time.isocalendar()[:2]
+        # the previous bar's week ended without a bar on or after `weekday`
+        missed = self.bar_week not in (None, week, self.last_week)
+        self.bar_week = week
+        if week != self.last_week and time.weekday() >= self.weekday:
+            self.last_week = week
+            return True
+        return missed
+
+
+class MonthStart(Cadence):
+    """
+    Due on the first bar of each month.
+    """
+    def __init__(self) -> None:
+        self.last_month = None
+
+    def is_due(self, time) -> bool:
+        month = (time.year, time.month)
+        if month == self.last_month:
+            return False
+        self.last_month = month
+        return True
+
+
+class Scheduler:
+    """
+    Dispatches each bar only to the strategies whose cadence is due.
+    """
+    def __init__(self, strategies) -> None:
+        self.strategies = strategies
+
+    def due(self, algorithm):
+        return [strategy for strategy in self.strategies if strategy.rebalance_due(algorithm)]
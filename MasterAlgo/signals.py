@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+def frozen(array):
+    """
+    Returns a read-only view of an array, no data is copied.
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+@dataclass
+class OrderIntent:
+    strategy_name: str
+    symbol: object
+    quantity: Optional[int] = None
+    price: float = 0
+    liquidate: bool = False
+
+    @property
+    def value(self) -> float:
+        return self.quantity * self.price
+
+
+class Snapshot:
+    """
+    Read-only state handed to strategies when they generate orders.
+    It mirrors the IndicatorEngine accessors (value, lag, ready_mask, updated, bars...) with
+    write protected views, plus the portfolio state strategies need, so signal generation never
+    touches the algorithm and can run off the main thread.
+    `held(strategy_name)` masks the rows a strategy holds according to the PositionLedger,
+    `invested` those any strategy holds.
+    The engine must not advance while a snapshot is in use.
+    """
+    def __init__(self, engine, time, cash, total_portfolio_value, unrealized_profit_percent, held=None) -> None:
+        self._engine = engine
+        self.time = time
+        self.version = engine.version
+        self.symbols = tuple(engine.symbols)
+        self.bars = type(engine.bars)(*(frozen(field) for field in engine.bars))
+        self.active = frozen(engine.active)
+        self.invested = frozen(engine.invested)
+        self.updated = frozen(engine.updated)
+        self._ready_mask = frozen(engine.ready_mask())
+        self.cash = cash
+        self.total_portfolio_value = total_portfolio_value
+        self.unrealized_profit_percent = frozen(unrealized_profit_percent)
+        self._held = {name: frozen(mask) for name, mask in (held or {}).items()}
+        self._not_held = frozen(np.zeros(engine.capacity, dtype=bool))
+
+    @classmethod
+    def take(cls, algorithm):
+        engine = algorithm.indicator_engine
+        unrealized_profit_percent = np.zeros(engine.capacity)
+        for row in np.flatnonzero(engine.invested):
+            unrealized_profit_percent[row] = algorithm.Portfolio[engine.symbols[row]].UnrealizedProfitPercent
+        held = {}
+        for (symbol, strategy_name), position in algorithm.ledger.positions.items():
+            row = engine.rows.get(symbol)
+            if row is not None and position.held:
+                if strategy_name not in held:
+                    held[strategy_name] = np.zeros(engine.capacity, dtype=bool)
+                held[strategy_name][row] = True
+        return cls(
+            engine,
+            algorithm.Time,
+            algorithm.Portfolio.Cash,
+            algorithm.Portfolio.TotalPortfolioValue,
+            unrealized_profit_percent,
+            held,
+        )
+
+    def held(self, strategy_name):
+        return self._held.get(strategy_name, self._not_held)
+
+    def ready_mask(self):
+        return self._ready_mask
+
+    def value(self, name):
+        return frozen(self._engine.value(name))
+
+    def lag(self, name, index):
+        return self._engine.lag(name, index)
+
+
+class SignalRunner:
+    """
+    Runs the signal generation phase of every due strategy against a shared snapshot.
+    With workers the strategies run on a thread pool, the numpy work releases the GIL.
+    Results are returned in strategy order so the merge is deterministic.
+    """
+    def __init__(self, workers=0) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=workers) if workers else None
+
+    def run(self, strategies, snapshot, profiler):
+        def generate_orders(strategy):
+            with profiler.measure(strategy.name, 'generate_orders', len(snapshot.symbols)):
+                return strategy.generate_orders(snapshot)
+
+        if self.executor is None or len(strategies) < 2:
+            results = [generate_orders(strategy) for strategy in strategies]
+        else:
+            results = list(self.executor.map(generate_orders, strategies))
+        return [intent for intents in results for intent in intents]
+
+
+class OrderMerger:
+    """
+    Resolves conflicts between the intents of all strategies before anything is submitted:
+        - a liquidation of a symbol wins over any buy of it in the same bar.
+        - only the first buy of a symbol is kept, strategies earlier in MasterAlgo.strategies win.
+        - buys are accepted in order while their value fits in the available cash.
+    """
+    def merge(self, intents, cash):
+        liquidations, buys = {}, {}
+        for intent in intents:
+            if intent.liquidate:
+                liquidations.setdefault(intent.symbol, intent)
+        for intent in intents:
+            if intent.liquidate or intent.symbol in liquidations or intent.symbol in buys:
+                continue
+            if intent.quantity <= 0 or intent.value >= cash:
+                continue
+            cash -= intent.value
+            buys[intent.symbol] = intent
+        return [*liquidations.values(), *buys.values()]
+
+    def submit(self, algorithm, intents):
+        for intent in self.merge(intents, algorithm.Portfolio.Cash):
+            if intent.liquidate:
+                algorithm.liquidate(intent.symbol, intent.strategy_name)
+            else:
+                algorithm.buy(intent.symbol, intent.quantity, intent.strategy_name)
@@ -0,0 +1,159 @@
+import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from ledger import PositionLedger
+from replay.brokerage import OrderStatus
+from replay.runner import load_algorithm_class
+
+
+TIME = datetime.datetime(2021, 3, 1)
+
+
+class Broker:
+    """
+    Hands out order ids and records submitted quantities, optionally filling or rejecting each order
+    before its ticket is returned, as backtest orders do.
+    """
+    def __init__(self, ledger) -> None:
+        self.ledger = ledger
+        self.order_id = 0
+        self.orders = {}
+
+    def submit(self, symbol, quantity, fill=False, reject=False):
+        self.order_id += 1
+        self.orders[self.order_id] = quantity
+        if fill:
+            self.ledger.confirm(event(self.order_id, symbol, quantity), TIME)
+        if reject:
+            self.ledger.cancel(event(self.order_id, symbol))
+        return SimpleNamespace(OrderId=self.order_id)
+
+
+def event(order_id, symbol, fill_quantity=0, status=None):
+    return SimpleNamespace(OrderId=order_id, Symbol=symbol, FillQuantity=fill_quantity, Status=status)
+
+
+def test_partial_fills_add_up():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ticket = ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100))
+    position = ledger.get('SPY', 'turtle')
+    assert not position.held
+    ledger.confirm(event(ticket.OrderId, 'SPY', 40), TIME)
+    ledger.confirm(event(ticket.OrderId, 'SPY', 60), TIME + datetime.timedelta(1))
+    assert position.quantity == 100
+    assert position.created == TIME
+    assert ledger.older_than('turtle', 0, TIME) == [position]
+
+    exit_ticket = ledger.exit('SPY', 'turtle', lambda quantity: broker.submit('SPY', -quantity))
+    assert broker.orders[exit_ticket.OrderId] == -100
+
+
+def test_exit_keeps_position_until_sell_fills():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100, fill=True))
+    position = ledger.get('SPY', 'turtle')
+    assert position.held
+
+    ticket = ledger.exit('SPY', 'turtle', lambda quantity: broker.submit('SPY', -quantity))
+    assert position.closing and not position.held
+    assert ledger.exit('SPY', 'turtle', lambda quantity: broker.submit('SPY', -quantity)) is None
+    ledger.confirm(event(ticket.OrderId, 'SPY', -30), TIME)
+    assert ('SPY', 'turtle') in ledger
+    assert position.quantity == 70
+    ledger.confirm(event(ticket.OrderId, 'SPY', -70), TIME)
+    assert ('SPY', 'turtle') not in ledger
+    assert not ledger.orders
+    assert ledger.for_strategy('turtle') == {}
+
+
+def test_exit_filled_while_submitting():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100, fill=True))
+    ledger.exit('SPY', 'turtle', lambda quantity: broker.submit('SPY', -quantity, fill=True))
+    assert ('SPY', 'turtle') not in ledger
+    assert not ledger.orders
+
+
+def test_canceled_exit_leaves_position_held():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100, fill=True))
+    position = ledger.get('SPY', 'turtle')
+    ticket = ledger.exit('SPY', 'turtle', lambda quantity: broker.submit('SPY', -quantity))
+    ledger.confirm(event(ticket.OrderId, 'SPY', -30), TIME)
+    ledger.cancel(event(ticket.OrderId, 'SPY'))
+    assert position.held
+    assert position.quantity == 70
+
+    ticket = ledger.exit('SPY', 'turtle', lambda quantity: broker.submit('SPY', -quantity))
+    assert broker.orders[ticket.OrderId] == -70
+
+
+def test_rejected_exit_leaves_position_held():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100, fill=True))
+    ledger.exit('SPY', 'turtle', lambda quantity: broker.submit('SPY', -quantity, reject=True))
+    assert ledger.get('SPY', 'turtle').held
+
+
+def test_canceled_pending_entry_is_forgotten():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ticket = ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100))
+    assert ledger.exit('SPY', 'turtle', lambda quantity: broker.submit('SPY', -quantity)) is None
+    ledger.cancel(event(ticket.OrderId, 'SPY'))
+    assert ('SPY', 'turtle') not in ledger
+    assert not ledger.orders
+    assert ledger.strategy_name_for_order_id(ticket.OrderId) is None
+
+
+def test_rejected_entry_is_forgotten():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100, reject=True))
+    assert ('SPY', 'turtle') not in ledger
+    assert not ledger.orders
+
+
+def test_canceled_partially_filled_entry_keeps_filled_quantity():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ticket = ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100))
+    ledger.confirm(event(ticket.OrderId, 'SPY', 40), TIME)
+    ledger.cancel(event(ticket.OrderId, 'SPY'))
+    position = ledger.get('SPY', 'turtle')
+    assert position.held
+    assert position.quantity == 40
+
+
+def test_strategies_hold_their_own_quantity():
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100, fill=True))
+    ledger.open('SPY', 'momentum', lambda: broker.submit('SPY', 25, fill=True))
+    ticket = ledger.exit('SPY', 'momentum', lambda quantity: broker.submit('SPY', -quantity, fill=True))
+    assert broker.orders[ticket.OrderId] == -25
+    assert ('SPY', 'momentum') not in ledger
+    assert ledger.get('SPY', 'turtle').quantity == 100
+    assert ledger.strategy_name_for_order_id(1) == 'turtle'
+
+
+def test_algorithm_applies_partially_filled_events():
+    algorithm_class = load_algorithm_class(Path(__file__).parent)
+    ledger = PositionLedger()
+    broker = Broker(ledger)
+    algorithm = SimpleNamespace(
+        ledger=ledger,
+        Time=TIME,
+        Portfolio={'SPY': SimpleNamespace(Invested=True)},
+        indicator_engine=SimpleNamespace(set_invested=lambda symbol, invested: None),
+    )
+    ticket = ledger.open('SPY', 'turtle', lambda: broker.submit('SPY', 100))
+    algorithm_class.handle_order_event(algorithm, event(ticket.OrderId, 'SPY', 40, OrderStatus.PartiallyFilled))
+    algorithm_class.handle_order_event(algorithm, event(ticket.OrderId, 'SPY', 60, OrderStatus.Filled))
+    assert ledger.get('SPY', 'turtle').quantity == 100
@@ -0,0 +1,48 @@
+import datetime
+
+from scheduler import EveryNBars, MonthStart, Weekly
+
+
+def bars(start, end, holidays=()):
+    day = start
+    while day <= end:
+        if day.weekday() < 5 and day not in holidays:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def due_days(cadence, days):
+    return [day for day in days if cadence.is_due(day)]
+
+
+def test_weekly_runs_on_weekday():
+    days = bars(datetime.date(2021, 3, 1), datetime.date(2021, 3, 14))
+    assert due_days(Weekly(weekday=2), days) == [datetime.date(2021, 3, 3), datetime.date(2021, 3, 10)]
+
+
+def test_weekly_holiday_moves_to_next_bar_of_week():
+    days = bars(datetime.date(2021, 3, 1), datetime.date(2021, 3, 7), holidays={datetime.date(2021, 3, 3)})
+    assert due_days(Weekly(weekday=2), days) == [datetime.date(2021, 3, 4)]
+
+
+def test_weekly_holiday_on_last_bar_of_week_moves_to_next_week():
+    # Good Friday 2021
+    days = bars(datetime.date(2021, 3, 29), datetime.date(2021, 4, 11), holidays={datetime.date(2021, 4, 2)})
+    assert due_days(Weekly(weekday=4), days) == [datetime.date(2021, 4, 5), datetime.date(2021, 4, 9)]
+
+
+def test_weekly_starting_mid_week():
+    days = bars(datetime.date(2021, 3, 4), datetime.date(2021, 3, 14))
+    assert due_days(Weekly(weekday=0), days) == [datetime.date(2021, 3, 4), datetime.date(2021, 3, 8)]
+
+
+def test_every_n_bars():
+    days = list(bars(datetime.date(2021, 3, 1), datetime.date(2021, 3, 12)))
+    assert due_days(EveryNBars(3), days) == days[::3]
+
+
+def test_month_start():
+    days = bars(datetime.date(2021, 1, 25), datetime.date(2021, 3, 5), holidays={datetime.date(2021, 3, 1)})
+    assert due_days(MonthStart(), days) == [
+        datetime.date(2021, 1, 25), datetime.date(2021, 2, 1), datetime.date(2021, 3, 2),
+    ]
@@ -1,49 +1,52 @@
+import numpy as np
 from base import BaseStrategy
 from AlgorithmImports import AverageTrueRange, SimpleMovingAverage, RateOfChangePercent,\
-    Maximum, Minimum, RollingWindow
+    Maximum, Minimum
+from indicator_engine import IndicatorHistory
+from candidate_index import CandidateIndex
+from signals import OrderIntent
 
 
 class TurtleTrading(BaseStrategy):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self.high_lookback = kwargs['high_lookback']
+        self.candidates = CandidateIndex(self.entry_filter, 'roc', 10)
 
-    def handle_on_data(self, algorithm, data):
-        securities = [
-            symbol for symbol in algorithm.symbols.keys() \
-            if algorithm.ActiveSecurities.ContainsKey(symbol) \
-            and data.ContainsKey(symbol) and data[symbol] is not None \
-            and algorithm.symbols[symbol].ready \
-            and algorithm.symbols[symbol].sma.Current.Value < data[symbol].Close \
-            and algorithm.symbols[symbol].high_window[1] < data[symbol].Close \
-            and algorithm.symbols[symbol].high_periods_since_window[1] >= self.high_lookback -1 \
-            and not algorithm.ActiveSecurities[symbol].Invested
+    def entry_filter(self, engine):
+        close = engine.bars.close
+        return engine.ready_mask() \
+            & engine.updated \
+            & ~engine.invested \
+            & (engine.value('sma') < close) \
+            & (engine.lag('high_window', 1) < close) \
+            & (engine.lag('high_periods_since_window', 1) >= self.high_lookback - 1)
+
+    def generate_orders(self, snapshot):
+        return [*self.entry_orders(snapshot), *self.exit_orders(snapshot)]
+
+    def entry_orders(self, snapshot):
+        rows = self.candidates.top_rows(snapshot)
+        atr = snapshot.value('atr')[rows]
+        position_sizes = np.round((snapshot.total_portfolio_value * self.equity_risk_pc) / atr)
+        return [
+            OrderIntent(self.name, snapshot.symbols[row], int(position_size), float(snapshot.bars.close[row]))
+            for row, position_size in zip(rows, position_sizes) if position_size > 0
         ]
-        securities = sorted(
-            securities,
-            key=lambda symbol: algorithm.symbols[symbol].roc.Current.Value,
-            reverse=True,
-        )[:10]
-        for symbol in securities:
-            position_size = self.calculate_position_size(algorithm, symbol)
-            if position_size <= 0:
-                continue
-            position_value = position_size * algorithm.ActiveSecurities[symbol].Price
-            if position_value < algorithm.Portfolio.Cash:
-                algorithm.MarketOrder(symbol, position_size)
-        self.handle_exit_strategy(algorithm)
 
-    def handle_exit_strategy(self, algorithm):
-        for symbol in algorithm.symbols.keys():
-            if not algorithm.ActiveSecurities.ContainsKey(symbol) or not algorithm.ActiveSecurities[symbol].Invested:
-                continue
-            close = algorithm.ActiveSecurities[symbol].Close
-            if close < algorithm.symbols[symbol].low_window[1]:
-                algorithm.Liquidate(symbol)
-            if algorithm.Portfolio[symbol].UnrealizedProfitPercent >= 0.20 or \
-                algorithm.Portfolio[symbol].UnrealizedProfitPercent <= -0.08 or \
-                    close < algorithm.symbols[symbol].sma.Current.Value:
-                algorithm.Liquidate(symbol)
+    def exit_orders(self, snapshot):
+        close = snapshot.bars.close
+        profit = snapshot.unrealized_profit_percent
+        exits = snapshot.held(self.name) & (
+            (close < snapshot.lag('low_window', 1))
+            | (profit >= 0.20)
+            | (profit <= -0.08)
+            | (close < snapshot.value('sma'))
+        )
+        return [
+            OrderIntent(self.name, snapshot.symbols[row], liquidate=True)
+            for row in np.flatnonzero(exits)
+        ]
 
     def get_indicator_configs(self):
         return [
@@ -74,29 +77,21 @@ class TurtleTrading(BaseStrategy):
             },
             {
                 "name": "high_window",
-                "class": RollingWindow,
+                "class": IndicatorHistory,
                 "args": [2],
-                "manual": True,
-                "window_type": float,
+                "source": "high",
             },
             {
                 "name": "high_periods_since_window",
-                "class": RollingWindow,
+                "class": IndicatorHistory,
                 "args": [2],
-                "manual": True,
-                "window_type": float,
+                "source": "high",
+                "field": "PeriodsSinceMaximum",
             },
             {
                 "name": "low_window",
-                "class": RollingWindow,
+                "class": IndicatorHistory,
                 "args": [2],
-                "manual": True,
-                "window_type": float,
+                "source": "low",
             },
         ]
-    
-    def handle_manual_indicators(self, algorithm, data):
-        for symbol in algorithm.symbols.keys():
-            algorithm.symbols[symbol].high_window.Add(algorithm.symbols[symbol].high.Current.Value)
-            algorithm.symbols[symbol].high_periods_since_window.Add(algorithm.symbols[symbol].high.PeriodsSinceMaximum)
-            algorithm.symbols[symbol].low_window.Add(algorithm.symbols[symbol].low.Current.Value)
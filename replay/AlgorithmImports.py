@@ -0,0 +1,20 @@
+"""
+Replay stand-in for LEAN's AlgorithmImports module.
+The runner registers it under the name `AlgorithmImports` so strategy modules import it unchanged.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from replay.algorithm import BrokerageName, IdentityConsolidator, ImmediateExecutionModel, ManualUniverseSelectionModel, \
+    NullRiskManagementModel, PandasConverter, QC500UniverseSelectionModel, QCAlgorithm, Resolution, UniverseSettings
+from replay.brokerage import OrderDirection, OrderEvent, OrderStatus, OrderTicket, OrderType, SecurityHolding, \
+    SecurityPortfolioManager
+from replay.indicators import AverageDirectionalIndex, AverageTrueRange, BollingerBands, DonchianChannel, \
+    ExponentialMovingAverage, Field, IndicatorDataPoint, KeltnerChannels, Maximum, Minimum, MoneyFlowIndex, \
+    MovingAverageType, RateOfChange, RateOfChangePercent, RelativeStrengthIndex, RollingWindow, SharpeRatio, \
+    SimpleMovingAverage, StandardDeviation
+from replay.market import CoarseFundamental, Market, Security, SecurityChanges, SecurityType, Slice, Symbol, TradeBar, \
+    TradeBars
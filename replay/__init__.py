@@ -0,0 +1,9 @@
+"""
+Offline replay of this repo's daily equity strategies.
+
+Stands in for the parts of LEAN the strategies use (QCAlgorithm, History, orders, portfolio,
+indicators, RollingWindow, TradeBar, Slice) and replays local daily bars through them with an
+immediate fill broker, so strategy code can be run and profiled without a LEAN install::
+
+    python -m replay MasterAlgo --data ~/bars --start 2020-01-01 --end 2021-01-01
+"""
@@ -0,0 +1,25 @@
+import argparse
+
+import pandas as pd
+
+from .runner import run
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m replay', description='Replays local daily bars through a LEAN project.')
+    parser.add_argument('project', help='LEAN project directory, e.g. MasterAlgo')
+    parser.add_argument('--data', required=True, help='directory of <TICKER>.csv / .parquet / LEAN daily .zip files')
+    parser.add_argument('--start', type=pd.Timestamp, help='overrides the algorithm start date')
+    parser.add_argument('--end', type=pd.Timestamp, help='overrides the algorithm end date')
+    parser.add_argument('--cash', type=float, help='overrides the algorithm starting cash')
+    parser.add_argument('--orders', help='writes the order log to this csv path')
+    parser.add_argument('--logs', action='store_true', help='prints algorithm Log / Debug messages')
+    args = parser.parse_args()
+    result = run(args.project, args.data, start=args.start, end=args.end, cash=args.cash, log=print if args.logs else None)
+    print(result.summary())
+    if args.orders:
+        result.write_orders(args.orders)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from enum import IntEnum
+from pathlib import Path
+from urllib.request import urlopen
+
+import pandas as pd
+
+from .brokerage import ImmediateFillBroker, OrderStatus, OrderType, SecurityPortfolioManager
+from .indicators import AverageTrueRange, Maximum, Minimum, SimpleMovingAverage, RateOfChangePercent
+from .market import CoarseFundamental, Security, SecurityChanges, SecurityManager, Slice, Symbol, TradeBar
+
+
+class Resolution(IntEnum):
+    Tick = 0
+    Second = 1
+    Minute = 2
+    Hour = 3
+    Daily = 4
+
+
+class BrokerageName:
+    Default = 'Default'
+    Binance = 'Binance'
+    InteractiveBrokersBrokerage = 'InteractiveBrokersBrokerage'
+
+
+class UniverseSettings:
+    def __init__(self) -> None:
+        self.Resolution = Resolution.Daily
+
+
+class QC500UniverseSelectionModel:
+    """
+    Monthly selection of the most liquid symbols by dollar volume.
+    The replay has no fundamentals, so the fine stage only caps the count.
+    """
+    numberOfSymbolsCoarse = 1000
+    numberOfSymbolsFine = 500
+
+    def select(self, coarse):
+        count = min(self.numberOfSymbolsCoarse, self.numberOfSymbolsFine)
+        coarse = sorted(coarse, key=lambda stock: stock.DollarVolume, reverse=True)
+        return [stock.Symbol for stock in coarse[:count]]
+
+
+class ManualUniverseSelectionModel:
+    """
+    A fixed universe of the given symbols.
+    """
+    def __init__(self, symbols) -> None:
+        self.symbols = list(symbols)
+
+    def select(self, coarse):
+        return self.symbols
+
+
+class ObjectStore(dict):
+    """
+    In memory stand-in for LEAN's ObjectStore, which persists across backtests there but not in the replay.
+    """
+    def ContainsKey(self, key):
+        return key in self
+
+    def Save(self, key, value):
+        self[key] = value
+        return True
+
+    def Read(self, key):
+        return self[key]
+
+    def Delete(self, key):
+        return self.pop(key, None) is not None
+
+
+class ImmediateExecutionModel:
+    pass
+
+
+class NullRiskManagementModel:
+    pass
+
+
+class IdentityConsolidator:
+    def __init__(self, symbol) -> None:
+        self.Symbol = symbol
+
+
+class SubscriptionManager:
+    def __init__(self, algorithm) -> None:
+        self.algorithm = algorithm
+
+    def RemoveConsolidator(self, symbol, consolidator):
+        registrations = self.algorithm._indicators.get(symbol, [])
+        registrations[:] = [registration for registration in registrations if registration[2] is not consolidator]
+
+
+class DataFrameConverter:
+    def __getitem__(self, data_type):
+        return self.convert
+
+    @staticmethod
+    def convert(bars):
+        bars = list(bars)
+        index = pd.MultiIndex.from_tuples([(bar.Symbol, bar.EndTime) for bar in bars], names=['symbol', 'time'])
+        return pd.DataFrame({
+            'open': [bar.Open for bar in bars],
+            'high': [bar.High for bar in bars],
+            'low': [bar.Low for bar in bars],
+            'close': [bar.Close for bar in bars],
+            'volume': [bar.Volume for bar in bars],
+        }, index=index)
+
+
+class PandasConverter:
+    def __init__(self) -> None:
+        self.GetDataFrame = DataFrameConverter()
+
+
+class QCAlgorithm:
+    """
+    Enough of LEAN's QCAlgorithm for this repo's daily equity strategies to run unmodified.
+    The ReplayRunner drives it: it attaches a BarStore, moves the clock, applies universe changes
+    and delivers slices. Orders go to an ImmediateFillBroker.
+    """
+    def __init__(self) -> None:
+        self.LiveMode = False
+        self.IsWarmingUp = False
+        self.Time = datetime(1998, 1, 1)
+        self.StartDate = None
+        self.EndDate = None
+        self.Name = type(self).__name__
+        self.UniverseSettings = UniverseSettings()
+        self.Portfolio = SecurityPortfolioManager()
+        self.Securities = SecurityManager()
+        self.Portfolio.Securities = self.Securities
+        self.ActiveSecurities = SecurityManager()
+        self.SubscriptionManager = SubscriptionManager(self)
+        self.PandasConverter = PandasConverter()
+        self.ObjectStore = ObjectStore()
+        self._broker = ImmediateFillBroker(self.Portfolio)
+        self._store = None
+        self._warm_up = None
+        self._symbols = {}
+        self._manual_symbols = set()
+        self._coarse_selectors = []
+        self._universe_model = None
+        self._universe_symbols = set()
+        self._universe_month = None
+        self._pending_changes = ([], [])
+        # symbol -> [(indicator, selector, consolidator)]
+        self._indicators = defaultdict(list)
+        self._logs = []
+        self._log_handler = None
+
+    # region configuration
+    def SetStartDate(self, *args):
+        self.StartDate = args[0] if len(args) == 1 else datetime(*args)
+
+    def SetEndDate(self, *args):
+        self.EndDate = args[0] if len(args) == 1 else datetime(*args)
+
+    def SetCash(self, cash):
+        self.Portfolio.Cash = float(cash)
+
+    def SetWarmUp(self, period, resolution=None):
+        self._warm_up = period
+
+    def SetBrokerageModel(self, *args, **kwargs):
+        pass
+
+    def SetExecution(self, model):
+        pass
+
+    def SetRiskManagement(self, model):
+        pass
+
+    def SetBenchmark(self, *args):
+        pass
+
+    def SetUniverseSelection(self, model):
+        self._universe_model = model
+
+    def AddUniverse(self, selector, *args):
+        self._coarse_selectors.append(selector)
+
+    def AddEquity(self, ticker, resolution=None, *args, **kwargs):
+        symbol = self._symbol(ticker)
+        self._manual_symbols.add(symbol)
+        return self._add_security(symbol)
+    # endregion
+
+    # region data
+    def History(self, symbols, periods, resolution=None):
+        """
+        Returns the latest `periods` daily bars which ended by the current time,
+        indexed by (symbol, time) with open, high, low, close and volume columns.
+        """
+        if isinstance(symbols, (Symbol, str)):
+            symbols = [symbols]
+        if isinstance(periods, timedelta):
+            periods = periods.days
+        end = pd.Timestamp(self.Time).normalize() - timedelta(1)
+        history = self._store.history([str(symbol) for symbol in symbols], end, periods)
+        if len(history):
+            history.index = history.index.set_levels(
+                [self._symbol(ticker) for ticker in history.index.levels[0]], level=0
+            )
+        return history
+
+    def Download(self, address):
+        if Path(address).exists():
+            return Path(address).read_text()
+        with urlopen(address) as response:
+            return response.read().decode()
+
+    def ResolveConsolidator(self, symbol, resolution):
+        return IdentityConsolidator(symbol)
+
+    def RegisterIndicator(self, symbol, indicator, resolution=None, selector=None):
+        consolidator = resolution if isinstance(resolution, IdentityConsolidator) else None
+        self._indicators[symbol].append((indicator, selector, consolidator))
+
+    def WarmUpIndicator(self, symbol, indicator, resolution=None, selector=None):
+        history = self.History([symbol], indicator.WarmUpPeriod)
+        for data in history.itertuples():
+            bar = TradeBar(data.Index[1] - timedelta(1), symbol, data.open, data.high, data.low, data.close, data.volume)
+            self._update_indicator(indicator, selector, bar)
+
+    def _helper_indicator(self, indicator, symbol, resolution, selector):
+        self.RegisterIndicator(symbol, indicator, resolution, selector)
+        return indicator
+
+    def SMA(self, symbol, period, resolution=None, selector=None):
+        return self._helper_indicator(SimpleMovingAverage(period), symbol, resolution, selector)
+
+    def ATR(self, symbol, period, *args, **kwargs):
+        return self._helper_indicator(AverageTrueRange(period), symbol, None, None)
+
+    def ROCP(self, symbol, period, resolution=None, selector=None):
+        return self._helper_indicator(RateOfChangePercent(period), symbol, resolution, selector)
+
+    def MAX(self, symbol, period, resolution=None, selector=None):
+        return self._helper_indicator(Maximum(period), symbol, resolution, selector)
+
+    def MIN(self, symbol, period, resolution=None, selector=None):
+        return self._helper_indicator(Minimum(period), symbol, resolution, selector)
+    # endregion
+
+    # region orders
+    def MarketOrder(self, symbol, quantity, asynchronous=False, tag='', orderProperties=None):
+        symbol = self._symbol(symbol)
+        ticket = self._broker.create_ticket(symbol, int(quantity), OrderType.Market, self.Time, tag)
+        if self.IsWarmingUp:
+            ticket.Status = OrderStatus.Invalid
+            return ticket
+        if ticket.Quantity == 0 or not self.Securities.get(symbol) or not self.Securities[symbol].Price:
+            self.OnOrderEvent(self._broker.invalidate(ticket, self.Time, 'no quantity or price'))
+            return ticket
+        self.OnOrderEvent(self._broker.fill(ticket, self.Securities[symbol].Price, self.Time))
+        return ticket
+
+    def StopMarketOrder(self, symbol, quantity, stopPrice, tag='', orderProperties=None):
+        symbol = self._symbol(symbol)
+        ticket = self._broker.create_ticket(symbol, int(quantity), OrderType.StopMarket, self.Time, tag, stopPrice)
+        if self.IsWarmingUp:
+            ticket.Status = OrderStatus.Invalid
+            return ticket
+        self._broker.submit_stop(ticket)
+        return ticket
+
+    def Liquidate(self, symbol=None, tag='Liquidated'):
+        symbols = [self._symbol(symbol)] if symbol is not None else list(self.Portfolio.keys())
+        order_ids = []
+        for symbol in symbols:
+            quantity = self.Portfolio[symbol].Quantity
+            if quantity:
+                order_ids.append(self.MarketOrder(symbol, -quantity, tag=tag).OrderId)
+        return order_ids
+
+    def SetHoldings(self, symbol, fraction, liquidateExistingHoldings=False, tag=''):
+        symbol = self._symbol(symbol)
+        price = self.Securities[symbol].Price
+        if price:
+            target = int(self.Portfolio.TotalPortfolioValue * fraction / price)
+            self.MarketOrder(symbol, target - self.Portfolio[symbol].Quantity, tag=tag)
+    # endregion
+
+    # region logging
+    def Log(self, message):
+        self._logs.append(f"{self.Time} {message}")
+        if self._log_handler:
+            self._log_handler(self._logs[-1])
+
+    Debug = Log
+    Error = Log
+    # endregion
+
+    # region event handlers
+    def OnData(self, data):
+        pass
+
+    def OnSecuritiesChanged(self, changes):
+        pass
+
+    def OnOrderEvent(self, event):
+        pass
+    # endregion
+
+    # region replay internals
+    def _symbol(self, ticker):
+        if isinstance(ticker, Symbol):
+            ticker = ticker.Value
+        if ticker not in self._symbols:
+            self._symbols[ticker] = Symbol(ticker)
+        return self._symbols[ticker]
+
+    def _add_security(self, symbol):
+        if symbol not in self.Securities:
+            self.Securities[symbol] = Security(symbol, self.Portfolio[symbol])
+        if symbol not in self.ActiveSecurities:
+            self.ActiveSecurities[symbol] = self.Securities[symbol]
+            self._pending_changes[0].append(self.Securities[symbol])
+        return self.Securities[symbol]
+
+    def _remove_security(self, symbol):
+        security = self.ActiveSecurities.pop(symbol, None)
+        if security is not None:
+            self._pending_changes[1].append(security)
+
+    def _select_universe(self, date_index, date):
+        """
+        Runs universe selection on the previous day's bars and emits the resulting security changes.
+        """
+        if self._coarse_selectors or self._universe_model:
+            selected = self._universe_symbols
+            coarse = None
+            if self._coarse_selectors or self._universe_month != (date.year, date.month):
+                coarse = [
+                    CoarseFundamental(self._symbol(ticker), close, volume)
+                    for ticker, _, _, _, close, volume in self._store.day(max(date_index - 1, 0))
+                ]
+            if coarse is not None:
+                selected = set()
+                for selector in self._coarse_selectors:
+                    selected.update(self._symbol(symbol) for symbol in selector(coarse))
+                if self._universe_model:
+                    selected.update(self._symbol(symbol) for symbol in self._universe_model.select(coarse))
+                    self._universe_month = (date.year, date.month)
+            # in a fixed order, so ActiveSecurities and OnData iterate the same way every run
+            for symbol in sorted(selected - self._universe_symbols):
+                self._add_security(symbol)
+            for symbol in self._universe_symbols - selected:
+                # LEAN keeps securities with holdings until they are liquidated
+                if symbol not in self._manual_symbols and not self.Portfolio[symbol].Invested:
+                    self._remove_security(symbol)
+            self._universe_symbols = {symbol for symbol in selected} | {
+                symbol for symbol in self._universe_symbols if symbol in self.ActiveSecurities
+            }
+        added, removed = self._pending_changes
+        if added or removed:
+            self._pending_changes = ([], [])
+            self.OnSecuritiesChanged(SecurityChanges(added, removed))
+
+    def _slice(self, date_index, date):
+        bars = {}
+        for ticker, open, high, low, close, volume in self._store.day(date_index):
+            symbol = self._symbols.get(ticker)
+            if symbol is None or symbol not in self.ActiveSecurities:
+                continue
+            bar = TradeBar(date, symbol, open, high, low, close, volume)
+            self.ActiveSecurities[symbol].update(bar)
+            bars[symbol] = bar
+        return Slice(date + timedelta(1), bars)
+
+    def _process_bars(self, data):
+        for ticket, price in list(self._broker.triggered_stops(data.Bars)):
+            self.OnOrderEvent(self._broker.fill(ticket, price, self.Time))
+        for symbol, bar in data.Bars.items():
+            for indicator, selector, _ in self._indicators.get(symbol, ()):
+                self._update_indicator(indicator, selector, bar)
+
+    @staticmethod
+    def _update_indicator(indicator, selector, bar):
+        if selector is not None:
+            indicator.Update(bar.EndTime, selector(bar))
+        else:
+            indicator.Update(bar)
+    # endregion
@@ -0,0 +1,233 @@
+from enum import IntEnum
+
+
+class OrderStatus(IntEnum):
+    New = 0
+    Submitted = 1
+    PartiallyFilled = 2
+    Filled = 3
+    Canceled = 5
+    none = 6
+    Invalid = 7
+    CancelPending = 8
+    UpdateSubmitted = 9
+
+
+class OrderType(IntEnum):
+    Market = 0
+    Limit = 1
+    StopMarket = 2
+
+
+class OrderDirection(IntEnum):
+    Buy = 0
+    Sell = 1
+    Hold = 2
+
+
+class OrderEvent:
+    def __init__(self, order, status, time, fill_price=0.0, fill_quantity=0) -> None:
+        self.OrderId = order.OrderId
+        self.Symbol = order.Symbol
+        self.Status = status
+        self.UtcTime = time
+        self.FillPrice = fill_price
+        self.FillQuantity = fill_quantity
+        self.Quantity = order.Quantity
+        self.Direction = OrderDirection.Buy if order.Quantity > 0 else OrderDirection.Sell
+        self.OrderFee = 0.0
+        self.Message = ''
+
+    def __repr__(self) -> str:
+        return f"OrderEvent({self.OrderId} {self.Symbol} {self.Status.name} {self.FillQuantity}@{self.FillPrice})"
+
+
+class OrderTicket:
+    def __init__(self, order_id, symbol, quantity, order_type, time, tag='', stop_price=None) -> None:
+        self.OrderId = order_id
+        self.Symbol = symbol
+        self.Quantity = quantity
+        self.OrderType = order_type
+        self.Time = time
+        self.Tag = tag or ''
+        self.StopPrice = stop_price
+        self.Status = OrderStatus.New
+        self.AverageFillPrice = 0.0
+        self.QuantityFilled = 0
+
+    def Cancel(self, tag=None):
+        if self.Status in (OrderStatus.New, OrderStatus.Submitted):
+            self.Status = OrderStatus.Canceled
+
+    def __repr__(self) -> str:
+        return f"OrderTicket({self.OrderId} {self.Symbol} {self.Quantity} {self.Status.name})"
+
+
+class SecurityHolding:
+    def __init__(self, symbol) -> None:
+        self.Symbol = symbol
+        self.Quantity = 0
+        self.AveragePrice = 0.0
+        self.Price = 0.0
+
+    @property
+    def Invested(self):
+        return self.Quantity != 0
+
+    @property
+    def IsLong(self):
+        return self.Quantity > 0
+
+    @property
+    def IsShort(self):
+        return self.Quantity < 0
+
+    @property
+    def AbsoluteQuantity(self):
+        return abs(self.Quantity)
+
+    @property
+    def HoldingsCost(self):
+        return self.Quantity * self.AveragePrice
+
+    @property
+    def HoldingsValue(self):
+        return self.Quantity * self.Price
+
+    @property
+    def UnrealizedProfit(self):
+        return self.HoldingsValue - self.HoldingsCost
+
+    @property
+    def UnrealizedProfitPercent(self):
+        cost = abs(self.HoldingsCost)
+        return self.UnrealizedProfit / cost if cost else 0.0
+
+    def fill(self, quantity, price):
+        """
+        Applies a fill, averaging the price when a position grows and keeping it when it shrinks.
+        """
+        new_quantity = self.Quantity + quantity
+        if new_quantity == 0:
+            self.AveragePrice = 0.0
+        elif self.Quantity == 0 or (self.Quantity > 0) != (new_quantity > 0):
+            self.AveragePrice = price
+        elif abs(new_quantity) > abs(self.Quantity):
+            self.AveragePrice = (self.HoldingsCost + quantity * price) / new_quantity
+        self.Quantity = new_quantity
+
+
+class SecurityPortfolioManager(dict):
+    """
+    Cash and holdings of the algorithm, keyed by Symbol. Holdings are created on first access.
+    """
+    def __init__(self, cash=100000) -> None:
+        super().__init__()
+        self.Cash = float(cash)
+
+    def __missing__(self, symbol):
+        holding = self[symbol] = SecurityHolding(symbol)
+        return holding
+
+    def ContainsKey(self, symbol):
+        return symbol in self
+
+    @property
+    def Keys(self):
+        return list(self.keys())
+
+    @property
+    def Values(self):
+        return list(self.values())
+
+    @property
+    def TotalHoldingsValue(self):
+        return sum(holding.HoldingsValue for holding in self.values())
+
+    @property
+    def TotalPortfolioValue(self):
+        return self.Cash + self.TotalHoldingsValue
+
+    @property
+    def TotalUnrealizedProfit(self):
+        return sum(holding.UnrealizedProfit for holding in self.values())
+
+    @property
+    def Invested(self):
+        return any(holding.Invested for holding in self.values())
+
+    @property
+    def MarginRemaining(self):
+        # a cash account without leverage, so buying power is what the holdings don't tie up
+        return self.TotalPortfolioValue - sum(abs(holding.HoldingsValue) for holding in self.values())
+
+    def GetMarginRemaining(self, symbol, direction=None):
+        return self.MarginRemaining
+
+
+class ImmediateFillBroker:
+    """
+    Fills market orders immediately at the security's latest close and stop orders when a bar crosses
+    the stop price. No fees or slippage. Every fill is kept in LEAN's order export layout.
+    """
+    def __init__(self, portfolio) -> None:
+        self.portfolio = portfolio
+        self.next_order_id = 1
+        self.open_orders = []
+        self.orders = []
+
+    def create_ticket(self, symbol, quantity, order_type, time, tag='', stop_price=None):
+        ticket = OrderTicket(self.next_order_id, symbol, quantity, order_type, time, tag, stop_price)
+        self.next_order_id += 1
+        return ticket
+
+    def fill(self, ticket, price, time):
+        self.portfolio.Cash -= ticket.Quantity * price
+        self.portfolio[ticket.Symbol].fill(ticket.Quantity, price)
+        ticket.Status = OrderStatus.Filled
+        ticket.AverageFillPrice = price
+        ticket.QuantityFilled = ticket.Quantity
+        self.record(ticket, time)
+        return OrderEvent(ticket, OrderStatus.Filled, time, price, ticket.Quantity)
+
+    def invalidate(self, ticket, time, message):
+        ticket.Status = OrderStatus.Invalid
+        self.record(ticket, time)
+        event = OrderEvent(ticket, OrderStatus.Invalid, time)
+        event.Message = message
+        return event
+
+    def record(self, ticket, time):
+        self.orders.append({
+            'Time': time,
+            'Symbol': str(ticket.Symbol),
+            'Price': ticket.AverageFillPrice,
+            'Quantity': ticket.Quantity,
+            'Type': ticket.OrderType.name,
+            'Status': ticket.Status.name,
+            'Value': ticket.AverageFillPrice * ticket.Quantity,
+            'Tag': ticket.Tag,
+        })
+
+    def submit_stop(self, ticket):
+        ticket.Status = OrderStatus.Submitted
+        self.open_orders.append(ticket)
+
+    def triggered_stops(self, bars):
+        """
+        Yields (ticket, fill price) for open stop orders crossed by the new bars.
+        """
+        remaining = []
+        for ticket in self.open_orders:
+            bar = bars.get(ticket.Symbol)
+            if ticket.Status != OrderStatus.Submitted:
+                continue
+            if bar is None:
+                remaining.append(ticket)
+            elif ticket.Quantity > 0 and bar.High >= ticket.StopPrice:
+                yield ticket, max(bar.Open, ticket.StopPrice)
+            elif ticket.Quantity < 0 and bar.Low <= ticket.StopPrice:
+                yield ticket, min(bar.Open, ticket.StopPrice)
+            else:
+                remaining.append(ticket)
+        self.open_orders = remaining
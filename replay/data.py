@@ -0,0 +1,104 @@
+import io
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+TIME_COLUMNS = ('date', 'time', 'datetime', 'timestamp')
+# LEAN stores equity prices as deci-cents in its local zip files
+LEAN_PRICE_SCALE = 10000
+
+
+def read_bars(path) -> pd.DataFrame:
+    """
+    Reads daily bars for one ticker from a csv, parquet or LEAN daily zip file.
+    Returns a DataFrame indexed by bar date with open, high, low, close and volume columns.
+
+    :param path: Path of the bar file, named after its ticker.
+    """
+    path = Path(path)
+    if path.suffix == '.zip':
+        with zipfile.ZipFile(path) as archive:
+            text = archive.read(archive.namelist()[0]).decode()
+        df = pd.read_csv(io.StringIO(text), header=None, names=['time', *FIELDS])
+        df[list(FIELDS[:4])] /= LEAN_PRICE_SCALE
+        df['time'] = pd.to_datetime(df['time'], format='%Y%m%d %H:%M')
+    elif path.suffix == '.parquet':
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    df.columns = [str(column).lower() for column in df.columns]
+    if isinstance(df.index, pd.DatetimeIndex):
+        df.index.name = 'time'
+        df = df.reset_index()
+    time_column = next((column for column in TIME_COLUMNS if column in df.columns), df.columns[0])
+    df.index = pd.to_datetime(df.pop(time_column)).dt.normalize()
+    df.index.name = 'time'
+    return df[list(FIELDS)].astype(float).sort_index()
+
+
+def load_bars(data_dir, tickers=None) -> dict:
+    """
+    Loads every bar file in a directory, keyed by upper case ticker (the file name).
+
+    :param data_dir: Directory of <TICKER>.csv, <TICKER>.parquet or <ticker>.zip files.
+    :param tickers: Optional collection of tickers to restrict loading to.
+    """
+    bars = {}
+    for path in sorted(Path(data_dir).iterdir()):
+        if path.suffix not in ('.csv', '.parquet', '.zip'):
+            continue
+        ticker = path.stem.upper()
+        if tickers is not None and ticker not in tickers:
+            continue
+        bars[ticker] = read_bars(path)
+    return bars
+
+
+class BarStore:
+    """
+    Daily bars of many tickers aligned on one date axis as a (dates x tickers x fields) array,
+    so each replayed day is a single row lookup.
+    """
+    def __init__(self, bars) -> None:
+        self.frames = bars
+        self.tickers = sorted(bars)
+        self.columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.dates = pd.DatetimeIndex(sorted(set().union(*(frame.index for frame in bars.values()))))
+        self.values = np.full((len(self.dates), len(self.tickers), len(FIELDS)), np.nan)
+        for ticker, frame in bars.items():
+            self.values[self.dates.get_indexer(frame.index), self.columns[ticker]] = frame.to_numpy()
+        self.available = ~np.isnan(self.values[:, :, 3])
+
+    @classmethod
+    def from_directory(cls, data_dir, tickers=None):
+        return cls(load_bars(data_dir, tickers))
+
+    def __contains__(self, ticker):
+        return ticker in self.columns
+
+    def day(self, index):
+        """
+        Yields (ticker, open, high, low, close, volume) for every ticker with a bar on the indexed date.
+        """
+        for column in np.flatnonzero(self.available[index]):
+            yield (self.tickers[column], *self.values[index, column])
+
+    def history(self, tickers, end, count) -> pd.DataFrame:
+        """
+        Returns the last `count` bars of each ticker ending on or before `end`,
+        indexed by (ticker, time) where time is the bar end time, as LEAN's History does.
+        """
+        frames = {}
+        for ticker in tickers:
+            if ticker not in self.frames:
+                continue
+            frame = self.frames[ticker].loc[:end].tail(count)
+            frames[ticker] = frame.set_axis(frame.index + timedelta(1), axis=0)
+        if not frames:
+            return pd.DataFrame(columns=list(FIELDS), index=pd.MultiIndex.from_tuples([], names=['symbol', 'time']))
+        return pd.concat(frames, names=['symbol', 'time'])
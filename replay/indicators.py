@@ -0,0 +1,509 @@
+import math
+from collections import deque
+
+
+class IndicatorDataPoint:
+    __slots__ = ('Time', 'EndTime', 'Value')
+
+    def __init__(self, time=None, value=0.0) -> None:
+        self.Time = time
+        self.EndTime = time
+        self.Value = value
+
+    def __float__(self):
+        return float(self.Value)
+
+    def __repr__(self) -> str:
+        return f"{self.EndTime} {self.Value}"
+
+
+class MovingAverageType:
+    Simple = 'simple'
+    Wilders = 'wilders'
+    Exponential = 'exponential'
+
+
+class Field:
+    """
+    Selectors used by the indicator helper methods, e.g. `algorithm.MAX(symbol, 20, Resolution.Daily, Field.High)`.
+    """
+    Open = staticmethod(lambda bar: bar.Open)
+    High = staticmethod(lambda bar: bar.High)
+    Low = staticmethod(lambda bar: bar.Low)
+    Close = staticmethod(lambda bar: bar.Close)
+    Volume = staticmethod(lambda bar: bar.Volume)
+
+
+class IndicatorBase:
+    """
+    Pure python counterpart of LEAN's IndicatorBase.
+    Subclasses implement `compute` which receives the input time and value and returns the next value.
+    """
+    def __init__(self, warm_up_period) -> None:
+        self.WarmUpPeriod = warm_up_period
+        self.Name = type(self).__name__
+        self.Reset()
+
+    def Reset(self):
+        self.Samples = 0
+        self.Current = IndicatorDataPoint()
+
+    @property
+    def IsReady(self) -> bool:
+        return self.Samples >= self.WarmUpPeriod
+
+    def Update(self, *args) -> bool:
+        time, value = self.parse_input(*args)
+        self.Samples += 1
+        self.Current = IndicatorDataPoint(time, float(self.compute(time, value)))
+        return self.IsReady
+
+    def parse_input(self, *args):
+        raise NotImplementedError()
+
+    def compute(self, time, value):
+        raise NotImplementedError()
+
+    def __float__(self):
+        return float(self.Current.Value)
+
+    def __lt__(self, other):
+        return float(self) < float(other)
+
+    def __gt__(self, other):
+        return float(self) > float(other)
+
+    def __le__(self, other):
+        return float(self) <= float(other)
+
+    def __ge__(self, other):
+        return float(self) >= float(other)
+
+    def __repr__(self) -> str:
+        return f"{self.Name}: {self.Current.Value}"
+
+
+class Indicator(IndicatorBase):
+    """
+    Indicator of single values. Accepts `Update(time, value)`, a data point or a bar (its close).
+    """
+    def parse_input(self, *args):
+        if len(args) == 2:
+            return args
+        data = args[0]
+        return data.EndTime, data.Value
+
+
+class BarIndicator(IndicatorBase):
+    """
+    Indicator of trade bars.
+    """
+    def parse_input(self, bar):
+        return bar.EndTime, bar
+
+
+class Window:
+    """
+    Fixed size window with newest first indexing, used by the indicators below.
+    """
+    def __init__(self, size) -> None:
+        self.size = size
+        self.values = deque(maxlen=size)
+
+    def add(self, value):
+        removed = self.values[-1] if len(self.values) == self.size else None
+        self.values.appendleft(value)
+        return removed
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+
+class SimpleMovingAverage(Indicator):
+    def __init__(self, period) -> None:
+        self.period = period
+        super().__init__(period)
+
+    def Reset(self):
+        super().Reset()
+        self.window = Window(self.period)
+        self.sum = 0.0
+
+    def compute(self, time, value):
+        removed = self.window.add(value)
+        self.sum += value - (removed or 0)
+        return self.sum / len(self.window)
+
+
+class WilderMovingAverage(Indicator):
+    def __init__(self, period) -> None:
+        self.period = period
+        super().__init__(period)
+
+    def Reset(self):
+        super().Reset()
+        self.sum = 0.0
+
+    def compute(self, time, value):
+        if self.Samples <= self.period:
+            self.sum += value
+            return self.sum / self.Samples
+        return (self.Current.Value * (self.period - 1) + value) / self.period
+
+
+class ExponentialMovingAverage(Indicator):
+    """
+    Seeded with the simple average of the first `period` values, as LEAN does.
+    """
+    def __init__(self, period, smoothing_factor=None) -> None:
+        self.period = period
+        self.k = smoothing_factor if smoothing_factor is not None else 2 / (period + 1)
+        super().__init__(period)
+
+    def Reset(self):
+        super().Reset()
+        self.sum = 0.0
+
+    def compute(self, time, value):
+        if self.Samples <= self.period:
+            self.sum += value
+            return self.sum / self.Samples
+        return value * self.k + self.Current.Value * (1 - self.k)
+
+class StandardDeviation(Indicator):
+    """
+    Population standard deviation, as in LEAN.
+    """
+    def __init__(self, period) -> None:
+        self.period = period
+        super().__init__(period)
+
+    def Reset(self):
+        super().Reset()
+        self.window = Window(self.period)
+
+    def compute(self, time, value):
+        self.window.add(value)
+        mean = sum(self.window) / len(self.window)
+        return math.sqrt(sum((x - mean) ** 2 for x in self.window) / len(self.window))
+
+
+class Maximum(Indicator):
+    """
+    Ties resolve to the most recent value.
+    """
+    def __init__(self, period) -> None:
+        self.period = period
+        super().__init__(period)
+
+    def Reset(self):
+        super().Reset()
+        self.window = Window(self.period)
+        self.PeriodsSinceMaximum = 0
+
+    def compute(self, time, value):
+        self.window.add(value)
+        self.PeriodsSinceMaximum, extreme = max(enumerate(self.window), key=lambda item: (item[1], -item[0]))
+        return extreme
+
+
+class Minimum(Indicator):
+    def __init__(self, period) -> None:
+        self.period = period
+        super().__init__(period)
+
+    def Reset(self):
+        super().Reset()
+        self.window = Window(self.period)
+        self.PeriodsSinceMinimum = 0
+
+    def compute(self, time, value):
+        self.window.add(value)
+        self.PeriodsSinceMinimum, extreme = min(enumerate(self.window), key=lambda item: (item[1], item[0]))
+        return extreme
+
+
+class RateOfChange(Indicator):
+    def __init__(self, period) -> None:
+        self.period = period
+        super().__init__(period + 1)
+
+    def Reset(self):
+        super().Reset()
+        self.window = Window(self.period + 1)
+
+    def compute(self, time, value):
+        self.window.add(value)
+        oldest = self.window[len(self.window) - 1]
+        return (value - oldest) / oldest if oldest else 0.0
+
+
+class RateOfChangePercent(RateOfChange):
+    def compute(self, time, value):
+        return super().compute(time, value) * 100
+
+
+class AverageTrueRange(BarIndicator):
+    """
+    Smoothed true range. The first bar only seeds the previous close.
+    """
+    def __init__(self, period, moving_average_type=MovingAverageType.Wilders) -> None:
+        self.period = period
+        self.moving_average_type = moving_average_type
+        super().__init__(period + 1)
+
+    def Reset(self):
+        super().Reset()
+        self.previous_close = None
+        if self.moving_average_type == MovingAverageType.Simple:
+            self.smoother = SimpleMovingAverage(self.period)
+        else:
+            self.smoother = WilderMovingAverage(self.period)
+
+    def compute(self, time, bar):
+        previous_close, self.previous_close = self.previous_close, bar.Close
+        if previous_close is None:
+            return 0.0
+        true_range = max(bar.High - bar.Low, abs(bar.High - previous_close), abs(bar.Low - previous_close))
+        self.smoother.Update(bar.EndTime, true_range)
+        return self.smoother.Current.Value
+
+
+class MoneyFlowIndex(BarIndicator):
+    def __init__(self, period) -> None:
+        self.period = period
+        super().__init__(period + 1)
+
+    def Reset(self):
+        super().Reset()
+        self.previous_typical_price = None
+        self.positive = Window(self.period)
+        self.negative = Window(self.period)
+
+    def compute(self, time, bar):
+        typical_price = (bar.High + bar.Low + bar.Close) / 3
+        previous, self.previous_typical_price = self.previous_typical_price, typical_price
+        if previous is None:
+            return 0.0
+        money_flow = typical_price * bar.Volume
+        self.positive.add(money_flow if typical_price > previous else 0.0)
+        self.negative.add(money_flow if typical_price < previous else 0.0)
+        total = sum(self.positive) + sum(self.negative)
+        return 100 * sum(self.positive) / total if total else 100.0
+
+
+class RelativeStrengthIndex(Indicator):
+    """
+    Wilder's RSI by default. The first value only seeds the previous value.
+    """
+    def __init__(self, period, moving_average_type=MovingAverageType.Wilders) -> None:
+        self.period = period
+        self.moving_average_type = moving_average_type
+        super().__init__(period + 1)
+
+    def Reset(self):
+        super().Reset()
+        self.previous = None
+        average = SimpleMovingAverage if self.moving_average_type == MovingAverageType.Simple else WilderMovingAverage
+        self.AverageGain = average(self.period)
+        self.AverageLoss = average(self.period)
+
+    def compute(self, time, value):
+        previous, self.previous = self.previous, value
+        if previous is None:
+            return 0.0
+        self.AverageGain.Update(time, max(value - previous, 0.0))
+        self.AverageLoss.Update(time, max(previous - value, 0.0))
+        if self.AverageLoss.Current.Value == 0:
+            return 100.0
+        relative_strength = self.AverageGain.Current.Value / self.AverageLoss.Current.Value
+        return 100 - 100 / (1 + relative_strength)
+
+
+class AverageDirectionalIndex(BarIndicator):
+    """
+    Wilder's ADX: the Wilder average of the directional movement index, from Wilder smoothed
+    true range and directional movement. The first bar only seeds the previous bar.
+    """
+    def __init__(self, period) -> None:
+        self.period = period
+        super().__init__(period * 2)
+
+    def Reset(self):
+        super().Reset()
+        self.previous = None
+        self.PositiveDirectionalIndex, self.NegativeDirectionalIndex = Band(), Band()
+        # Wilder smoothed sums of true range, +DM and -DM
+        self.smoothed = [0.0, 0.0, 0.0]
+        self.smoothed_samples = 0
+        self.average = WilderMovingAverage(self.period)
+
+    def compute(self, time, bar):
+        previous, self.previous = self.previous, bar
+        if previous is None:
+            return 0.0
+        true_range = max(bar.High - bar.Low, abs(bar.High - previous.Close), abs(bar.Low - previous.Close))
+        up, down = bar.High - previous.High, previous.Low - bar.Low
+        movements = (true_range, up if up > down and up > 0 else 0.0, down if down > up and down > 0 else 0.0)
+        self.smoothed_samples += 1
+        for i, movement in enumerate(movements):
+            if self.smoothed_samples <= self.period:
+                self.smoothed[i] += movement
+            else:
+                self.smoothed[i] += movement - self.smoothed[i] / self.period
+        if self.smoothed_samples < self.period:
+            return 0.0
+        true_range, positive, negative = self.smoothed
+        positive_index = 100 * positive / true_range if true_range else 0.0
+        negative_index = 100 * negative / true_range if true_range else 0.0
+        self.PositiveDirectionalIndex.set(bar.EndTime, positive_index)
+        self.NegativeDirectionalIndex.set(bar.EndTime, negative_index)
+        total = positive_index + negative_index
+        self.average.Update(bar.EndTime, 100 * abs(positive_index - negative_index) / total if total else 0.0)
+        return self.average.Current.Value
+
+class Band:
+    """
+    Sub indicator exposing one line of a channel, e.g. `bollinger.UpperBand.Current.Value`.
+    """
+    def __init__(self) -> None:
+        self.Current = IndicatorDataPoint()
+
+    def set(self, time, value):
+        self.Current = IndicatorDataPoint(time, float(value))
+
+
+class BollingerBands(Indicator):
+    def __init__(self, period, k, moving_average_type=MovingAverageType.Simple) -> None:
+        self.period = period
+        self.k = k
+        super().__init__(period)
+
+    def Reset(self):
+        super().Reset()
+        self.MiddleBand, self.UpperBand, self.LowerBand = Band(), Band(), Band()
+        self.average = SimpleMovingAverage(self.period)
+        self.StandardDeviation = StandardDeviation(self.period)
+
+    def compute(self, time, value):
+        self.average.Update(time, value)
+        self.StandardDeviation.Update(time, value)
+        middle, deviation = self.average.Current.Value, self.StandardDeviation.Current.Value
+        self.MiddleBand.set(time, middle)
+        self.UpperBand.set(time, middle + self.k * deviation)
+        self.LowerBand.set(time, middle - self.k * deviation)
+        return middle
+
+
+class KeltnerChannels(BarIndicator):
+    def __init__(self, period, k, moving_average_type=MovingAverageType.Simple) -> None:
+        self.period = period
+        self.k = k
+        self.moving_average_type = moving_average_type
+        super().__init__(period + 1)
+
+    def Reset(self):
+        super().Reset()
+        self.MiddleBand, self.UpperBand, self.LowerBand = Band(), Band(), Band()
+        self.average = SimpleMovingAverage(self.period)
+        self.AverageTrueRange = AverageTrueRange(self.period, self.moving_average_type)
+
+    def compute(self, time, bar):
+        self.average.Update(bar.EndTime, bar.Close)
+        self.AverageTrueRange.Update(bar)
+        middle, atr = self.average.Current.Value, self.AverageTrueRange.Current.Value
+        self.MiddleBand.set(bar.EndTime, middle)
+        self.UpperBand.set(bar.EndTime, middle + self.k * atr)
+        self.LowerBand.set(bar.EndTime, middle - self.k * atr)
+        return middle
+
+
+class DonchianChannel(BarIndicator):
+    def __init__(self, upper_period, lower_period=None) -> None:
+        self.upper_period = upper_period
+        self.lower_period = lower_period or upper_period
+        super().__init__(max(self.upper_period, self.lower_period))
+
+    def Reset(self):
+        super().Reset()
+        self.UpperBand = Maximum(self.upper_period)
+        self.LowerBand = Minimum(self.lower_period)
+
+    def compute(self, time, bar):
+        self.UpperBand.Update(bar.EndTime, bar.High)
+        self.LowerBand.Update(bar.EndTime, bar.Low)
+        return (self.UpperBand.Current.Value + self.LowerBand.Current.Value) / 2
+
+
+class SharpeRatio(Indicator):
+    """
+    Mean over standard deviation of one bar returns across `period` bars.
+    """
+    def __init__(self, period, risk_free_rate=0.0) -> None:
+        self.period = period
+        self.risk_free_rate = risk_free_rate
+        super().__init__(period + 1)
+
+    def Reset(self):
+        super().Reset()
+        self.returns = RateOfChange(1)
+        self.average = SimpleMovingAverage(self.period)
+        self.deviation = StandardDeviation(self.period)
+
+    def compute(self, time, value):
+        self.returns.Update(time, value)
+        if not self.returns.IsReady:
+            return 0.0
+        self.average.Update(time, self.returns.Current.Value)
+        self.deviation.Update(time, self.returns.Current.Value)
+        deviation = self.deviation.Current.Value
+        return (self.average.Current.Value - self.risk_free_rate) / deviation if deviation else 0.0
+
+
+class RollingWindow:
+    """
+    Newest first window. `RollingWindow[float](2)` works as in LEAN, the type is ignored.
+    """
+    def __class_getitem__(cls, item):
+        return cls
+
+    def __init__(self, size) -> None:
+        self.window = Window(size)
+        self.Samples = 0
+
+    def Add(self, value):
+        self.Samples += 1
+        self.window.add(value)
+
+    def Reset(self):
+        self.window = Window(self.Size)
+        self.Samples = 0
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self.window):
+            raise IndexError(f"index {index} out of range for window with {len(self.window)} values")
+        return self.window[index]
+
+    def __len__(self):
+        return len(self.window)
+
+    def __iter__(self):
+        return iter(self.window)
+
+    @property
+    def Count(self):
+        return len(self.window)
+
+    @property
+    def Size(self):
+        return self.window.size
+
+    @property
+    def IsReady(self):
+        return len(self.window) == self.window.size
@@ -0,0 +1,192 @@
+from datetime import timedelta
+
+
+class Symbol:
+    """
+    Ticker based stand-in for LEAN's Symbol. Compares equal to its ticker string.
+    """
+    __slots__ = ('Value', 'ID')
+
+    def __init__(self, ticker) -> None:
+        self.Value = ticker
+        self.ID = ticker
+
+    @staticmethod
+    def Create(ticker, *args):
+        return Symbol(ticker)
+
+    def __eq__(self, other):
+        if isinstance(other, Symbol):
+            return self.Value == other.Value
+        return self.Value == other
+
+    def __hash__(self):
+        return hash(self.Value)
+
+    def __lt__(self, other):
+        return str(self) < str(other)
+
+    def __str__(self) -> str:
+        return self.Value
+
+    def __repr__(self) -> str:
+        return self.Value
+
+
+class TradeBar:
+    __slots__ = ('Time', 'EndTime', 'Period', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume')
+
+    def __init__(self, time, symbol, open, high, low, close, volume, period=timedelta(1)) -> None:
+        self.Time = time
+        self.Period = period
+        self.EndTime = time + period
+        self.Symbol = symbol
+        self.Open = open
+        self.High = high
+        self.Low = low
+        self.Close = close
+        self.Volume = volume
+
+    @property
+    def Value(self):
+        return self.Close
+
+    @property
+    def Price(self):
+        return self.Close
+
+    def __repr__(self) -> str:
+        return f"{self.Symbol} {self.EndTime} O:{self.Open} H:{self.High} L:{self.Low} C:{self.Close} V:{self.Volume}"
+
+
+class DataDictionary(dict):
+    """
+    dict keyed by Symbol with the .NET dictionary methods strategies call.
+    """
+    def ContainsKey(self, key):
+        return key in self
+
+    @property
+    def Keys(self):
+        return list(self.keys())
+
+    @property
+    def Values(self):
+        return list(self.values())
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class TradeBars(DataDictionary):
+    pass
+
+
+class Slice:
+    def __init__(self, time, bars) -> None:
+        self.Time = time
+        self.Bars = TradeBars(bars)
+
+    def ContainsKey(self, symbol):
+        return symbol in self.Bars
+
+    def __getitem__(self, symbol):
+        return self.Bars[symbol]
+
+    def __contains__(self, symbol):
+        return symbol in self.Bars
+
+    def get(self, symbol, default=None):
+        return self.Bars.get(symbol, default)
+
+    @property
+    def Keys(self):
+        return self.Bars.Keys
+
+    @property
+    def HasData(self):
+        return bool(self.Bars)
+
+
+class Security:
+    def __init__(self, symbol, holdings) -> None:
+        self.Symbol = symbol
+        self.Holdings = holdings
+        self.bar = None
+
+    def update(self, bar):
+        self.bar = bar
+        self.Holdings.Price = bar.Close
+
+    @property
+    def HasData(self):
+        return self.bar is not None
+
+    @property
+    def Price(self):
+        return self.bar.Close if self.bar else 0.0
+
+    @property
+    def Close(self):
+        return self.Price
+
+    @property
+    def Open(self):
+        return self.bar.Open if self.bar else 0.0
+
+    @property
+    def High(self):
+        return self.bar.High if self.bar else 0.0
+
+    @property
+    def Low(self):
+        return self.bar.Low if self.bar else 0.0
+
+    @property
+    def Volume(self):
+        return self.bar.Volume if self.bar else 0.0
+
+    @property
+    def Invested(self):
+        return self.Holdings.Invested
+
+    def __repr__(self) -> str:
+        return f"Security({self.Symbol})"
+
+
+class SecurityManager(DataDictionary):
+    pass
+
+
+class SecurityChanges:
+    def __init__(self, added, removed) -> None:
+        self.AddedSecurities = list(added)
+        self.RemovedSecurities = list(removed)
+
+    def __bool__(self):
+        return bool(self.AddedSecurities or self.RemovedSecurities)
+
+
+class Market:
+    USA = 'usa'
+
+
+class SecurityType:
+    Equity = 'equity'
+
+
+class CoarseFundamental:
+    __slots__ = ('Symbol', 'Price', 'Volume', 'DollarVolume', 'HasFundamentalData', 'Market')
+
+    def __init__(self, symbol, price, volume) -> None:
+        self.Symbol = symbol
+        self.Price = price
+        self.Volume = volume
+        self.DollarVolume = price * volume
+        self.HasFundamentalData = True
+        self.Market = Market.USA
+
+    @property
+    def Value(self):
+        return self.Price
@@ -0,0 +1,173 @@
+import importlib
+import importlib.util
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .data import BarStore
+
+
+def install():
+    """
+    Registers the replay stand-in as the `AlgorithmImports` module.
+    """
+    sys.modules['AlgorithmImports'] = importlib.import_module('replay.AlgorithmImports')
+
+
+def load_algorithm_class(project_dir):
+    """
+    Imports a LEAN project's main.py and returns the QCAlgorithm subclass it defines.
+    Project modules are dropped from sys.modules afterwards so projects sharing module names
+    (indicators, base, ...) can be loaded in the same process.
+
+    :param project_dir: Directory of the LEAN project.
+    """
+    install()
+    from .algorithm import QCAlgorithm
+    project_dir = Path(project_dir).resolve()
+    loaded = set(sys.modules)
+    sys.path.insert(0, str(project_dir))
+    try:
+        name = f"replay_project_{project_dir.name.replace(' ', '_')}"
+        spec = importlib.util.spec_from_file_location(name, project_dir / 'main.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(project_dir))
+        for module_name in set(sys.modules) - loaded:
+            path = getattr(sys.modules[module_name], '__file__', None) or ''
+            if Path(path).parent == project_dir:
+                del sys.modules[module_name]
+    algorithms = [
+        value for value in vars(module).values()
+        if isinstance(value, type) and issubclass(value, QCAlgorithm) and value.__module__ == name
+    ]
+    if not algorithms:
+        raise ValueError(f"no QCAlgorithm subclass found in {project_dir / 'main.py'}")
+    return algorithms[-1]
+
+
+class ReplayResult:
+    """
+    Throughput and latency of a replay, with the algorithm and its order log.
+    """
+    def __init__(self, algorithm, bars, days, seconds, latencies) -> None:
+        self.algorithm = algorithm
+        self.bars = bars
+        self.days = days
+        self.seconds = seconds
+        self.latencies = np.asarray(latencies)
+
+    @property
+    def bars_per_second(self):
+        return self.bars / self.seconds if self.seconds else 0.0
+
+    def latency(self, percentile):
+        """
+        OnData latency in milliseconds at the given percentile.
+        """
+        return float(np.percentile(self.latencies, percentile) * 1000) if len(self.latencies) else 0.0
+
+    @property
+    def orders(self) -> pd.DataFrame:
+        return pd.DataFrame(self.algorithm._broker.orders, columns=[
+            'Time', 'Symbol', 'Price', 'Quantity', 'Type', 'Status', 'Value', 'Tag'
+        ])
+
+    def write_orders(self, path):
+        """
+        Writes the orders in LEAN's order export layout, readable by scripts/analyze_orders.py.
+        """
+        self.orders.to_csv(path, index=False)
+
+    def summary(self) -> str:
+        return (
+            f"{type(self.algorithm).__name__}: {self.days} days, {self.bars} bars in {self.seconds:.2f}s "
+            f"({self.bars_per_second:,.0f} bars/s), OnData p50 {self.latency(50):.3f}ms "
+            f"p95 {self.latency(95):.3f}ms max {self.latency(100):.3f}ms, "
+            f"{len(self.algorithm._broker.orders)} orders, "
+            f"portfolio value {self.algorithm.Portfolio.TotalPortfolioValue:,.2f}"
+        )
+
+
+class ReplayRunner:
+    """
+    Replays daily bars from a BarStore through an algorithm, one Slice per trading day.
+
+    :param algorithm_class: QCAlgorithm subclass, or the directory of a LEAN project.
+    :param store: BarStore, or a directory of bar files.
+    :param start: Optional start date overriding the algorithm's SetStartDate.
+    :param end: Optional end date overriding the algorithm's SetEndDate.
+    :param cash: Optional starting cash overriding the algorithm's SetCash.
+    :param log: Optional callable receiving every Log / Debug message.
+    """
+    def __init__(self, algorithm_class, store, start=None, end=None, cash=None, log=None) -> None:
+        if not isinstance(algorithm_class, type):
+            algorithm_class = load_algorithm_class(algorithm_class)
+        if not isinstance(store, BarStore):
+            store = BarStore.from_directory(store)
+        self.algorithm_class = algorithm_class
+        self.store = store
+        self.start = start
+        self.end = end
+        self.cash = cash
+        self.log = log
+
+    def date_range(self, algorithm):
+        """
+        Returns the store indices of the first warm-up day, the start day and the day after the end.
+        """
+        dates = self.store.dates
+        start = pd.Timestamp(self.start or algorithm.StartDate or dates[0])
+        end = pd.Timestamp(self.end or algorithm.EndDate or dates[-1])
+        start_index = dates.searchsorted(start)
+        end_index = dates.searchsorted(end, side='right')
+        warm_up = algorithm._warm_up
+        if isinstance(warm_up, timedelta):
+            first_index = dates.searchsorted(start - warm_up)
+        else:
+            first_index = max(start_index - (warm_up or 0), 0)
+        return first_index, start_index, end_index
+
+    def run(self) -> ReplayResult:
+        install()
+        algorithm = self.algorithm_class()
+        algorithm._store = self.store
+        algorithm._log_handler = self.log
+        algorithm.Initialize()
+        if self.cash is not None:
+            algorithm.SetCash(self.cash)
+        first_index, start_index, end_index = self.date_range(algorithm)
+        bars = 0
+        latencies = []
+        started = time.perf_counter()
+        for i in range(first_index, end_index):
+            date = self.store.dates[i].to_pydatetime()
+            algorithm.IsWarmingUp = i < start_index
+            if i == start_index and first_index < start_index and hasattr(algorithm, 'OnWarmupFinished'):
+                algorithm.OnWarmupFinished()
+            algorithm.Time = date
+            algorithm._select_universe(i, date)
+            data = algorithm._slice(i, date)
+            algorithm.Time = data.Time
+            algorithm._process_bars(data)
+            if not data.HasData:
+                continue
+            bars += data.Bars.Count
+            on_data_started = time.perf_counter()
+            algorithm.OnData(data)
+            latencies.append(time.perf_counter() - on_data_started)
+        if hasattr(algorithm, 'OnEndOfAlgorithm'):
+            algorithm.OnEndOfAlgorithm()
+        return ReplayResult(algorithm, bars, end_index - first_index, time.perf_counter() - started, latencies)
+
+
+def run(algorithm_class, store, **kwargs) -> ReplayResult:
+    """
+    Shortcut for `ReplayRunner(algorithm_class, store, **kwargs).run()`.
+    """
+    return ReplayRunner(algorithm_class, store, **kwargs).run()
@@ -1,97 +1,839 @@
+import argparse
 import csv
-import datetime
+import hashlib
+import json
 import os
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 
-@dataclass
-class Position:
-    start: datetime.datetime
-    end: Optional[datetime.datetime]
-    symbol: str
-    price: float
-    size: float
-    value: float
-    quantity_sold: float
-    value_sold: float
-
-    @property
-    def liquidated(self) -> bool:
-        return self.size == self.quantity_sold
-
-    def sell(self, data: pd.Series) -> None:
-        self.quantity_sold += (data.Quantity * -1)
-        self.value_sold += (data.Value * -1)
-
-    def add(self, data: pd.Series) -> None:
-        self.value += data.Value
-        self.size += data.Quantity
-        self.price = self.value / self.size
-
-    @property
-    def profit(self) -> float:
-        return self.value_sold - self.value
-
-    @property
-    def profit_pc(self) -> float:
-        return (self.profit / self.value_sold) * 100 if self.value_sold else 0
-
-    @property
-    def days(self) -> Optional[int]:
-        return (self.end - self.start).days if self.end else "-"
-
-    def close(self, data: pd.Series) -> None:
-        self.end = data.Time
-
-    def get_values(self, names: list[str]):
-        return [getattr(self, name) for name in names]
-
-
-def analyze_orders() -> None:
-    folder_path = Path(Path().absolute(), 'backtest_reports')
-    files = os.listdir(folder_path)
-    for filename in files:
-        name, ending = filename.split(".")
-        if ending == 'csv' and '_analyzed' not in name:
-            orders = pd.read_csv(Path(folder_path, filename), on_bad_lines='skip')
-            orders['Time'] = pd.to_datetime(orders['Time'])
-            open_positions: dict[str, Position] = {}
-            closed_positions: list[Position] = []
-            for index, data in orders[orders.Status == 'Filled'].iterrows():
-                if data.Quantity < 0:
-                    open_positions[data.Symbol].sell(data)
-                    if open_positions[data.Symbol].liquidated:
-                        open_positions[data.Symbol].close(data)
-                        closed_positions.append(open_positions.pop(data.Symbol))
-                else:
-                    if data.Symbol not in open_positions:
-                        open_positions[data.Symbol] = Position(
-                            start=data.Time,
-                            end=None,
-                            symbol=data.Symbol,
-                            price=data.Price,
-                            size=data.Quantity,
-                            value=data.Value,
-                            quantity_sold=0,
-                            value_sold=0,
-                        )
-                    else:
-                        open_positions[data.Symbol].add(data)
-            positions = [*closed_positions, *open_positions.values()]
-            if not positions:
-                continue
-            with open(Path(folder_path, f"{name}_analyzed.csv"), 'w', encoding='UTF8', newline='') as f:
-                writer = csv.writer(f)
-                headers = ['start', 'end', 'symbol', 'price', 'size', 'value', 'quantity_sold', 'value_sold', 'profit', 'profit_pc', 'days']
-                writer.writerow(headers)
-                position: Position
-                for position in positions:
-                    writer.writerow(position.get_values(headers))
+# fractional (crypto) quantities count as zero within this, rather than needing exactly equal float sums
+QUANTITY_TOLERANCE = 1e-8
+SUMMARY_FILENAME = 'reports_summary.csv'
+MANIFEST_FILENAME = 'reports_manifest.json'
+# changing the analysis output invalidates the manifest entries of older versions
+ANALYZER_VERSION = 4
+# LEAN's order export names its time column Time, older exports Date Time
+TIME_COLUMNS = ('Time', 'Date Time')
+HEADERS = ['start', 'end', 'symbol', 'price', 'size', 'value', 'quantity_sold', 'value_sold', 'profit', 'profit_pc', 'days', 'realized_profit']
+TRADE_HEADERS = ['start', 'end', 'symbol', 'entry', 'exit', 'size']
+# rows read at a time when streaming an export
+STREAM_CHUNKSIZE = 100_000
+
+
+def read_orders(path: Path, chunksize: Optional[int] = None):
+    """
+    Reads an order export of either LEAN format, the current one with a Time column or the older
+    one with Date Time, into Time, Symbol, Price, Quantity, Status and Value columns.
+    Exports without Value or Status columns get Price * Quantity and Filled.
+
+    :param chunksize: Reads this many rows at a time, giving an iterator of DataFrames.
+    """
+    columns = pd.read_csv(path, nrows=0).columns
+    time_column = next((column for column in TIME_COLUMNS if column in columns), None)
+    if time_column is None:
+        raise ValueError(f"{path} has none of the {TIME_COLUMNS} columns of an order export")
+
+    def normalize(orders: pd.DataFrame) -> pd.DataFrame:
+        orders = orders.rename(columns={time_column: 'Time'})
+        orders['Time'] = pd.to_datetime(orders['Time'])
+        if 'Value' not in orders:
+            orders['Value'] = orders.Price * orders.Quantity
+        if 'Status' not in orders:
+            orders['Status'] = 'Filled'
+        return orders
+
+    orders = pd.read_csv(path, on_bad_lines='skip', chunksize=chunksize)
+    return (normalize(chunk) for chunk in orders) if chunksize else normalize(orders)
+
+
+def accumulate_runs(values, starts, lengths, start=None, sums=None):
+    """
+    Adds up runs of consecutive values one at a time in order, so each total is exactly what a row by row
+    loop would reach. The longest runs are added up one run at a time with np.cumsum, the rest a value at
+    a time for all of them at once, splitting the runs where that takes the fewest Python iterations.
+
+    :param values: Array of values.
+    :param starts: Index of the first value of each run.
+    :param lengths: Number of values in each run.
+    :param start: Optional array of the total each run starts from, zero by default.
+    :param sums: Optional array set to each value's run total up to and including it.
+    :return: The total of each run.
+    """
+    if start is None:
+        totals = np.zeros(len(starts), dtype=values.dtype)
+    else:
+        totals = start.astype(np.result_type(values, start))
+    # longest runs first, so the runs still adding their k-th value are a prefix
+    order = np.argsort(-lengths, kind='stable')
+    starts, lengths = starts[order], lengths[order]
+    # the runs before split take one iteration each, the rest as many as the longest of them
+    split = int(np.argmin(np.arange(len(lengths) + 1) + np.r_[lengths, 0]))
+    for run, start, length in zip(order[:split].tolist(), starts[:split].tolist(), lengths[:split].tolist()):
+        # continuing a total adds the values to it in the same order
+        run_sums = np.cumsum(np.r_[totals[run], values[start:start + length]])[1:]
+        if sums is not None:
+            sums[start:start + length] = run_sums
+        totals[run] = run_sums[-1]
+    for k in range(lengths[split] if split < len(lengths) else 0):
+        end = np.searchsorted(-lengths, -k, side='left')
+        runs = order[split:end]
+        rows = starts[split:end] + k
+        totals[runs] += values[rows]
+        if sums is not None:
+            sums[rows] = totals[runs]
+    return totals
+
+
+def running_sums(values, starts, lengths, start=None):
+    """
+    Running totals of runs of consecutive values, see accumulate_runs.
+
+    :return: Each value's run total up to and including it.
+    """
+    sums = np.zeros(len(values), dtype=values.dtype if start is None else np.result_type(values, start))
+    accumulate_runs(values, starts, lengths, start, sums)
+    return sums
+
+
+def running_totals(values, starts, lengths, start=None):
+    """
+    The totals of runs of consecutive values, as running_sums reaches them.
+    """
+    return accumulate_runs(values, starts, lengths, start)
+
+
+def symbol_sums(codes, values, start=None):
+    """
+    Each symbol's running total of its values, added one at a time in order as a row by row loop would.
+    Unlike pandas' grouped cumsum, which compensates rounding and so can differ in the last bits.
+
+    :param codes: Symbol code of each value.
+    :param start: Optional array of the total each symbol code starts from, zero by default.
+    :return: The symbol's running total after each value, and before it.
+    """
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    parts = np.split(values[order], starts[1:])
+    if start is not None:
+        # continuing a total adds the values to it in the same order
+        parts = [np.cumsum(np.r_[total, part])[1:] for total, part in zip(start[sorted_codes[starts]], parts)]
+        after = np.concatenate(parts)
+        before = np.r_[0, after[:-1]]
+        before[starts] = start[sorted_codes[starts]]
+    else:
+        after = np.concatenate([np.cumsum(part) for part in parts])
+        before = np.r_[0, after[:-1]]
+        before[starts] = 0
+    totals, previous = np.empty_like(after), np.empty_like(after)
+    totals[order], previous[order] = after, before
+    return totals, previous
+
+
+def split_reversals(codes, quantity, value, start=None):
+    """
+    Splits the fills which take a position through zero to the other side into a fill closing it
+    and a fill opening the new one, with the value split in proportion to quantity.
+
+    :param codes: Symbol code of each fill.
+    :param start: Optional array of each symbol code's net quantity before the fills.
+    :return: The index of the order each fill came from, and the fills' quantities, values and
+        symbol net quantities after them, zero after a fill closing a reversed position.
+    """
+    net, before = symbol_sums(codes, quantity, start)
+    reversals = (np.abs(before) >= QUANTITY_TOLERANCE) & (np.abs(net) >= QUANTITY_TOLERANCE) & ((before > 0) != (net > 0))
+    if not reversals.any():
+        return np.arange(len(quantity)), quantity, value, net
+    orders = np.repeat(np.arange(len(quantity)), 1 + reversals)
+    opening = np.r_[False, orders[1:] == orders[:-1]]
+    closing = np.r_[opening[1:], False]
+    quantity, value, before, net = quantity[orders], value[orders], before[orders], net[orders]
+    closing_quantity = -before[closing]
+    closing_value = value[closing] * closing_quantity / quantity[closing]
+    quantity[opening] = quantity[opening] + before[opening]
+    value[opening] = value[opening] - closing_value
+    quantity[closing] = closing_quantity
+    value[closing] = closing_value
+    net[closing] = 0
+    return orders, quantity, value, net
+
+
+def order_fills(orders: pd.DataFrame, nets: Optional[dict] = None) -> dict:
+    """
+    The filled orders as fills, with reversals split, see split_reversals.
+
+    :param orders: Time ordered orders, see read_orders.
+    :param nets: Optional dict of each symbol's net quantity before the orders, updated to after them,
+        for orders read in chunks.
+    :return: dict of the fills' symbol, time, price, quantity, value and symbol net quantity after them.
+    """
+    filled = orders[orders.Status == 'Filled']
+    symbols = filled.Symbol.to_numpy()
+    if filled.empty:
+        fills, quantity, value, net = np.array([], dtype=int), filled.Quantity.to_numpy(), filled.Value.to_numpy(), np.zeros(0)
+    else:
+        codes, uniques = pd.factorize(symbols)
+        start = None if nets is None else np.array([nets.get(symbol, 0) for symbol in uniques])
+        fills, quantity, value, net = split_reversals(codes, filled.Quantity.to_numpy(), filled.Value.to_numpy(), start)
+        if nets is not None:
+            # the last fill of a symbol is never the closing half of a reversal, its net is the symbol's
+            last = np.full(len(uniques), -1)
+            last[codes[fills]] = np.arange(len(fills))
+            nets.update(zip(uniques, net[last].tolist()))
+    return {
+        'symbol': symbols[fills],
+        'time': filled.Time.iloc[fills].reset_index(drop=True),
+        'price': filled.Price.to_numpy()[fills],
+        'quantity': quantity,
+        'value': value,
+        'net': net,
+    }
+
+
+def take_columns(columns: dict, index) -> dict:
+    return {name: values.iloc[index].reset_index(drop=True) if isinstance(values, pd.Series) else values[index] for name, values in columns.items()}
+
+
+def concat_columns(first: dict, second: dict) -> dict:
+    return {
+        name: pd.concat([values, second[name]], ignore_index=True) if isinstance(values, pd.Series) else np.concatenate([values, second[name]])
+        for name, values in first.items()
+    }
+
+
+def position_runs(fills: dict, carried: Optional[dict] = None) -> Optional[dict]:
+    """
+    Groups fills into positions with column operations.
+    A symbol's position opens with a fill on either side, grows with fills on the same side (entries)
+    and is reduced by fills on the other (exits), closing when the symbol's net quantity returns to zero.
+    Each position is a contiguous run once the fills are sorted by symbol and position.
+
+    :param fills: Time ordered fills, see order_fills.
+    :param carried: Optional positions open before the fills, see carry_positions, for fills read in
+        chunks. A symbol's first run continues its carried position.
+    :return: None without fills, else a dict of rows, the fills in run order; first and lengths,
+        each run's first row and number of rows; short and closed, whether each run is a short
+        and a closed position; carried, the index of the carried position each run continues, -1
+        for new ones; and entry, whether each row is an entry.
+    """
+    quantity, net = fills['quantity'], fills['net']
+    if not len(quantity):
+        return None
+    codes, _ = pd.factorize(fills['symbol'])
+    closing = (np.abs(net) < QUANTITY_TOLERANCE) & (np.abs(quantity) >= QUANTITY_TOLERANCE)
+    # positions of each symbol closed before the fill
+    position = pd.Series(closing).groupby(codes, sort=False).cumsum().to_numpy() - closing
+    rows = np.lexsort((np.arange(len(codes)), position, codes))
+    first = np.flatnonzero(np.r_[True, (codes[rows][1:] != codes[rows][:-1]) | (position[rows][1:] != position[rows][:-1])])
+    lengths = np.diff(np.r_[first, len(rows)])
+    short = quantity[rows[first]] < 0
+    continues = np.full(len(first), -1)
+    if carried is not None and len(carried['closed']):
+        carried_symbols = dict(zip(carried['symbol'].tolist(), range(len(carried['closed']))))
+        run_codes = codes[rows[first]]
+        symbol_first = np.flatnonzero(np.r_[True, run_codes[1:] != run_codes[:-1]])
+        continues[symbol_first] = [carried_symbols.get(symbol, -1) for symbol in fills['symbol'][rows[first[symbol_first]]].tolist()]
+        continued = continues >= 0
+        # a continued position's side is its carried one, its first fill here may be an exit
+        short[continued] = carried['short'][continues[continued]]
+    return {
+        'rows': rows,
+        'first': first,
+        'lengths': lengths,
+        'short': short,
+        'closed': closing[rows[first + lengths - 1]],
+        'carried': continues,
+        'entry': (quantity[rows] < 0) == np.repeat(short, lengths),
+    }
+
+
+def match_lots(fills: dict, runs: dict) -> dict:
+    """
+    Matches the exits of every position to its entries first in first out, with column operations.
+    Each position's entries and exits cover consecutive ranges of its quantity; a lot is a range
+    between two consecutive entry or exit boundaries, with the entry and exit fills covering it.
+
+    :param fills: Time ordered fills, see order_fills.
+    :param runs: Their positions, see position_runs.
+    :return: dict of each lot's run, entry and exit fill and absolute size, ordered by run and then
+        by where the lot falls in the run's quantity. Quantities still open aren't included.
+    """
+    rows, first, lengths, entry = runs['rows'], runs['first'], runs['lengths'], runs['entry']
+    run = np.repeat(np.arange(len(first)), lengths)
+    quantity = np.abs(fills['quantity'][rows])
+    # each entry's and exit's upper boundary in the run's quantity
+    boundary = np.where(
+        entry,
+        running_sums(np.where(entry, quantity, 0), first, lengths),
+        running_sums(np.where(entry, 0, quantity), first, lengths),
+    )
+    entered = np.zeros(len(first))
+    exited = np.zeros(len(first))
+    np.maximum.at(entered, run[entry], boundary[entry])
+    np.maximum.at(exited, run[~entry], boundary[~entry])
+    matched = np.minimum(entered, exited)
+    points = np.r_[np.minimum(boundary, matched[run]), np.zeros(len(first))]
+    point_runs = np.r_[run, np.arange(len(first))]
+    is_entry = np.r_[entry, np.zeros(len(first), dtype=bool)]
+    is_exit = np.r_[~entry, np.zeros(len(first), dtype=bool)]
+    order = np.lexsort((points, point_runs))
+    points, point_runs, is_entry, is_exit = points[order], point_runs[order], is_entry[order], is_exit[order]
+    # entries and exits ending at or before each point index its lot's entry and exit within the run
+    run_starts = np.searchsorted(point_runs, point_runs, side='left')
+    entry_index = np.cumsum(is_entry)
+    exit_index = np.cumsum(is_exit)
+    entry_index = entry_index - np.r_[0, entry_index][run_starts]
+    exit_index = exit_index - np.r_[0, exit_index][run_starts]
+    sizes = np.r_[points[1:] - points[:-1], 0]
+    lot = (np.r_[point_runs[1:] == point_runs[:-1], False]) & (sizes >= QUANTITY_TOLERANCE)
+    lot_runs = point_runs[lot]
+    entry_rows = np.flatnonzero(entry)
+    exit_rows = np.flatnonzero(~entry)
+    # first entry and exit of each run among the entries and exits
+    entry_offset = np.searchsorted(run[entry_rows], np.arange(len(first)))
+    exit_offset = np.searchsorted(run[exit_rows], np.arange(len(first)))
+    return {
+        'run': lot_runs,
+        'entry': rows[entry_rows[entry_offset[lot_runs] + entry_index[lot]]],
+        'exit': rows[exit_rows[exit_offset[lot_runs] + exit_index[lot]]],
+        'size': sizes[lot],
+    }
+
+
+def position_totals(fills: dict, runs: dict, carried: Optional[dict] = None, offset: int = 0) -> dict:
+    """
+    Adds up each position's fills, continuing the totals of the carried positions runs continue.
+    The cost of an open position's exits is the value of the entries they used up first in first out,
+    found from the entries' running quantity and value rather than lot by lot, so continuing a position
+    only takes its totals and the entries it hasn't used up.
+
+    :param fills: Time ordered fills, see order_fills.
+    :param runs: Their positions, see position_runs.
+    :param carried: Optional positions open before the fills, see carry_positions.
+    :param offset: Number of fills before these, so fills are numbered across chunks.
+    :return: dict of each position's symbol, short, closed, start and end time and fill number, first
+        price, number of entries and exits, size, value, quantity_sold, value_sold and cost_sold, the
+        cost of an open position's exits; and lots, the entries open positions haven't used up, a dict
+        of their position, quantity and value, and the quantity and value entered before them.
+    """
+    rows, first, lengths, entry, closed = runs['rows'], runs['first'], runs['lengths'], runs['entry'], runs['closed']
+    count = len(first)
+    run = np.repeat(np.arange(count), lengths)
+    quantity, value = fills['quantity'][rows], fills['value'][rows]
+    continues = runs['carried']
+    continued = np.flatnonzero(continues >= 0)
+    # continued runs take their starting values from the carried positions
+    sources = np.arange(count)
+    sources[continued] = count + np.arange(len(continued))
+
+    def continuing(name, values):
+        if not len(continued):
+            return values
+        if isinstance(values, pd.Series):
+            return pd.concat([values, carried[name].iloc[continues[continued]]], ignore_index=True).iloc[sources].reset_index(drop=True)
+        return np.concatenate([values, carried[name][continues[continued]]])[sources]
+
+    size_start = continuing('size', np.zeros(count, dtype=quantity.dtype))
+    value_start = continuing('value', np.zeros(count, dtype=value.dtype))
+    size = running_totals(np.where(entry, quantity, 0), first, lengths, size_start)
+    entry_value = running_totals(np.where(entry, value, 0), first, lengths, value_start)
+    quantity_sold = running_totals(np.where(entry, 0, quantity * -1), first, lengths, continuing('quantity_sold', np.zeros(count, dtype=quantity.dtype)))
+    value_sold = running_totals(np.where(entry, 0, value * -1), first, lengths, continuing('value_sold', np.zeros(count, dtype=value.dtype)))
+    new_entries = running_totals(entry.astype(int), first, lengths)
+    entries = continuing('entries', np.zeros(count, dtype=int)) + new_entries
+    exits = continuing('exits', np.zeros(count, dtype=int)) + lengths - new_entries
+
+    # open positions' entries, with the quantity and value entered before each
+    opening = np.flatnonzero(entry & ~closed[run])
+    opening_runs = run[opening]
+    opening_lengths = np.bincount(opening_runs, minlength=count)
+    opening_first = np.r_[0, np.cumsum(opening_lengths)[:-1]]
+    opening_quantity = np.abs(quantity[opening])
+    # a position's entries are on one side, so its size's absolute value is their quantity exactly
+    entered_start = np.abs(size_start)
+    entered = running_sums(opening_quantity, opening_first, opening_lengths, entered_start)
+    entered_value = running_sums(value[opening], opening_first, opening_lengths, value_start)
+    has_entries = np.flatnonzero(opening_lengths)
+    entered, entered_value = np.r_[entered[:1], entered[:-1]], np.r_[entered_value[:1], entered_value[:-1]]
+    entered[opening_first[has_entries]] = entered_start[has_entries]
+    entered_value[opening_first[has_entries]] = value_start[has_entries]
+    lots = {'position': opening_runs, 'quantity': opening_quantity, 'value': value[opening], 'entered': entered, 'entered_value': entered_value}
+    if len(continued):
+        # the entries continued open positions carried over come before their new ones
+        carried_lots = carried['lots']
+        carried_runs = np.full(len(carried['closed']), -1)
+        carried_runs[continues[continued]] = continued
+        lot_runs = carried_runs[carried_lots['position']]
+        kept = lot_runs >= 0
+        kept[kept] = ~closed[lot_runs[kept]]
+        lots = concat_columns({**take_columns(carried_lots, kept), 'position': lot_runs[kept]}, lots)
+        lots = take_columns(lots, np.argsort(lots['position'], kind='stable'))
+
+    exited = np.abs(quantity_sold)
+    used = lots['entered'] + lots['quantity'] <= exited[lots['position']]
+    cost_sold = np.zeros(count)
+    selling = np.flatnonzero(~closed & (exits > 0))
+    if len(selling):
+        position = lots['position']
+        # the first entry of each position not used up is partly sold
+        partly = np.searchsorted(position, selling) + np.bincount(position[used], minlength=count)[selling]
+        partly = np.minimum(partly, np.searchsorted(position, selling, side='right') - 1)
+        sold_fraction = (exited[selling] - lots['entered'][partly]) / lots['quantity'][partly]
+        cost_sold[selling] = lots['entered_value'][partly] + lots['value'][partly] * sold_fraction
+
+    start_rows = rows[first]
+    end_rows = rows[first + lengths - 1]
+    time = fills['time']
+    return {
+        'symbol': fills['symbol'][start_rows],
+        'short': runs['short'],
+        'closed': closed,
+        'start': continuing('start', time.iloc[start_rows].reset_index(drop=True)),
+        'end': time.iloc[end_rows].reset_index(drop=True),
+        'start_fill': continuing('start_fill', offset + start_rows),
+        'end_fill': offset + end_rows,
+        'price': continuing('price', fills['price'][start_rows]),
+        'entries': entries,
+        'exits': exits,
+        'size': size,
+        'value': entry_value,
+        'quantity_sold': quantity_sold,
+        'value_sold': value_sold,
+        'cost_sold': cost_sold,
+        'lots': take_columns(lots, ~used),
+    }
+
+
+def take_positions(positions: dict, index) -> dict:
+    """
+    The positions at `index` of a position_totals dict, with their lots.
+    """
+    lots = positions['lots']
+    numbers = np.full(len(positions['closed']), -1)
+    numbers[index] = np.arange(len(index))
+    kept = numbers[lots['position']] >= 0
+    taken = take_columns({name: values for name, values in positions.items() if name != 'lots'}, index)
+    taken['lots'] = {**take_columns(lots, kept), 'position': numbers[lots['position'][kept]]}
+    return taken
+
+
+def concat_positions(first: dict, second: dict) -> dict:
+    lots = concat_columns(first['lots'], {**second['lots'], 'position': second['lots']['position'] + len(first['closed'])})
+    positions = concat_columns(
+        {name: values for name, values in first.items() if name != 'lots'},
+        {name: values for name, values in second.items() if name != 'lots'},
+    )
+    positions['lots'] = lots
+    return positions
+
+
+def carry_positions(positions: dict, carried: Optional[dict], continues) -> dict:
+    """
+    The positions open after a chunk of fills, as a later chunk continues them: the chunk's open
+    positions and the carried positions it had no fills for, each only its totals and the entries
+    it hasn't used up.
+
+    :param positions: The chunk's positions, see position_totals.
+    :param carried: Optional positions open before the chunk.
+    :param continues: Index of the carried position each run continued, see position_runs.
+    """
+    positions = take_positions(positions, np.flatnonzero(~positions['closed']))
+    if carried is None:
+        return positions
+    untouched = np.ones(len(carried['closed']), dtype=bool)
+    untouched[continues[continues >= 0]] = False
+    return concat_positions(take_positions(carried, np.flatnonzero(untouched)), positions)
+
+
+def position_rows(positions: dict, selected) -> list:
+    """
+    The HEADERS rows of positions. Sizes and values are negative for short positions.
+    A position's profit is its exits' value less its entries', for an open one too. Its realized
+    profit is its exits' value less the cost of the entries they used up, which for a closed
+    position is its profit.
+
+    :param positions: See position_totals.
+    :param selected: Mask of the positions to give rows for.
+    :return: Rows of HEADERS values, the closed positions in closing order, then the open ones.
+    """
+    closed = positions['closed']
+    closed_runs = np.flatnonzero(selected & closed)
+    open_runs = np.flatnonzero(selected & ~closed)
+    order = np.r_[closed_runs[np.argsort(positions['end_fill'][closed_runs])], open_runs[np.argsort(positions['start_fill'][open_runs])]]
+    entries, exits, size, value = (positions[name][order] for name in ('entries', 'exits', 'size', 'value'))
+    price = np.where(entries > 1, value / np.where(entries > 1, size, 1), positions['price'][order])
+    start_times = positions['start'].iloc[order].reset_index(drop=True)
+    end_times = positions['end'].iloc[order].reset_index(drop=True)
+    sold = np.where(exits > 0, positions['value_sold'][order], 0)
+    profit = sold - value
+    realized_profit = np.where(closed[order], profit, sold - positions['cost_sold'][order])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_pc = (profit / np.abs(sold)) * 100
+    columns = zip(
+        start_times.tolist(),
+        end_times.tolist(),
+        closed[order].tolist(),
+        (exits > 0).tolist(),
+        positions['symbol'][order].tolist(),
+        price.tolist(),
+        size.tolist(),
+        value.tolist(),
+        positions['quantity_sold'][order].tolist(),
+        sold.tolist(),
+        profit.tolist(),
+        profit_pc.tolist(),
+        (end_times - start_times).dt.days.tolist(),
+        realized_profit.tolist(),
+    )
+    rows = []
+    # sales totals and profit % are 0 (not 0.0) without sales, as the row by row analysis wrote them
+    for start, end, is_closed, has_sales, symbol, price, size, value, quantity_sold, sold, profit, profit_pc, days, realized_profit in columns:
+        rows.append([
+            start,
+            end if is_closed else None,
+            symbol,
+            price,
+            size,
+            value,
+            quantity_sold if has_sales else 0,
+            sold if has_sales else 0,
+            profit,
+            profit_pc if sold else 0,
+            days if is_closed else "-",
+            realized_profit,
+        ])
+    return rows
+
+
+def analyze(orders: pd.DataFrame) -> list:
+    """
+    Reconstructs positions from filled orders, see position_runs and position_totals.
+
+    :param orders: Time ordered orders, see read_orders.
+    :return: Rows of HEADERS values, the closed positions in closing order, then the open ones.
+    """
+    fills = order_fills(orders)
+    runs = position_runs(fills)
+    if runs is None:
+        return []
+    return position_rows(position_totals(fills, runs), np.ones(len(runs['first']), dtype=bool))
+
+
+def match_trades(orders: pd.DataFrame) -> list:
+    """
+    The lots of every position, see match_lots.
+
+    :param orders: Time ordered orders, see read_orders.
+    :return: Rows of TRADE_HEADERS values in exit order, sizes negative for shorts. Quantities still
+        open aren't included.
+    """
+    fills = order_fills(orders)
+    runs = position_runs(fills)
+    if runs is None:
+        return []
+    lots = match_lots(fills, runs)
+    entries, exits = lots['entry'], lots['exit']
+    sizes = np.where(runs['short'][lots['run']], -lots['size'], lots['size']).astype(fills['quantity'].dtype)
+    order = np.lexsort((entries, exits))
+    time, price = fills['time'], fills['price']
+    columns = zip(
+        time.iloc[entries[order]].tolist(),
+        time.iloc[exits[order]].tolist(),
+        fills['symbol'][entries[order]].tolist(),
+        price[entries[order]].tolist(),
+        price[exits[order]].tolist(),
+        sizes[order].tolist(),
+    )
+    return [list(trade) for trade in columns]
+
+
+def stream_positions(path: Path, chunksize: int = STREAM_CHUNKSIZE):
+    """
+    Reconstructs positions as `analyze` does from an order export read `chunksize` rows at a time,
+    so memory is bounded by the chunk and the open positions rather than the file size.
+    Positions still open at the end of a chunk are carried over to the next one as their totals
+    and the entries they haven't used up, see carry_positions.
+
+    :return: Generator of rows of HEADERS values, the closed positions as they close, then the open ones.
+    """
+    nets = {}
+    carried = None
+    offset = 0
+    for orders in read_orders(path, chunksize):
+        fills = order_fills(orders, nets)
+        runs = position_runs(fills, carried)
+        if runs is None:
+            continue
+        positions = position_totals(fills, runs, carried, offset)
+        offset += len(fills['quantity'])
+        yield from position_rows(positions, positions['closed'])
+        carried = carry_positions(positions, carried, runs['carried'])
+    if carried is not None:
+        yield from position_rows(carried, ~carried['closed'])
+
+
+class ReportSummary:
+    """
+    A report's closed trades, win rate, total profit and average days held, added up position
+    by position so streamed positions don't need to be kept.
+    """
+    def __init__(self, report: str) -> None:
+        self.report = report
+        self.trades = 0
+        self.open_positions = 0
+        self.wins = 0
+        self.profit = 0
+        self.days = 0
+
+    def add(self, position: list) -> None:
+        if position[HEADERS.index('end')] is None:
+            self.open_positions += 1
+            return
+        self.trades += 1
+        self.wins += position[HEADERS.index('profit')] > 0
+        self.profit += position[HEADERS.index('profit')]
+        self.days += position[HEADERS.index('days')]
+
+    def as_dict(self) -> dict:
+        return {
+            'report': self.report,
+            'trades': self.trades,
+            'open_positions': self.open_positions,
+            'win_rate_pc': self.wins / self.trades * 100 if self.trades else 0,
+            'total_profit': self.profit,
+            'average_days': self.days / self.trades if self.trades else 0,
+        }
+
+
+class CsvWriter:
+    """
+    Writes rows to a csv file as they come.
+    """
+    suffix = '.csv'
+
+    def __init__(self, path: Path, headers: list) -> None:
+        self.file = open(path, 'w', encoding='UTF8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(headers)
+
+    def write(self, row: list) -> None:
+        self.writer.writerow(row)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class FrameWriter:
+    """
+    Collects rows into a DataFrame written in a columnar format on close, which loads much faster
+    than csv. Open positions' end and days are nulls rather than csv's blank and "-".
+    """
+    suffix = None
+
+    def __init__(self, path: Path, headers: list) -> None:
+        self.path = path
+        self.headers = headers
+        self.rows = []
+
+    def write(self, row: list) -> None:
+        self.rows.append(row)
+
+    def close(self) -> None:
+        frame = pd.DataFrame(self.rows, columns=self.headers)
+        if 'days' in frame:
+            frame['days'] = pd.to_numeric(frame['days'], errors='coerce').astype('Int64')
+        self.save(frame)
+
+    def save(self, frame: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+
+class ParquetWriter(FrameWriter):
+    suffix = '.parquet'
+
+    def save(self, frame: pd.DataFrame) -> None:
+        frame.to_parquet(self.path, index=False)
+
+
+class FeatherWriter(FrameWriter):
+    suffix = '.feather'
+
+    def save(self, frame: pd.DataFrame) -> None:
+        frame.to_feather(self.path)
+
+
+# output format name -> writer, parquet and feather need pyarrow
+WRITERS = {'csv': CsvWriter, 'parquet': ParquetWriter, 'feather': FeatherWriter}
+
+
+def write_rows(rows, path: Path, headers: list, output_format: str = 'csv', summary: Optional[ReportSummary] = None) -> bool:
+    """
+    Writes rows with the output format's writer, creating the file with the first row.
+
+    :param rows: Iterable of rows of `headers` values.
+    :param path: The output path, the format's suffix is added to it.
+    :param summary: Optional ReportSummary to add the rows to.
+    :return: Whether there were any rows.
+    """
+    writer = None
+    try:
+        for row in rows:
+            if writer is None:
+                writer = WRITERS[output_format](path.with_name(path.name + WRITERS[output_format].suffix), headers)
+            writer.write(row)
+            if summary is not None:
+                summary.add(row)
+    finally:
+        if writer is not None:
+            writer.close()
+    return writer is not None
+
+
+def analyzed_path(path: Path, output_format: str = 'csv') -> Path:
+    return path.with_name(f"{path.stem}_analyzed{WRITERS[output_format].suffix}")
+
+
+def analyze_file(path: Path, stream: bool = False, output_format: str = 'csv') -> Optional[dict]:
+    """
+    Writes the <name>_analyzed.<format> positions of an order export next to it.
+
+    :param path: The order export.
+    :param stream: Reads the export in chunks and writes positions as they close, instead of
+        analyzing it as a whole. Gives the same rows.
+    :param output_format: One of WRITERS.
+    :return: The report's summary row, None when it has no filled orders.
+    """
+    positions = stream_positions(path) if stream else analyze(read_orders(path))
+    summary = ReportSummary(path.stem)
+    if not write_rows(positions, path.with_name(f"{path.stem}_analyzed"), HEADERS, output_format, summary):
+        return None
+    return summary.as_dict()
+
+
+def write_trades(path: Path, output_format: str = 'csv') -> Optional[Path]:
+    """
+    Writes the first in first out matched trades of an order export to <name>_processed.<format> next to it.
+
+    :return: The trades file, None when nothing was traded.
+    """
+    output = path.with_name(f"{path.stem}_processed")
+    if not write_rows(match_trades(read_orders(path)), output, TRADE_HEADERS, output_format):
+        return None
+    return output.with_name(output.name + WRITERS[output_format].suffix)
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def analyze_report(path: Path, stream: bool = False, output_format: str = 'csv') -> tuple:
+    """
+    `analyze_file` with the content hash of the export, for the manifest.
+    """
+    digest = file_hash(path)
+    return analyze_file(path, stream, output_format), digest
+
+
+class Manifest:
+    """
+    The size, mtime and content hash of every analyzed export, with the ANALYZER_VERSION and summary
+    it was analyzed with, so exports which are unchanged since aren't analyzed again.
+    An export whose size and mtime match is unchanged; one whose mtime alone changed is hashed.
+
+    :param path: The manifest json file.
+    """
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries = json.loads(path.read_text()) if path.exists() else {}
+
+    def unchanged(self, path: Path, output_format: str = 'csv') -> bool:
+        entry = self.entries.get(path.name)
+        if entry is None or entry['analyzer_version'] != ANALYZER_VERSION:
+            return False
+        if entry['summary'] is not None and not analyzed_path(path, output_format).exists():
+            return False
+        stat = path.stat()
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime_ns != entry['mtime']:
+            if file_hash(path) != entry['sha256']:
+                return False
+            entry['mtime'] = stat.st_mtime_ns
+        return True
+
+    def record(self, path: Path, stat: os.stat_result, digest: str, summary: Optional[dict]) -> None:
+        self.entries[path.name] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'sha256': digest,
+            'analyzer_version': ANALYZER_VERSION,
+            'summary': summary,
+        }
+
+    def summary(self, path: Path) -> Optional[dict]:
+        return self.entries[path.name]['summary']
+
+    def save(self, paths: list) -> None:
+        """
+        Writes the entries of the given exports, dropping those of deleted ones.
+        """
+        entries = {path.name: self.entries[path.name] for path in paths if path.name in self.entries}
+        temporary = self.path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(entries, indent=1))
+        temporary.replace(self.path)
+
+
+def analyze_orders(
+        workers: int = 1,
+        folder_path: Optional[Path] = None,
+        stream: bool = False,
+        force: bool = False,
+        output_format: str = 'csv',
+) -> None:
+    """
+    Analyzes every new or changed order export in backtest_reports, across `workers` processes,
+    and writes a summary of all of them to SUMMARY_FILENAME.
+    With `stream` exports are read in chunks, for exports too large to load at once.
+    With `force` unchanged exports are analyzed again too.
+    Positions are written in `output_format`, one of WRITERS.
+    """
+    folder_path = folder_path or Path(Path().absolute(), 'backtest_reports')
+    paths = sorted(
+        Path(folder_path, filename) for filename in os.listdir(folder_path)
+        if filename.endswith('.csv') and '_analyzed' not in filename and '_processed' not in filename
+        and filename != SUMMARY_FILENAME
+    )
+    manifest = Manifest(Path(folder_path, MANIFEST_FILENAME))
+    pending = paths if force else [path for path in paths if not manifest.unchanged(path, output_format)]
+    if len(pending) < len(paths):
+        print(f"{len(paths) - len(pending)} unchanged reports skipped")
+    with ProcessPoolExecutor(workers) as pool:
+        futures = {pool.submit(analyze_report, path, stream, output_format): (path, path.stat()) for path in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            path, stat = futures[future]
+            summary, digest = future.result()
+            manifest.record(path, stat, digest, summary)
+            print(f"[{done}/{len(pending)}] {path.name}: {summary['trades'] if summary else 0} trades")
+    manifest.save(paths)
+    summaries = [manifest.summary(path) for path in paths if manifest.summary(path)]
+    if summaries:
+        pd.DataFrame(summaries).sort_values('report').to_csv(Path(folder_path, SUMMARY_FILENAME), index=False)
 
 
 if __name__ == "__main__":
-    analyze_orders()
+    parser = argparse.ArgumentParser(description='Analyzes the new or changed order exports in backtest_reports.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of processes')
+    parser.add_argument('--stream', action='store_true', help='reads exports in chunks, for exports too large for memory')
+    parser.add_argument('--force', action='store_true', help='analyzes unchanged exports again')
+    parser.add_argument('--format', choices=WRITERS, default='csv', help='format of the analyzed positions, parquet and feather need pyarrow')
+    args = parser.parse_args()
+    analyze_orders(args.workers, stream=args.stream, force=args.force, output_format=args.format)
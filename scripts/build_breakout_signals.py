@@ -0,0 +1,99 @@
+"""
+Precomputes Breakout's entry signals for the full history of every ticker in a local bar dataset
+and writes them to a SignalStore, which Breakout backtests from when its SIGNALS_PATH is set.
+
+Signals come from Breakout's own SymbolIndicators and pattern masks, run over each ticker's bars
+across a process pool. Breakout levels persist until the next breakout, so signals depend on when the
+indicators started: by default they start at each ticker's first bar, with --start they're warmed up
+from the 200 bars before that date, which gives the same signals as a backtest starting then.
+
+$ python -m scripts.build_breakout_signals --data data/equity/usa/daily --store data/breakout_signals --start 2021-01-01
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from replay.data import BarStore
+from scripts.sweep_breakout import breakout_defaults, load_breakout, state_columns, ticker_state
+
+
+def ticker_signals(task):
+    """
+    The signal rows of one ticker.
+
+    :param task: (ticker column, ticker, dates, bars, start index, range filter, peak range), see ticker_state.
+    :return: Dict of SignalStore columns.
+    """
+    from scanner import FEATURES, pattern_masks
+    from signal_store import COLUMNS
+    column, ticker, dates, bars, start, range_filter, peak_range = task
+    _, _, state = ticker_state((0, column, ticker, dates, bars, start, range_filter, peak_range))
+    names = state_columns()
+    ready = state[:, names.index('ready')] > 0
+    days = np.flatnonzero(ready) + start
+    state = state[ready]
+    f = {name: state[:, names.index(name)] for name in FEATURES}
+    masks = pattern_masks(f)[:3]
+    levels = (f['close'], f['high_2'], f['breakout_level'])
+    columns = {name: [] for name in COLUMNS}
+    for pattern, (mask, level) in enumerate(zip(masks, levels)):
+        columns['symbol'].append(np.full(mask.sum(), column))
+        columns['date'].append(dates[days[mask]].to_numpy().astype('datetime64[D]'))
+        columns['pattern'].append(np.full(mask.sum(), pattern))
+        columns['level'].append(level[mask])
+        columns['atr'].append(f['atr'][mask])
+        columns['close'].append(f['close'][mask])
+    return {name: np.concatenate(values) for name, values in columns.items()}
+
+
+def build(data_dir, path, tickers=None, start=None, range_filter=None, peak_range=None, workers=None):
+    """
+    Computes the signals of every ticker and writes the store.
+
+    :param data_dir: Directory of bar files, see replay.data.load_bars.
+    :param path: The store directory.
+    :param tickers: Optional tickers to restrict the store to.
+    :param start: Optional date the indicators start on, each ticker's first bar by default.
+    :param range_filter: Optional resistance levels range filter, Breakout's RANGE_FILTER by default.
+    :param peak_range: Optional resistance levels peak range, Breakout's PEAK_RANGE by default.
+    :param workers: Number of processes, one per CPU by default.
+    :return: The SignalStore.
+    """
+    load_breakout()
+    from signal_store import COLUMNS, SignalStore
+    parameters = breakout_defaults()['parameters']
+    range_filter = parameters['RANGE_FILTER'] if range_filter is None else range_filter
+    peak_range = parameters['PEAK_RANGE'] if peak_range is None else peak_range
+    store = BarStore.from_directory(data_dir, set(tickers) if tickers else None)
+    start_index = store.dates.searchsorted(pd.Timestamp(start)) if start is not None else 1
+    tasks = [
+        (column, ticker, store.dates, store.values[:, column], start_index, range_filter, peak_range)
+        for column, ticker in enumerate(store.tickers)
+    ]
+    with ProcessPoolExecutor(workers or os.cpu_count(), initializer=load_breakout) as pool:
+        rows = list(pool.map(ticker_signals, tasks))
+    columns = {name: np.concatenate([row[name] for row in rows]) for name in COLUMNS} if rows else {name: [] for name in COLUMNS}
+    start = store.dates[min(start_index, len(store.dates) - 1)] if start is not None else None
+    SignalStore.write(path, store.tickers, columns, range_filter, peak_range, start)
+    return SignalStore(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m scripts.build_breakout_signals', description='Precomputes Breakout signals into a signal store.')
+    parser.add_argument('--data', required=True, help='directory of <TICKER>.csv / .parquet / LEAN daily .zip files')
+    parser.add_argument('--store', required=True, help='signal store directory')
+    parser.add_argument('--tickers', nargs='+', help='restricts the store to these tickers')
+    parser.add_argument('--start', type=pd.Timestamp, help="date the indicators start on, as a backtest's start date")
+    parser.add_argument('--range-filter', type=float, help="overrides Breakout's RANGE_FILTER")
+    parser.add_argument('--peak-range', type=int, help="overrides Breakout's PEAK_RANGE")
+    parser.add_argument('--workers', type=int, help='number of processes')
+    args = parser.parse_args()
+    store = build(args.data, args.store, args.tickers, args.start, args.range_filter, args.peak_range, args.workers)
+    print(f"{len(store)} signals for {len(store.tickers)} tickers written to {args.store}")
+
+
+if __name__ == '__main__':
+    main()
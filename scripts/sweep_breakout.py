@@ -0,0 +1,296 @@
+"""
+Parameter sweep for the Breakout strategy over local daily bars.
+
+Breakout's indicators don't depend on its risk parameters, so they're computed once per resistance
+level setting (RANGE_FILTER, PEAK_RANGE) by running its SymbolIndicators over every screened ticker,
+and saved as (days x tickers x features) .npy files. Worker processes memory-map those read-only and
+apply Breakout's trading rules (OnData, buy, sell_signal) for their share of the configurations, so a
+configuration costs one pass over the daily feature rows instead of a full replay.
+
+$ python -m scripts.sweep_breakout --data data/equity/usa/daily --start 2021-01-01 --end 2021-12-31 \
+    --grid EQUITY_RISK_PC=0.005,0.0075,0.01 SL_RISK_PC=-0.03,-0.05 TP_TARGET=0.1,0.2,0.3 \
+    RANGE_FILTER=0.005,0.01 PEAK_RANGE=2,3 --results backtest_reports/breakout_sweep.csv
+
+Tickers are assumed to stay in the universe once screened, which matches a replay unless they have
+missing days.
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from replay.data import FIELDS, BarStore
+from replay.market import Symbol, TradeBar
+from replay.runner import install, load_algorithm_class
+
+BREAKOUT_DIR = Path(__file__).resolve().parents[1] / 'Breakout'
+PARAMETERS = {'EQUITY_RISK_PC': float, 'SL_RISK_PC': float, 'TP_TARGET': float, 'RANGE_FILTER': float, 'PEAK_RANGE': int}
+LEVEL_PARAMETERS = ('RANGE_FILTER', 'PEAK_RANGE')
+# as the history prefetched by Breakout.prefetch
+HISTORY_PERIODS = 200
+# memory-mapped feature files opened by this process
+_states = {}
+
+
+def load_breakout():
+    """
+    Makes Breakout's modules (indicators, scanner, ...) importable: registers the replay stand-in
+    for AlgorithmImports and puts the project on sys.path. Called by the entry points and by each
+    worker process before they import them.
+    """
+    install()
+    if str(BREAKOUT_DIR) not in sys.path:
+        sys.path.insert(0, str(BREAKOUT_DIR))
+
+
+def state_columns() -> tuple:
+    """
+    The columns of the indicator state: Breakout's FEATURES and whether the indicators were ready.
+    """
+    from scanner import FEATURES
+    return FEATURES + ('ready',)
+
+
+def breakout_defaults() -> dict:
+    """
+    The backtest configuration of Breakout.Initialize: parameters, dates, cash and screened tickers.
+    """
+    algorithm = load_algorithm_class(BREAKOUT_DIR)()
+    algorithm.Initialize()
+    return {
+        'parameters': {name: getattr(algorithm, name) for name in PARAMETERS},
+        'start': algorithm.StartDate,
+        'end': algorithm.EndDate,
+        'cash': algorithm.Portfolio.Cash,
+        'tickers': sorted(algorithm.screen),
+    }
+
+
+def parse_grid(items) -> dict:
+    """
+    Parses NAME=value,value,... items into lists of parameter values.
+    """
+    grid = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if name not in PARAMETERS:
+            raise ValueError(f"unknown parameter {name}, expected one of {', '.join(PARAMETERS)}")
+        grid[name] = [PARAMETERS[name](value) for value in values.split(',')]
+    return grid
+
+
+def configurations(grid, defaults) -> list:
+    """
+    Every combination of the grid's values, with the defaults for parameters not in the grid.
+    """
+    names = list(grid)
+    return [{**defaults, **dict(zip(names, values))} for values in itertools.product(*grid.values())]
+
+
+def ticker_state(task):
+    """
+    Runs SymbolIndicators over one ticker's bars, as Breakout does from the day it's first screened.
+
+    :param task: (level index, ticker column, ticker, dates, bars, start index, range filter, peak range)
+        where bars is the ticker's (dates x fields) array, NaN on days without a bar.
+    :return: The level index, column and (days from start x state_columns()) array, NaN before the ticker was
+        screened and on days without a bar.
+    """
+    from indicators import SymbolIndicators
+    from scanner import feature_values
+    level_index, column, ticker, dates, bars, start, range_filter, peak_range = task
+    names = state_columns()
+    CLOSE, READY = names.index('close'), names.index('ready')
+    available = ~np.isnan(bars[:, 3])
+    state = np.full((len(dates) - start, len(names)), np.nan)
+    # coarse selection sees the previous day's bars, so a ticker is first screened the day after a bar
+    first_day = max(start, 1)
+    screened = np.flatnonzero(available[first_day - 1:len(dates) - 1])
+    if not len(screened):
+        return level_index, column, state
+    first = first_day + screened[0]
+    # the bars History returns on that day, timestamped by their end time
+    history_days = np.flatnonzero(available[:first])[-HISTORY_PERIODS:]
+    history = pd.DataFrame(bars[history_days], index=dates[history_days] + timedelta(1), columns=list(FIELDS))
+    symbol = Symbol(ticker)
+    indicators = SymbolIndicators(None, symbol, history, range_filter, peak_range)
+    for i in np.flatnonzero(available[first:]) + first:
+        open, high, low, close, volume = bars[i]
+        indicators.update(TradeBar(dates[i].to_pydatetime(), symbol, open, high, low, close, volume, timedelta(1)))
+        if indicators.ready:
+            state[i - start] = (*feature_values(indicators), 1.0)
+        else:
+            state[i - start, CLOSE] = close
+            state[i - start, READY] = 0.0
+    return level_index, column, state
+
+
+def precompute(store, tickers, start, end, levels, directory, pool) -> list:
+    """
+    Writes the indicator state of every ticker for each resistance level setting to a .npy file.
+
+    :param store: BarStore of the daily bars.
+    :param tickers: The screened tickers.
+    :param start: Index of the first day traded in the store.
+    :param end: Index of the day after the last day traded.
+    :param levels: (range filter, peak range) settings.
+    :param directory: Where the files are written.
+    :param pool: Executor running the tickers in parallel.
+    :return: The file path for each setting.
+    """
+    tickers = [ticker for ticker in tickers if ticker in store]
+    dates = store.dates[:end]
+    paths = [Path(directory, f"state_{range_filter}_{peak_range}.npy") for range_filter, peak_range in levels]
+    states = [
+        np.lib.format.open_memmap(path, mode='w+', shape=(int(end - start), len(tickers), len(state_columns())))
+        for path in paths
+    ]
+    tasks = [
+        (level_index, column, ticker, dates, store.values[:end, store.columns[ticker]], start, range_filter, peak_range)
+        for level_index, (range_filter, peak_range) in enumerate(levels)
+        for column, ticker in enumerate(tickers)
+    ]
+    for level_index, column, state in pool.map(ticker_state, tasks, chunksize=4):
+        states[level_index][:, column] = state
+    for state in states:
+        state.flush()
+    return paths
+
+
+def load_state(path):
+    if path not in _states:
+        _states[path] = np.load(path, mmap_mode='r')
+    return _states[path]
+
+
+def simulate(config, path, cash) -> dict:
+    """
+    Applies Breakout's trading rules to precomputed indicator state.
+    Each day sells positions past TP_TARGET or SL_RISK_PC, then buys the hvc, inside day and breakout
+    signals of uninvested tickers, lowest ATR % first, while there is cash: the same orders, fills
+    at the close and portfolio accounting as a replay of the strategy. Exits, signal order, sizing
+    and tags come from Breakout's own risk and scanner functions.
+
+    :param config: Parameter values.
+    :param path: The .npy indicator state for the config's resistance level setting.
+    :param cash: Starting cash.
+    :return: Performance metrics and the orders as (day, ticker column, quantity, price, tag) tuples.
+    """
+    from risk import position_size, exit_signal
+    from scanner import FEATURES, order_tag, ranked_signals
+    names = state_columns()
+    CLOSE, ATR, READY = names.index('close'), names.index('atr'), names.index('ready')
+    state = load_state(path)
+    tickers = state.shape[1]
+    equity_risk, stop_loss, target = config['EQUITY_RISK_PC'], config['SL_RISK_PC'], config['TP_TARGET']
+    quantity = np.zeros(tickers)
+    average = np.zeros(tickers)
+    price = np.full(tickers, np.nan)
+    equity = np.empty(len(state))
+    orders = []
+    wins = closed = 0
+    for day_index, day in enumerate(state):
+        close = day[:, CLOSE]
+        traded = ~np.isnan(close)
+        price[traded] = close[traded]
+        ready = traded & (day[:, READY] > 0)
+        for column in np.flatnonzero(ready & (quantity != 0)):
+            cost = quantity[column] * average[column]
+            profit = (quantity[column] * price[column] - cost) / abs(cost)
+            if exit_signal(profit, target, stop_loss):
+                cash += quantity[column] * price[column]
+                orders.append((day_index, column, -quantity[column], price[column], 'Liquidated'))
+                closed += 1
+                wins += profit > 0
+                quantity[column] = average[column] = 0.0
+        candidates = np.flatnonzero(ready & (quantity == 0))
+        if len(candidates):
+            f = {name: day[candidates, i] for i, name in enumerate(FEATURES)}
+            for i, pattern, level in ranked_signals(f):
+                column = candidates[i]
+                portfolio_value = cash + np.nansum(quantity * price)
+                size = position_size(portfolio_value, equity_risk, day[column, ATR], price[column], stop_loss)
+                if size * price[column] < cash and size:
+                    cash -= size * price[column]
+                    average[column] = (quantity[column] * average[column] + size * price[column]) / (quantity[column] + size)
+                    quantity[column] += size
+                    orders.append((day_index, column, size, price[column], order_tag(pattern, level)))
+        equity[day_index] = cash + np.nansum(quantity * price)
+    returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(1)
+    return {
+        **config,
+        'final_value': equity[-1] if len(equity) else cash,
+        'return_pc': (equity[-1] / equity[0] - 1) * 100 if len(equity) else 0.0,
+        'max_drawdown_pc': np.max(1 - equity / np.maximum.accumulate(equity)) * 100 if len(equity) else 0.0,
+        'sharpe': returns.mean() / returns.std() * np.sqrt(252) if returns.std() else 0.0,
+        'buys': sum(1 for order in orders if order[2] > 0),
+        'win_rate_pc': wins / closed * 100 if closed else 0.0,
+        'orders': orders,
+    }
+
+
+def evaluate(task) -> dict:
+    config, path, cash = task
+    result = simulate(config, path, cash)
+    del result['orders']
+    return result
+
+
+def sweep(data_dir, grid, start=None, end=None, cash=None, tickers=None, rank='sharpe', workers=None) -> pd.DataFrame:
+    """
+    Runs every configuration of the grid and ranks them.
+
+    :param data_dir: Directory of bar files, see replay.data.load_bars.
+    :param grid: Dict of parameter name to the values tried, parameters not in it keep Breakout's values.
+    :param start: Optional start date, Breakout's backtest start by default.
+    :param end: Optional end date, Breakout's backtest end by default.
+    :param cash: Optional starting cash, Breakout's by default.
+    :param tickers: Optional screened tickers, Breakout's backtest screen by default.
+    :param rank: The result column configurations are ranked by, highest first.
+    :param workers: Number of processes, one per CPU by default.
+    :return: DataFrame of the configurations and their metrics, best first.
+    """
+    load_breakout()
+    defaults = breakout_defaults()
+    start = pd.Timestamp(start or defaults['start'])
+    end = pd.Timestamp(end or defaults['end'])
+    cash = float(cash or defaults['cash'])
+    tickers = sorted(tickers or defaults['tickers'])
+    store = BarStore.from_directory(data_dir, set(tickers))
+    start_index, end_index = store.dates.searchsorted(start), store.dates.searchsorted(end, side='right')
+    configs = configurations(grid, defaults['parameters'])
+    levels = sorted({tuple(config[name] for name in LEVEL_PARAMETERS) for config in configs})
+    with tempfile.TemporaryDirectory() as directory, ProcessPoolExecutor(workers or os.cpu_count(), initializer=load_breakout) as pool:
+        paths = dict(zip(levels, precompute(store, tickers, start_index, end_index, levels, directory, pool)))
+        tasks = [(config, paths[tuple(config[name] for name in LEVEL_PARAMETERS)], cash) for config in configs]
+        results = list(pool.map(evaluate, tasks, chunksize=max(len(tasks) // ((workers or os.cpu_count()) * 4), 1)))
+    return pd.DataFrame(results).sort_values(rank, ascending=False, kind='stable').reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m scripts.sweep_breakout', description='Sweeps Breakout parameters over local daily bars.')
+    parser.add_argument('--data', required=True, help='directory of <TICKER>.csv / .parquet / LEAN daily .zip files')
+    parser.add_argument('--grid', nargs='+', default=[], help=f"NAME=value,value,... for any of {', '.join(PARAMETERS)}")
+    parser.add_argument('--start', type=pd.Timestamp, help="overrides Breakout's start date")
+    parser.add_argument('--end', type=pd.Timestamp, help="overrides Breakout's end date")
+    parser.add_argument('--cash', type=float, help="overrides Breakout's starting cash")
+    parser.add_argument('--tickers', nargs='+', help="overrides Breakout's backtest screen")
+    parser.add_argument('--rank', default='sharpe', help='result column to rank by: sharpe, return_pc, final_value, ...')
+    parser.add_argument('--workers', type=int, help='number of processes')
+    parser.add_argument('--results', help='writes the ranked results to this csv path')
+    args = parser.parse_args()
+    results = sweep(args.data, parse_grid(args.grid), args.start, args.end, args.cash, args.tickers, args.rank, args.workers)
+    print(results.to_string(max_rows=20))
+    if args.results:
+        results.to_csv(args.results, index=False)
+
+
+if __name__ == '__main__':
+    main()
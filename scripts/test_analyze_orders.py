@@ -0,0 +1,240 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scripts.analyze_orders
+from scripts.analyze_orders import (
+    HEADERS, QUANTITY_TOLERANCE, analyze, match_trades, read_orders, running_sums, running_totals, stream_positions,
+)
+
+
+def random_orders(seed, fractional, rows=800, symbols=6) -> pd.DataFrame:
+    """
+    Orders opening long and short positions, adding to them, partially exiting, closing and reversing them.
+    """
+    rng = np.random.default_rng(seed)
+    nets = {}
+    orders = []
+    time = pd.Timestamp('2021-01-01', tz='UTC')
+    for i in range(rows):
+        symbol = f"S{rng.integers(symbols)}"
+        net = nets.get(symbol, 0)
+        action = rng.random()
+        if net and action < 0.25:
+            quantity = -net
+        elif net and action < 0.4:
+            quantity = -net * (1.7 if fractional else 2)
+        elif net and action < 0.65:
+            quantity = -net * rng.integers(1, 4) / 4
+        else:
+            quantity = rng.integers(1, 50) * (1 if rng.random() < 0.6 else -1) * (0.137 if fractional else 1)
+        if not fractional:
+            quantity = int(round(quantity))
+        if not quantity:
+            continue
+        price = round(float(rng.uniform(10, 100)), 2)
+        status = 'Filled' if rng.random() > 0.03 else 'Invalid'
+        if status == 'Filled':
+            nets[symbol] = net + quantity
+        orders.append((time + pd.Timedelta(hours=i), symbol, price, quantity, 'Market', status, price * quantity, ''))
+    return pd.DataFrame(orders, columns=['Time', 'Symbol', 'Price', 'Quantity', 'Type', 'Status', 'Value', 'Tag'])
+
+
+def write_export(orders, path, old_format=False):
+    """
+    Writes orders in LEAN's current export format, or the older one with Date Time and without Value.
+    """
+    orders = orders.copy()
+    if old_format:
+        orders['Time'] = orders.Time.dt.strftime('%m/%d/%Y %H:%M:%S')
+        orders = orders.rename(columns={'Time': 'Date Time'}).drop(columns=['Value'])
+    else:
+        orders['Time'] = orders.Time.dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    orders.to_csv(path, index=False)
+    return path
+
+
+def plain_fifo(orders):
+    """
+    Matches exits to entries with a queue of open lots per symbol, one order at a time.
+
+    :return: The trades, as TRADE_HEADERS rows, and the realized profit of each symbol's open position.
+    """
+    books = {}
+    realized = {}
+    trades = []
+    for order in orders[orders.Status == 'Filled'].itertuples():
+        quantity = order.Quantity
+        book = books.setdefault(order.Symbol, deque())
+        while abs(quantity) >= QUANTITY_TOLERANCE and book and (book[0][1] > 0) != (quantity > 0):
+            time, lot, price, unit_value = book[0]
+            size = min(abs(quantity), abs(lot))
+            signed = math.copysign(size, lot)
+            trades.append([time, order.Time, order.Symbol, price, order.Price, signed])
+            realized[order.Symbol] = realized.get(order.Symbol, 0) + (order.Value / order.Quantity - unit_value) * signed
+            lot -= signed
+            quantity += signed
+            if abs(lot) < QUANTITY_TOLERANCE:
+                book.popleft()
+            else:
+                book[0] = (time, lot, price, unit_value)
+        if not book:
+            realized.pop(order.Symbol, None)
+        if abs(quantity) >= QUANTITY_TOLERANCE:
+            book.append((order.Time, quantity, order.Price, order.Value / order.Quantity))
+    return trades, {symbol: realized.get(symbol, 0) for symbol, book in books.items() if book}
+
+
+def loop_sums(values, starts, lengths):
+    sums = np.zeros_like(values)
+    totals = np.zeros(len(starts), dtype=values.dtype)
+    for run, (start, length) in enumerate(zip(starts, lengths)):
+        for row in range(start, start + length):
+            totals[run] += values[row]
+            sums[row] = totals[run]
+    return sums, totals
+
+
+@pytest.mark.parametrize('lengths', [
+    [3, 1, 4, 1, 5, 9, 2, 6],
+    [0, 2, 0, 1],
+    # one long run among many short ones, summed run by run
+    [2] * 50 + [500] + [1] * 50,
+    [400, 300, 1, 1],
+])
+def test_running_sums_add_in_order(lengths):
+    rng = np.random.default_rng(len(lengths))
+    lengths = np.array(lengths)
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    values = rng.normal(size=lengths.sum()) * 10 ** rng.uniform(-3, 6, lengths.sum())
+    sums, totals = loop_sums(values, starts, lengths)
+    assert np.array_equal(running_sums(values, starts, lengths), sums)
+    assert np.array_equal(running_totals(values, starts, lengths), totals)
+
+
+def column(positions, name):
+    return [position[HEADERS.index(name)] for position in positions]
+
+
+@pytest.mark.parametrize('fractional', [False, True])
+@pytest.mark.parametrize('old_format', [False, True])
+@pytest.mark.parametrize('seed', [1, 2])
+def test_stream_positions_matches_analyze(tmp_path, seed, fractional, old_format):
+    path = write_export(random_orders(seed, fractional), tmp_path / 'orders.csv', old_format)
+    positions = analyze(read_orders(path))
+    assert any(size < 0 for size in column(positions, 'size'))
+    for chunksize in (7, 100, 10_000):
+        assert list(stream_positions(path, chunksize)) == positions
+
+
+def long_lived_orders(fractional, rows=3000) -> pd.DataFrame:
+    """
+    A long position and a short one held throughout, added to and partly sold in turn,
+    while another symbol opens and closes positions around them.
+    """
+    unit = 0.137 if fractional else 1
+    time = pd.Timestamp('2021-01-01', tz='UTC')
+    orders = [
+        (time, 'A', 50.0, 10 * unit, 'Filled'),
+        (time, 'C', 20.0, -7 * unit, 'Filled'),
+    ]
+    for i in range(rows):
+        time += pd.Timedelta(hours=1)
+        side = 1 if i % 2 == 0 else -1
+        orders.append((time, ['A', 'B', 'C'][i % 3], 10.0 + i % 17, side * (i % 3 + 1) * unit, 'Filled' if i % 29 else 'Invalid'))
+    orders = pd.DataFrame(orders, columns=['Time', 'Symbol', 'Price', 'Quantity', 'Status'])
+    orders['Value'] = orders.Price * orders.Quantity
+    return orders
+
+
+@pytest.mark.parametrize('fractional', [False, True])
+def test_stream_positions_carries_open_positions_not_their_fills(tmp_path, monkeypatch, fractional):
+    path = write_export(long_lived_orders(fractional), tmp_path / 'orders.csv')
+    positions = analyze(read_orders(path))
+    open_positions = [position for position in positions if position[1] is None]
+    _, realized = plain_fifo(read_orders(path))
+    assert {position[2]: position[HEADERS.index('realized_profit')] for position in open_positions} == pytest.approx(realized)
+    assert sorted(realized) == ['A', 'C']
+
+    carry_positions = scripts.analyze_orders.carry_positions
+    carried = []
+
+    def recording(*args):
+        positions = carry_positions(*args)
+        carried.append((len(positions['closed']), len(positions['lots']['position'])))
+        return positions
+
+    monkeypatch.setattr(scripts.analyze_orders, 'carry_positions', recording)
+    for chunksize in (50, 333):
+        carried.clear()
+        assert list(stream_positions(path, chunksize)) == positions
+        assert len(carried) > 8
+        # the two open positions and their few unsold entries, however many fills they had
+        assert max(count for count, _ in carried) <= 3
+        assert max(lots for _, lots in carried) <= 20
+
+
+@pytest.mark.parametrize('fractional', [False, True])
+@pytest.mark.parametrize('old_format', [False, True])
+@pytest.mark.parametrize('seed', [1, 2])
+def test_match_trades_matches_plain_fifo(tmp_path, seed, fractional, old_format):
+    orders = read_orders(write_export(random_orders(seed, fractional), tmp_path / 'orders.csv', old_format))
+    expected, _ = plain_fifo(orders)
+    trades = match_trades(orders)
+    assert [trade[:5] for trade in trades] == [trade[:5] for trade in expected]
+    assert [trade[5] for trade in trades] == pytest.approx([trade[5] for trade in expected])
+
+
+@pytest.mark.parametrize('fractional', [False, True])
+@pytest.mark.parametrize('seed', [1, 2])
+def test_open_positions_realized_profit(tmp_path, seed, fractional):
+    orders = read_orders(write_export(random_orders(seed, fractional), tmp_path / 'orders.csv'))
+    _, realized = plain_fifo(orders)
+    positions = analyze(orders)
+    open_positions = {position[2]: position for position in positions if position[1] is None}
+    assert open_positions.keys() == realized.keys()
+    for symbol, position in open_positions.items():
+        assert position[HEADERS.index('realized_profit')] == pytest.approx(realized[symbol])
+    for position in positions:
+        profit, value_sold, value = (position[HEADERS.index(name)] for name in ('profit', 'value_sold', 'value'))
+        assert profit == value_sold - value
+        if position[1] is not None:
+            assert position[HEADERS.index('realized_profit')] == profit
+
+
+def test_formats_give_the_same_positions_and_trades(tmp_path):
+    orders = random_orders(3, fractional=True)
+    current = read_orders(write_export(orders, tmp_path / 'current.csv'))
+    old = read_orders(write_export(orders, tmp_path / 'old.csv', old_format=True))
+    # the older format's times have no time zone, and its values are Price * Quantity rather than
+    # read, which can differ in the last bit
+    for old_row, row in zip(analyze(old), analyze(current), strict=True):
+        assert old_row[2:] == pytest.approx(row[2:])
+    assert [row[2:] for row in match_trades(old)] == [row[2:] for row in match_trades(current)]
+
+
+def test_short_reversal_and_partial_exit(tmp_path):
+    orders = pd.DataFrame([
+        ('2021-01-04T00:00:00Z', 'A', 10.0, -10, 'Filled', -100.0),
+        ('2021-01-05T00:00:00Z', 'A', 8.0, 4, 'Filled', 32.0),
+        # covers the remaining 6 and opens a long of 4
+        ('2021-01-06T00:00:00Z', 'A', 9.0, 10, 'Filled', 90.0),
+        ('2021-01-07T00:00:00Z', 'A', 12.0, -1, 'Filled', -12.0),
+        ('2021-01-08T00:00:00Z', 'A', 13.0, 5, 'Invalid', 65.0),
+    ], columns=['Time', 'Symbol', 'Price', 'Quantity', 'Status', 'Value'])
+    path = tmp_path / 'orders.csv'
+    orders.to_csv(path, index=False)
+    positions = analyze(read_orders(path))
+    time = lambda day: pd.Timestamp(f'2021-01-0{day}', tz='UTC')
+    assert positions == [
+        [time(4), time(6), 'A', 10.0, -10, -100.0, -10, -86.0, 14.0, 14.0 / 86.0 * 100, 2, 14.0],
+        [time(6), None, 'A', 9.0, 4, 36.0, 1, 12.0, -24.0, -200.0, '-', 3.0],
+    ]
+    assert match_trades(read_orders(path)) == [
+        [time(4), time(5), 'A', 10.0, 8.0, -4],
+        [time(4), time(6), 'A', 10.0, 9.0, -6],
+        [time(6), time(7), 'A', 9.0, 12.0, 1],
+    ]
@@ -0,0 +1,55 @@
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from replay.data import FIELDS, BarStore
+from replay.runner import run
+from scripts.sweep_breakout import BREAKOUT_DIR, breakout_defaults, load_breakout, precompute, simulate
+
+
+def random_bars(rng, dates):
+    close = 20 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, len(dates))))
+    open = close * (1 + rng.normal(0, 0.005, len(dates)))
+    high = np.maximum(open, close) * (1 + abs(rng.normal(0, 0.01, len(dates))))
+    low = np.minimum(open, close) * (1 - abs(rng.normal(0, 0.01, len(dates))))
+    volume = rng.integers(100_000, 5_000_000, len(dates)).astype(float)
+    return pd.DataFrame(dict(zip(FIELDS, (open, high, low, close, volume))), index=dates)
+
+
+@pytest.fixture(scope='module')
+def store():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2001-01-01', '2002-12-31')
+    tickers = breakout_defaults()['tickers'] + ['SPY']
+    return BarStore({ticker: random_bars(rng, dates) for ticker in sorted(tickers)})
+
+
+def test_simulate_matches_replay(store):
+    load_breakout()
+    defaults = breakout_defaults()
+    start, end = pd.Timestamp('2002-01-01'), pd.Timestamp('2002-12-31')
+    tickers = sorted(defaults['tickers'])
+    start_index, end_index = store.dates.searchsorted(start), store.dates.searchsorted(end, side='right')
+    parameters = defaults['parameters']
+    level = (parameters['RANGE_FILTER'], parameters['PEAK_RANGE'])
+    with tempfile.TemporaryDirectory() as directory, ThreadPoolExecutor(1) as pool:
+        [path] = precompute(store, tickers, start_index, end_index, [level], directory, pool)
+        result = simulate(parameters, str(path), defaults['cash'])
+
+    replay = run(BREAKOUT_DIR, store, start=start, end=end)
+    orders = replay.orders
+    expected = [
+        (pd.Timestamp(order.Time), str(order.Symbol), order.Quantity, order.Price, order.Tag)
+        for order in orders[orders.Status.astype(str).str.contains('Filled')].itertuples()
+    ]
+    # simulated orders fill at the close of their day, replayed bars end the day after
+    simulated = [
+        (store.dates[start_index + day] + pd.Timedelta(days=1), tickers[column], quantity, price, tag)
+        for day, column, quantity, price, tag in result['orders']
+    ]
+    assert expected
+    assert simulated == expected
+    assert result['final_value'] == pytest.approx(replay.algorithm.Portfolio.TotalPortfolioValue)